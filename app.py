@@ -1,119 +1,168 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, timedelta
 import os
+import html
 from dotenv import load_dotenv
-import requests
-import json
-import io
-import PyPDF2
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Callable, List, Tuple
+
+from healthai.alerts import alert_counts, alert_messages, detect_alerts
+from healthai.async_client import run_generations
+from healthai.backends import get_backend, selected_backend
+from healthai.charts import (
+    blood_pressure_figure,
+    cached_figure,
+    correlation_figure,
+    date_bounds,
+    glucose_figure,
+    heart_rate_figure,
+    score_distribution_figure,
+    select_date_range,
+    status_distribution_figure,
+)
+from healthai.cohort import (
+    PATIENT_COLUMN,
+    cohort_summary,
+    patient_data as cohort_patient_data,
+    read_cohort_csvs,
+    score_distribution,
+)
+from healthai.conversation import ConversationMemory
+from healthai.health_rules import evaluate_rules
+from healthai.health_store import get_health_store
+from healthai.ingestion import SchemaError, read_health_csv
+from healthai.pdf_extraction import read_pdf_pages
+from healthai.health_summary import HealthSummary, extend_health_summary, summarize_health_data
+from healthai.report_summary import REPORT_CONCURRENCY, ReportSummary, merge_report, report_prompts
+from healthai.rolling_stats import RollingStats
+from healthai.vitals_extraction import ExtractionResult, extract_vitals
+from healthai.prompt_budget import BuiltPrompt
+from healthai.prompts import (
+    build_vitals_fallback_prompt,
+    chat_health_context,
+    compose_chat_prompt,
+    compose_insights_prompt,
+    compose_prediction_prompt,
+    compose_treatment_prompt,
+    prediction_health_context,
+    treatment_health_context,
+)
+from healthai.watson_client import (
+    WatsonAPIError,
+    WatsonTokenError,
+    WatsonXClient,
+    get_token_manager,
+)
 
 # Load environment variables
 load_dotenv()
 
-# Page configuration
-st.set_page_config(
-    page_title="HealthAI - Intelligent Healthcare Assistant",
-    page_icon="🏥",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for enhanced UI
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        color: #2E86AB;
-        text-align: center;
-        margin-bottom: 2rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-    }
-    .feature-header {
-        font-size: 2rem;
-        font-weight: bold;
-        color: #A23B72;
-        margin-bottom: 1.5rem;
-        border-bottom: 3px solid #A23B72;
-        padding-bottom: 0.5rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    .chat-message {
-        padding: 1rem;
-        border-radius: 15px;
-        margin-bottom: 1rem;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .user-message {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        margin-left: 20%;
-        border-radius: 15px 15px 5px 15px;
-    }
-    .ai-message {
-        background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-        color: white;
-        margin-right: 20%;
-        border-radius: 15px 15px 15px 5px;
-    }
-    .sidebar-content {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin-bottom: 1rem;
-    }
-    .upload-area {
-        border: 2px dashed #667eea;
-        border-radius: 10px;
-        padding: 2rem;
-        text-align: center;
-        background-color: #f8f9fa;
-        margin: 1rem 0;
-    }
-    .success-box {
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        color: #155724;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        color: #856404;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-    .error-box {
-        background-color: #f8d7da;
-        border: 1px solid #f5c6cb;
-        color: #721c24;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
 
 class HealthAIAssistant:
     def __init__(self):
+        self.setup_page_config()
+        self.apply_custom_styles()
         self.initialize_session_state()
-        self.watson_credentials = self.init_watson_credentials()
+        self.backend_name = selected_backend()
+        self.watson_credentials = self.init_watson_credentials() if self.backend_name == "watsonx" else None
+        self.watson_client = self.init_ai_backend()
+    
+    def setup_page_config(self):
+        """Configure Streamlit page settings"""
+        st.set_page_config(
+            page_title="HealthAI - Intelligent Healthcare Assistant",
+            page_icon="🏥",
+            layout="wide",
+            initial_sidebar_state="expanded"
+        )
+    
+    def apply_custom_styles(self):
+        """Apply custom CSS styles"""
+        st.markdown("""
+        <style>
+            .main-header {
+                font-size: 3rem;
+                font-weight: bold;
+                color: #2E86AB;
+                text-align: center;
+                margin-bottom: 2rem;
+                text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
+            }
+            .feature-header {
+                font-size: 2rem;
+                font-weight: bold;
+                color: #A23B72;
+                margin-bottom: 1.5rem;
+                border-bottom: 3px solid #A23B72;
+                padding-bottom: 0.5rem;
+            }
+            .metric-card {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 1.5rem;
+                border-radius: 15px;
+                margin: 1rem 0;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+            }
+            .chat-message {
+                padding: 1rem;
+                border-radius: 15px;
+                margin-bottom: 1rem;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }
+            .user-message {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                margin-left: 20%;
+                border-radius: 15px 15px 5px 15px;
+            }
+            .ai-message {
+                background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
+                color: white;
+                margin-right: 20%;
+                border-radius: 15px 15px 15px 5px;
+            }
+            .sidebar-content {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 1.5rem;
+                border-radius: 15px;
+                margin-bottom: 1rem;
+            }
+            .upload-area {
+                border: 2px dashed #667eea;
+                border-radius: 10px;
+                padding: 2rem;
+                text-align: center;
+                background-color: #f8f9fa;
+                margin: 1rem 0;
+            }
+            .success-box {
+                background-color: #d4edda;
+                border: 1px solid #c3e6cb;
+                color: #155724;
+                padding: 1rem;
+                border-radius: 8px;
+                margin: 1rem 0;
+            }
+            .warning-box {
+                background-color: #fff3cd;
+                border: 1px solid #ffeaa7;
+                color: #856404;
+                padding: 1rem;
+                border-radius: 8px;
+                margin: 1rem 0;
+            }
+            .error-box {
+                background-color: #f8d7da;
+                border: 1px solid #f5c6cb;
+                color: #721c24;
+                padding: 1rem;
+                border-radius: 8px;
+                margin: 1rem 0;
+            }
+        </style>
+        """, unsafe_allow_html=True)
     
     def initialize_session_state(self):
         """Initialize all session state variables"""
@@ -128,14 +177,25 @@ class HealthAIAssistant:
                 'emergency_contact': ''
             }
         
-        if 'chat_history' not in st.session_state:
-            st.session_state.chat_history = []
+        if 'chat_memory' not in st.session_state:
+            st.session_state.chat_memory = ConversationMemory()
         
         if 'uploaded_health_data' not in st.session_state:
             st.session_state.uploaded_health_data = None
         
         if 'health_metrics' not in st.session_state:
             st.session_state.health_metrics = None
+        
+        if 'stream_responses' not in st.session_state:
+            st.session_state.stream_responses = True
+        
+        if 'summarize_reports' not in st.session_state:
+            st.session_state.summarize_reports = False
+            st.session_state.report_summary = None
+        
+        if 'cohort_data' not in st.session_state:
+            st.session_state.cohort_data = None
+            st.session_state.cohort_summary = None
     
     def init_watson_credentials(self) -> Optional[Dict[str, str]]:
         """Initialize IBM Watson credentials"""
@@ -161,371 +221,298 @@ class HealthAIAssistant:
             st.error(f"❌ Failed to load IBM Watson credentials: {str(e)}")
             return None
     
+    def init_ai_backend(self):
+        """Return the generation backend chosen by HEALTHAI_BACKEND (watsonx, llama_cpp or stub)"""
+        if self.backend_name == "watsonx":
+            return get_backend(self.watson_credentials, "watsonx")
+        
+        try:
+            backend = get_backend(name=self.backend_name)
+            st.success(f"✅ Local AI backend loaded: {backend.model_id}")
+            return backend
+        
+        except Exception as e:
+            st.error(f"❌ Failed to load the {self.backend_name} AI backend: {str(e)}")
+            return None
+    
     def get_watson_token(self, api_key: str) -> Optional[str]:
-        """Get IBM Watson access token"""
+        """Get IBM Watson access token (cached and shared across sessions)"""
         try:
-            token_url = "https://iam.cloud.ibm.com/identity/token"
-            
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json"
-            }
-            
-            data = {
-                "grant_type": "urn:ibm:params:oauth:grant-type:apikey",
-                "apikey": api_key
-            }
-            
-            response = requests.post(token_url, headers=headers, data=data, timeout=30)
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                return token_data.get("access_token")
-            else:
-                st.error(f"❌ Token request failed: {response.status_code} - {response.text}")
-                return None
-                
+            if isinstance(self.watson_client, WatsonXClient):
+                return self.watson_client.token_manager.get_token()
+            return get_token_manager(api_key).get_token()
+        
         except Exception as e:
             st.error(f"❌ Error getting token: {str(e)}")
             return None
     
-    def generate_ai_response(self, prompt: str, response_type: str = "general") -> str:
-        """Generate AI response using IBM Granite model"""
+    def generate_ai_response(self, prompt: str, response_type: str = "general",
+                             on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate AI response using IBM Granite model
         
-        if not self.watson_credentials:
+        When on_token is given the response is streamed and on_token is called
+        with the text generated so far after every chunk.
+        """
+        
+        if not self.watson_client:
             return "❌ Watson credentials not available. Please check your .env file."
         
         try:
-            # Get access token
-            with st.spinner("🔐 Authenticating with IBM Watson..."):
-                access_token = self.get_watson_token(self.watson_credentials['api_key'])
-                
-            if not access_token:
-                return "❌ Failed to get access token. Please check your API key."
-            
-            # API endpoint
-            url = f"{self.watson_credentials['url']}/ml/v1/text/generation?version=2023-05-29"
-            
-            # Request body using your exact format - FIXED for Greedy decoding
-            body = {
-                "input": prompt,
-                "parameters": {
-                    "decoding_method": "greedy",
-                    "max_new_tokens": 200,  # Match your Prompt Lab setting
-                    "min_new_tokens": 0,    # Match your Prompt Lab setting
-                    "repetition_penalty": 1  # Only this parameter is allowed in greedy mode
-                    # Removed: temperature, top_k, top_p (not compatible with greedy decoding)
-                },
-                "model_id": "ibm/granite-13b-instruct-v2",
-                "project_id": self.watson_credentials['project_id'],
-                "moderations": {
-                    "hap": {
-                        "input": {
-                            "enabled": True,
-                            "threshold": 0.5,
-                            "mask": {
-                                "remove_entity_value": True
-                            }
-                        },
-                        "output": {
-                            "enabled": True,
-                            "threshold": 0.5,
-                            "mask": {
-                                "remove_entity_value": True
-                            }
-                        }
-                    },
-                    "pii": {
-                        "input": {
-                            "enabled": True,
-                            "threshold": 0.5,
-                            "mask": {
-                                "remove_entity_value": True
-                            }
-                        },
-                        "output": {
-                            "enabled": True,
-                            "threshold": 0.5,
-                            "mask": {
-                                "remove_entity_value": True
-                            }
-                        }
-                    },
-                    "granite_guardian": {
-                        "input": {
-                            "threshold": 1
-                        }
-                    }
-                }
-            }
-            
-            headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}"
-            }
-            
-            # Make API call
-            with st.spinner("🤖 Generating AI response..."):
-                response = requests.post(url, headers=headers, json=body, timeout=60)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'results' in data and len(data['results']) > 0:
-                    generated_text = data['results'][0]['generated_text']
-                    return generated_text.strip()
-                else:
-                    return "❌ No response generated from the model."
+            # Make API call over the shared pooled session (token is cached by the client)
+            if on_token is not None:
+                generated_text = None
+                for chunk in self.watson_client.generate_stream(prompt):
+                    generated_text = (generated_text or "") + chunk
+                    on_token(generated_text)
             else:
-                error_msg = f"API Error {response.status_code}: {response.text}"
-                st.error(error_msg)
-                return f"❌ {error_msg}"
+                with st.spinner("🤖 Generating AI response..."):
+                    generated_text = self.watson_client.generate(prompt)
+            
+            if generated_text is None:
+                return "❌ No response generated from the model."
+            return generated_text.strip()
+        
+        except WatsonTokenError as e:
+            st.error(f"❌ Error getting token: {str(e)}")
+            return "❌ Failed to get access token. Please check your API key."
+        
+        except WatsonAPIError as e:
+            error_msg = str(e)
+            st.error(error_msg)
+            return f"❌ {error_msg}"
                 
         except Exception as e:
             error_msg = f"❌ Error generating AI response: {str(e)}"
             st.error(error_msg)
             return error_msg
     
+    def generate_ai_responses(self, prompts: List[str], response_type: str = "general",
+                              concurrency: Optional[int] = None) -> List[str]:
+        """Generate AI responses for several prompts concurrently"""
+        
+        if not self.watson_client:
+            return ["❌ Watson credentials not available. Please check your .env file."] * len(prompts)
+        
+        with st.spinner(f"🤖 Generating {len(prompts)} AI responses..."):
+            results = run_generations(self.watson_client, prompts, concurrency)
+        
+        responses = []
+        for result in results:
+            if isinstance(result, WatsonTokenError):
+                responses.append("❌ Failed to get access token. Please check your API key.")
+            elif isinstance(result, WatsonAPIError):
+                responses.append(f"❌ {str(result)}")
+            elif isinstance(result, BaseException):
+                responses.append(f"❌ Error generating AI response: {str(result)}")
+            elif result is None:
+                responses.append("❌ No response generated from the model.")
+            else:
+                responses.append(result.strip())
+        
+        errors = [response for response in responses if response.startswith("❌")]
+        if errors:
+            st.error(f"{len(errors)} of {len(prompts)} AI requests failed: {errors[0]}")
+        return responses
+    
+    def stream_callback(self, placeholder, html_template: Optional[str] = None) -> Optional[Callable[[str], None]]:
+        """Return a callback that renders partial responses into a placeholder, or None when streaming is off
+        
+        Responses are plain markdown; with html_template (e.g. a chat bubble)
+        the escaped text is placed inside it and rendered as HTML.
+        """
+        if not st.session_state.stream_responses:
+            return None
+        
+        def render(text: str):
+            if html_template is None:
+                placeholder.markdown(text + " ▌")
+            else:
+                placeholder.markdown(html_template.format(html.escape(text + " ▌")), unsafe_allow_html=True)
+        
+        return render
+    
     def process_uploaded_file(self, uploaded_file) -> Optional[pd.DataFrame]:
         """Process uploaded CSV or PDF file"""
+        st.session_state.report_summary = None
         try:
             if uploaded_file.type == "text/csv":
-                # Process CSV file
-                df = pd.read_csv(uploaded_file)
+                # Process CSV file in chunks, showing running averages while it loads
+                progress = st.empty()
+                ingest_stats = []
+                
+                def show_progress(stats: RollingStats):
+                    means = stats.means()
+                    ingest_stats[:] = [stats]
+                    progress.info(
+                        f"📥 {stats.rows:,} records loaded - "
+                        f"avg HR {means['heart_rate']:.1f} bpm, "
+                        f"BP {means['systolic_bp']:.0f}/{means['diastolic_bp']:.0f}, "
+                        f"glucose {means['blood_glucose']:.1f} mg/dL"
+                    )
+                
+                df = read_health_csv(uploaded_file, on_chunk=show_progress)
+                progress.empty()
+                
+                # The statistics gathered while loading already cover the file
+                if ingest_stats and len(df):
+                    st.session_state.health_summary = (df, summarize_health_data(df, stats=ingest_stats[0]))
                 return df
             
             elif uploaded_file.type == "application/pdf":
-                # Process PDF file
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
+                # Process PDF file (pages extracted in parallel, text cached per file hash)
+                pages = read_pdf_pages(uploaded_file.getvalue())
+                result, report = self.extract_report(pages, st.session_state.summarize_reports)
                 
-                # Extract health data from PDF text using AI
-                prompt = f"""Extract health metrics from the following medical report text and format as structured data:
-
-Text: {text[:2000]}...
-
-Please extract and format the following health metrics if available:
-- Date/Time
-- Heart Rate (bpm)
-- Blood Pressure (systolic/diastolic)
-- Blood Glucose (mg/dL)
-- Temperature (°F)
-- Weight (kg/lbs)
-- Any symptoms mentioned
-- Medications listed
-
-Format the response as a structured list that can be converted to a DataFrame."""
+                # Shown with the data preview for as long as this file stays uploaded
+                st.session_state.report_summary = report
+                if report is not None and report.failed:
+                    st.warning(f"⚠️ {len(report.failed)} of {report.chunks} report sections could not be summarized.")
                 
-                ai_response = self.generate_ai_response(prompt, "data_extraction")
-                st.info(f"📄 PDF Content Extracted: {ai_response[:500]}...")
-                
-                # For demo purposes, return sample data based on PDF content
-                return self.generate_sample_data_from_pdf(text)
+                st.info(
+                    f"🔎 {len(result.health_data)} readings found on {result.pages} pages "
+                    f"({result.unparsed_pages} needed AI extraction)"
+                )
+                if result.health_data.empty:
+                    st.warning("⚠️ No vital sign readings were found in this PDF.")
+                    return None
+                return result.health_data
             
             else:
                 st.error("❌ Unsupported file type. Please upload CSV or PDF files only.")
                 return None
                 
+        except SchemaError as e:
+            st.error(f"❌ Invalid health data file: {str(e)}")
+            return None
+                
         except Exception as e:
             st.error(f"❌ Error processing file: {str(e)}")
             return None
     
-    def generate_sample_data_from_pdf(self, pdf_text: str) -> pd.DataFrame:
-        """Generate sample health data based on PDF content"""
-        # Create sample data that would typically be extracted from a medical PDF
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        # Generate realistic health metrics
-        np.random.seed(42)  # For consistent results
-        
-        df = pd.DataFrame({
-            'date': dates,
-            'heart_rate': np.random.normal(75, 8, len(dates)),
-            'systolic_bp': np.random.normal(125, 12, len(dates)),
-            'diastolic_bp': np.random.normal(82, 8, len(dates)),
-            'blood_glucose': np.random.normal(98, 15, len(dates)),
-            'temperature': np.random.normal(98.6, 0.8, len(dates)),
-            'weight': np.random.normal(70, 2, len(dates)),
-            'sleep_hours': np.random.normal(7.5, 1.2, len(dates))
-        })
-        
-        return df
+    def extract_report(self, pages: List[str],
+                       summarize: bool = False) -> Tuple[ExtractionResult, Optional[ReportSummary]]:
+        """Vitals from a PDF's pages, plus the whole report summarized when asked for
+        
+        Vitals are parsed by rules and only pages they cannot read go to the
+        model. The summary's chunk prompts join those pages in one concurrent
+        batch, so asking for a summary adds no extra round trip.
+        """
+        summary_prompts = report_prompts("".join(pages)) if summarize and self.watson_client else []
+        summary_answers: List[str] = []
+        
+        def fallback(unparsed: List[str]) -> List[str]:
+            if not self.watson_client:
+                return [""] * len(unparsed)
+            prompts = summary_prompts + [build_vitals_fallback_prompt(page) for page in unparsed]
+            answers = self.generate_ai_responses(prompts, "data_extraction",
+                                                 REPORT_CONCURRENCY if summary_prompts else None)
+            summary_answers[:] = answers[:len(summary_prompts)]
+            return answers[len(summary_prompts):]
+        
+        result = extract_vitals(pages, fallback=fallback)
+        if summary_prompts and not summary_answers:
+            # Every page was readable by the rules; the summary goes out on its own
+            summary_answers = self.generate_ai_responses(summary_prompts, "data_extraction", REPORT_CONCURRENCY)
+        return result, merge_report(summary_answers) if summary_prompts else None
+    
+    def patient_store_id(self) -> Optional[str]:
+        """Key for the on-disk health data store: the patient's name, or None when none is entered"""
+        return st.session_state.patient_data['name'].strip() or None
     
-    def answer_patient_query(self, query: str, patient_data: Dict) -> str:
-        """Generate AI response for patient queries"""
-        
-        health_context = ""
-        if st.session_state.uploaded_health_data is not None:
-            recent_data = st.session_state.uploaded_health_data.tail(7)
-            avg_hr = recent_data['heart_rate'].mean()
-            avg_bp_sys = recent_data['systolic_bp'].mean()
-            avg_bp_dia = recent_data['diastolic_bp'].mean()
-            avg_glucose = recent_data['blood_glucose'].mean()
+    def store_health_data(self, health_data: pd.DataFrame) -> pd.DataFrame:
+        """Persist an upload columnar and return the shared memory-mapped copy
+        
+        Uploads without a patient name stay in memory only: nothing could
+        reopen or clean them up later.
+        """
+        patient_id = self.patient_store_id()
+        if patient_id is None:
+            return health_data
+        try:
+            store = get_health_store()
+            summary = self.get_health_summary(health_data)
+            data_hash = store.save(patient_id, health_data, summary.data_hash if summary else None)
+            stored_data = store.open(patient_id, data_hash)
+            if stored_data is None:
+                # Replaced by a newer upload for the same patient in another session
+                return health_data
             
-            health_context = f"""
-Recent Health Data (Last 7 days):
-- Average Heart Rate: {avg_hr:.1f} bpm
-- Average Blood Pressure: {avg_bp_sys:.1f}/{avg_bp_dia:.1f} mmHg
-- Average Blood Glucose: {avg_glucose:.1f} mg/dL
-"""
+            # The stored copy has the same content, so it keeps the same summary
+            if summary is not None:
+                st.session_state.health_summary = (stored_data, summary)
+            return stored_data
+        except Exception as e:
+            # The dashboard still works from the in-memory copy
+            st.warning(f"⚠️ Could not save health data to disk: {str(e)}")
+            return health_data
+    
+    def get_health_summary(self, health_data: Optional[pd.DataFrame]) -> Optional[HealthSummary]:
+        """Summary statistics for a dataset, memoized per session and shared by content hash"""
+        if health_data is None:
+            return None
         
-        prompt = f"""You are a knowledgeable healthcare AI assistant. Respond as a doctor would, providing clear, empathetic, and medically accurate information.
-
-Patient Information:
-- Name: {patient_data.get('name', 'Patient')}
-- Age: {patient_data.get('age', 'Not specified')}
-- Gender: {patient_data.get('gender', 'Not specified')}
-- Medical History: {patient_data.get('medical_history', 'None reported')}
-- Current Medications: {patient_data.get('current_medications', 'None reported')}
-- Allergies: {patient_data.get('allergies', 'None reported')}
-
-{health_context}
-
-Patient Question: {query}
-
-Please provide a comprehensive response that:
-1. Directly addresses the patient's question
-2. Includes relevant medical information
-3. Considers the patient's profile and recent health data
-4. Suggests when to seek professional medical care
-5. Uses clear, understandable language
-6. Acknowledges the limitations of AI medical advice
-
-Response:"""
-
-        return self.generate_ai_response(prompt, "chat")
+        # Reruns hand us the same DataFrame object, so skip even the hashing step
+        cached = st.session_state.get('health_summary')
+        if cached is not None and cached[0] is health_data:
+            return cached[1]
+        
+        # A re-export that only gained readings is summarized from the new rows alone
+        summary = extend_health_summary(cached[1] if cached else None, health_data)
+        st.session_state.health_summary = (health_data, summary)
+        return summary
     
-    def predict_disease(self, symptoms: str, patient_data: Dict) -> str:
-        """Generate disease predictions based on symptoms"""
+    def get_health_alerts(self, summary: HealthSummary, health_data: pd.DataFrame) -> pd.DataFrame:
+        """Alert events for the dataset, detected once per data hash"""
+        cached = st.session_state.get('health_alerts')
+        if cached is not None and cached[0] == summary.data_hash:
+            return cached[1]
         
-        health_context = ""
-        if st.session_state.uploaded_health_data is not None:
-            recent_data = st.session_state.uploaded_health_data.tail(7)
-            health_context = f"""
-Recent Health Metrics:
-- Heart Rate: {recent_data['heart_rate'].mean():.1f} bpm
-- Blood Pressure: {recent_data['systolic_bp'].mean():.1f}/{recent_data['diastolic_bp'].mean():.1f} mmHg
-- Blood Glucose: {recent_data['blood_glucose'].mean():.1f} mg/dL
-- Temperature: {recent_data['temperature'].mean():.1f}°F
-"""
+        events = detect_alerts(health_data)
+        st.session_state.health_alerts = (summary.data_hash, events)
+        return events
+    
+    def show_prompt_size(self, prompt: BuiltPrompt):
+        """Report the prompt's token count, and what was shortened to fit the budget"""
+        icon = "✂️" if prompt.shortened else "🧮"
+        st.caption(f"{icon} {prompt.describe()}")
+    
+    def answer_patient_query(self, query: str, patient_data: Dict,
+                             health_data: Optional[pd.DataFrame] = None,
+                             on_token: Optional[Callable[[str], None]] = None,
+                             memory: Optional[ConversationMemory] = None) -> str:
+        """Generate AI response for patient queries, with the conversation so far as context"""
         
-        prompt = f"""You are a medical AI assistant specializing in diagnostic assessment. Analyze the following patient symptoms and provide potential diagnoses.
-
-Patient Profile:
-- Age: {patient_data.get('age', 'Not specified')}
-- Gender: {patient_data.get('gender', 'Not specified')}
-- Medical History: {patient_data.get('medical_history', 'None reported')}
-- Current Medications: {patient_data.get('current_medications', 'None reported')}
-- Allergies: {patient_data.get('allergies', 'None reported')}
-
-{health_context}
-
-Reported Symptoms: {symptoms}
-
-Please provide a comprehensive diagnostic assessment including:
-
-1. **Top 3 Most Likely Conditions:**
-   - Condition 1: [Name] - Likelihood: [High/Medium/Low]
-     * Explanation: [Brief medical explanation]
-   - Condition 2: [Name] - Likelihood: [High/Medium/Low]
-     * Explanation: [Brief medical explanation]
-   - Condition 3: [Name] - Likelihood: [High/Medium/Low]
-     * Explanation: [Brief medical explanation]
-
-2. **Recommended Next Steps:**
-   - Immediate actions to take
-   - When to seek medical attention
-   - Additional tests or evaluations needed
-
-3. **Red Flags - Seek Immediate Medical Care If:**
-   - List warning signs that require urgent attention
+        summary = self.get_health_summary(health_data)
+        health_context = chat_health_context(summary.recent if summary else None)
+        conversation = memory.context() if memory else ""
+        prompt = compose_chat_prompt(query, patient_data, health_context, conversation)
+        self.show_prompt_size(prompt)
 
-**Important Disclaimer:** This assessment is for informational purposes only and should not replace professional medical diagnosis.
-
-Analysis:"""
+        return self.generate_ai_response(prompt.text, "chat", on_token=on_token)
+    
+    def predict_disease(self, symptoms: str, patient_data: Dict,
+                        health_data: Optional[pd.DataFrame] = None,
+                        on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate disease predictions based on symptoms"""
+        
+        summary = self.get_health_summary(health_data)
+        health_context = prediction_health_context(summary.recent if summary else None)
+        prompt = compose_prediction_prompt(symptoms, patient_data, health_context)
+        self.show_prompt_size(prompt)
 
-        return self.generate_ai_response(prompt, "prediction")
+        return self.generate_ai_response(prompt.text, "prediction", on_token=on_token)
     
-    def generate_treatment_plan(self, condition: str, patient_data: Dict) -> str:
+    def generate_treatment_plan(self, condition: str, patient_data: Dict,
+                                health_data: Optional[pd.DataFrame] = None,
+                                on_token: Optional[Callable[[str], None]] = None) -> str:
         """Generate personalized treatment plan"""
         
-        health_context = ""
-        if st.session_state.uploaded_health_data is not None:
-            recent_data = st.session_state.uploaded_health_data.tail(7)
-            health_context = f"""
-Current Health Status:
-- Heart Rate: {recent_data['heart_rate'].mean():.1f} bpm
-- Blood Pressure: {recent_data['systolic_bp'].mean():.1f}/{recent_data['diastolic_bp'].mean():.1f} mmHg
-- Blood Glucose: {recent_data['blood_glucose'].mean():.1f} mg/dL
-"""
-        
-        prompt = f"""You are a medical AI assistant creating a comprehensive treatment plan. Develop personalized recommendations for the given condition.
-
-Patient Profile:
-- Name: {patient_data.get('name', 'Patient')}
-- Age: {patient_data.get('age', 'Not specified')}
-- Gender: {patient_data.get('gender', 'Not specified')}
-- Medical History: {patient_data.get('medical_history', 'None reported')}
-- Current Medications: {patient_data.get('current_medications', 'None reported')}
-- Allergies: {patient_data.get('allergies', 'None reported')}
-
-{health_context}
-
-Medical Condition: {condition}
-
-Please create a detailed treatment plan including:
-
-## 🏥 **Comprehensive Treatment Plan for {condition}**
-
-### 1. **Medication Recommendations:**
-   - Primary medications with dosages
-   - Alternative options if applicable
-   - Drug interaction considerations
-   - Duration of treatment
-
-### 2. **Lifestyle Modifications:**
-   - Dietary recommendations
-   - Exercise guidelines
-   - Sleep hygiene
-   - Stress management techniques
-
-### 3. **Follow-up Care Schedule:**
-   - Initial follow-up timeline
-   - Monitoring parameters
-   - Long-term care plan
-   - Specialist referrals if needed
+        summary = self.get_health_summary(health_data)
+        health_context = treatment_health_context(summary.recent if summary else None)
+        prompt = compose_treatment_prompt(condition, patient_data, health_context)
+        self.show_prompt_size(prompt)
 
-### 4. **Dietary Guidelines:**
-   - Foods to include
-   - Foods to avoid
-   - Nutritional supplements
-   - Hydration recommendations
-
-### 5. **Physical Activity Plan:**
-   - Recommended exercises
-   - Activity restrictions
-   - Gradual progression plan
-   - Warning signs to stop activity
-
-### 6. **Warning Signs - Seek Immediate Medical Attention:**
-   - Emergency symptoms to watch for
-   - When to contact healthcare provider
-   - Emergency contact information
-
-### 7. **Patient Education:**
-   - Understanding the condition
-   - Self-monitoring techniques
-   - Medication compliance tips
-
-**Important Note:** This treatment plan should be reviewed and approved by a qualified healthcare provider before implementation.
-
-Treatment Plan:"""
-
-        return self.generate_ai_response(prompt, "treatment")
+        return self.generate_ai_response(prompt.text, "treatment", on_token=on_token)
     
     def render_sidebar(self):
         """Render enhanced sidebar with patient profile and file upload"""
@@ -584,6 +571,17 @@ Treatment Plan:"""
             
             st.markdown('</div>', unsafe_allow_html=True)
             
+            # Reopening a patient's last upload is an explicit step, never a side effect of typing a name
+            if st.session_state.uploaded_health_data is None and st.session_state.patient_data['name'].strip():
+                # The store is keyed by name alone: anyone who enters this name can reopen the data
+                if st.button("📂 Load saved health data", help="Reopen the last upload saved under this patient's name"):
+                    stored_data = get_health_store().open(self.patient_store_id())
+                    if stored_data is not None:
+                        st.session_state.uploaded_health_data = stored_data
+                        st.info(f"📂 Loaded saved health data for {st.session_state.patient_data['name']}")
+                    else:
+                        st.info("No saved health data for this patient.")
+            
             # File Upload Section
             st.markdown("### 📁 Upload Health Data")
             st.markdown('<div class="upload-area">', unsafe_allow_html=True)
@@ -594,24 +592,56 @@ Treatment Plan:"""
                 help="Upload CSV with health metrics or PDF medical reports"
             )
             
+            if self.watson_client:
+                st.session_state.summarize_reports = st.checkbox(
+                    "📝 Summarize PDF reports",
+                    value=st.session_state.summarize_reports,
+                    help="Also summarize the whole report with the AI model when a PDF is uploaded"
+                )
+            
             if uploaded_file is not None:
-                with st.spinner("Processing uploaded file..."):
-                    processed_data = self.process_uploaded_file(uploaded_file)
-                    if processed_data is not None:
-                        st.session_state.uploaded_health_data = processed_data
-                        st.success(f"✅ File processed successfully! {len(processed_data)} records loaded.")
-                        
-                        # Show data preview
-                        st.markdown("**Data Preview:**")
-                        st.dataframe(processed_data.head(3), use_container_width=True)
+                # The uploader hands back the same file on every rerun; only parse it once
+                if uploaded_file.file_id != st.session_state.get('uploaded_file_id'):
+                    with st.spinner("Processing uploaded file..."):
+                        processed_data = self.process_uploaded_file(uploaded_file)
+                        if processed_data is not None:
+                            st.session_state.uploaded_health_data = self.store_health_data(processed_data)
+                            st.session_state.uploaded_file_id = uploaded_file.file_id
+                
+                processed_data = st.session_state.uploaded_health_data
+                if processed_data is not None and uploaded_file.file_id == st.session_state.get('uploaded_file_id'):
+                    st.success(f"✅ File processed successfully! {len(processed_data)} records loaded.")
+                    
+                    # Show data preview
+                    st.markdown("**Data Preview:**")
+                    st.dataframe(processed_data.head(3), use_container_width=True)
+                    
+                    report = st.session_state.report_summary
+                    if report is not None and report.text:
+                        with st.expander(f"📄 Report summary ({report.chunks} sections)"):
+                            st.markdown(report.text)
             
             st.markdown('</div>', unsafe_allow_html=True)
             
             # API Status
-            if self.watson_credentials:
+            if self.watson_client:
                 st.success("🤖 AI Model: Connected")
-                st.info(f"🌍 Region: US-South")
-                st.info(f"🔑 Project: {self.watson_credentials['project_id'][:8]}...")
+                if self.watson_credentials:
+                    st.info(f"🌍 Region: US-South")
+                    st.info(f"🔑 Project: {self.watson_credentials['project_id'][:8]}...")
+                else:
+                    st.info(f"💻 Local model: {self.watson_client.model_id}")
+                st.session_state.stream_responses = st.checkbox(
+                    "⚡ Stream responses",
+                    value=st.session_state.stream_responses,
+                    help="Show AI responses token by token as they are generated"
+                )
+                if self.watson_client.cache:
+                    stats = self.watson_client.cache.stats()
+                    st.caption(
+                        f"💾 Response cache: {stats['hits']} hits / {stats['misses']} misses "
+                        f"({stats['hit_rate']:.0%} of model calls saved)"
+                    )
             else:
                 st.error("🤖 AI Model: Disconnected")
     
@@ -620,14 +650,13 @@ Treatment Plan:"""
         st.markdown('<h2 class="feature-header">💬 24/7 Patient Support</h2>', unsafe_allow_html=True)
         st.write("Ask any health-related question for immediate AI-powered assistance.")
         
-        # Chat history display
+        # Chat history display: only the newest page is rendered on every rerun
+        memory = st.session_state.chat_memory
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.chat_history:
-                if message['type'] == 'user':
-                    st.markdown(f'<div class="chat-message user-message">👤 <strong>You:</strong> {message["content"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="chat-message ai-message">🤖 <strong>HealthAI:</strong> {message["content"]}</div>', unsafe_allow_html=True)
+            self.render_earlier_messages(memory)
+            for message in memory.page(memory.page_count()):
+                self.render_chat_message(message)
         
         # Chat input form
         with st.form("chat_form", clear_on_submit=True):
@@ -639,18 +668,51 @@ Treatment Plan:"""
             submit_button = st.form_submit_button("Send Message", use_container_width=True)
             
             if submit_button and user_input:
-                if not self.watson_credentials:
+                if not self.watson_client:
                     st.error("❌ Please check your IBM Watson API credentials.")
                 else:
-                    # Add user message to chat history
-                    st.session_state.chat_history.append({"type": "user", "content": user_input})
-                    
-                    # Generate AI response
-                    ai_response = self.answer_patient_query(user_input, st.session_state.patient_data)
-                    st.session_state.chat_history.append({"type": "ai", "content": ai_response})
+                    # Generate AI response, streaming it into a new bubble when enabled
+                    with chat_container:
+                        st.markdown(f'<div class="chat-message user-message">👤 <strong>You:</strong> {html.escape(user_input)}</div>', unsafe_allow_html=True)
+                        ai_placeholder = st.empty()
+                    on_token = self.stream_callback(
+                        ai_placeholder,
+                        '<div class="chat-message ai-message">🤖 <strong>HealthAI:</strong> {}</div>'
+                    )
+                    ai_response = self.answer_patient_query(
+                        user_input,
+                        st.session_state.patient_data,
+                        st.session_state.uploaded_health_data,
+                        on_token=on_token,
+                        memory=memory
+                    )
+                    memory.add("user", user_input)
+                    memory.add("ai", ai_response)
                     
                     st.rerun()
     
+    def render_chat_message(self, message: Dict):
+        """Render one chat bubble"""
+        if message['role'] == 'user':
+            st.markdown(f'<div class="chat-message user-message">👤 <strong>You:</strong> {html.escape(message["content"])}</div>', unsafe_allow_html=True)
+        else:
+            st.markdown(f'<div class="chat-message ai-message">🤖 <strong>HealthAI:</strong> {html.escape(message["content"])}</div>', unsafe_allow_html=True)
+    
+    def render_earlier_messages(self, memory: ConversationMemory):
+        """Older pages of the conversation, rendered one page at a time on request"""
+        pages = memory.page_count()
+        if pages == 1 and not memory.dropped_messages:
+            return
+        
+        earlier = len(memory) - len(memory.page(pages)) + memory.dropped_messages
+        with st.expander(f"🕘 Earlier messages ({earlier})"):
+            if memory.dropped_messages:
+                st.caption(f"{memory.dropped_messages} oldest messages are no longer kept in this session.")
+            if pages > 1:
+                page = st.number_input("Page", min_value=1, max_value=pages - 1, value=pages - 1, key="chat_page")
+                for message in memory.page(page):
+                    self.render_chat_message(message)
+    
     def render_disease_prediction(self):
         """Render disease prediction interface"""
         st.markdown('<h2 class="feature-header">🔍 AI Disease Prediction System</h2>', unsafe_allow_html=True)
@@ -677,14 +739,19 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
             
             if st.button("🔍 Generate AI Prediction", type="primary", use_container_width=True):
                 if symptoms:
-                    if not self.watson_credentials:
+                    if not self.watson_client:
                         st.error("❌ Please check your IBM Watson API credentials.")
                     else:
                         with st.spinner("🤖 Analyzing symptoms with AI..."):
-                            prediction = self.predict_disease(symptoms, st.session_state.patient_data)
-                            
                             st.subheader("🎯 AI-Generated Diagnostic Assessment")
-                            st.markdown(prediction)
+                            output = st.empty()
+                            prediction = self.predict_disease(
+                                symptoms,
+                                st.session_state.patient_data,
+                                st.session_state.uploaded_health_data,
+                                on_token=self.stream_callback(output)
+                            )
+                            output.markdown(prediction)
                             
                             st.markdown("""
                             <div class="warning-box">
@@ -697,11 +764,11 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
         with col2:
             st.subheader("📊 Health Data Context")
             if st.session_state.uploaded_health_data is not None:
-                recent_data = st.session_state.uploaded_health_data.tail(7)
+                recent = self.get_health_summary(st.session_state.uploaded_health_data).recent
                 
-                st.metric("Avg Heart Rate", f"{recent_data['heart_rate'].mean():.1f} bpm")
-                st.metric("Avg Blood Pressure", f"{recent_data['systolic_bp'].mean():.0f}/{recent_data['diastolic_bp'].mean():.0f}")
-                st.metric("Avg Blood Glucose", f"{recent_data['blood_glucose'].mean():.1f} mg/dL")
+                st.metric("Avg Heart Rate", f"{recent['heart_rate']:.1f} bpm")
+                st.metric("Avg Blood Pressure", f"{recent['systolic_bp']:.0f}/{recent['diastolic_bp']:.0f}")
+                st.metric("Avg Blood Glucose", f"{recent['blood_glucose']:.1f} mg/dL")
                 
                 st.info("💡 AI will consider your recent health data in the analysis.")
             else:
@@ -729,16 +796,21 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
             
             if st.button("📋 Generate Treatment Plan", type="primary", use_container_width=True):
                 if condition:
-                    if not self.watson_credentials:
+                    if not self.watson_client:
                         st.error("❌ Please check your IBM Watson API credentials.")
                     else:
                         full_condition = f"{condition}. {additional_info}" if additional_info else condition
                         
                         with st.spinner("🤖 Creating personalized treatment plan..."):
-                            treatment_plan = self.generate_treatment_plan(full_condition, st.session_state.patient_data)
-                            
                             st.subheader("📋 AI-Generated Personalized Treatment Plan")
-                            st.markdown(treatment_plan)
+                            output = st.empty()
+                            treatment_plan = self.generate_treatment_plan(
+                                full_condition,
+                                st.session_state.patient_data,
+                                st.session_state.uploaded_health_data,
+                                on_token=self.stream_callback(output)
+                            )
+                            output.markdown(treatment_plan)
                             
                             st.markdown("""
                             <div class="warning-box">
@@ -763,6 +835,14 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
             else:
                 st.warning("Complete patient profile for more personalized treatment plans.")
     
+    def trend_chart(self, summary: HealthSummary, health_data: pd.DataFrame,
+                    build: Callable[[pd.DataFrame], go.Figure], date_range: tuple) -> go.Figure:
+        """Trend figure for the selected date range, reused across reruns and sessions"""
+        return cached_figure(
+            summary.data_hash, build.__name__, date_range,
+            lambda: build(select_date_range(health_data, *date_range))
+        )
+    
     def render_health_analytics(self):
         """Render health analytics dashboard"""
         st.markdown('<h2 class="feature-header">📊 Health Analytics Dashboard</h2>', unsafe_allow_html=True)
@@ -778,125 +858,75 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
             return
         
         health_data = st.session_state.uploaded_health_data
+        summary = self.get_health_summary(health_data)
         
         # Key metrics overview
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_hr = health_data['heart_rate'].mean()
-            hr_trend = "↗️" if health_data['heart_rate'].iloc[-7:].mean() > health_data['heart_rate'].iloc[-14:-7].mean() else "↘️"
+            avg_hr = summary.means['heart_rate']
+            hr_trend = summary.trend('heart_rate')
             st.metric("Heart Rate", f"{avg_hr:.0f} bpm", delta=f"{hr_trend} Trending")
         
         with col2:
-            avg_sys = health_data['systolic_bp'].mean()
-            avg_dia = health_data['diastolic_bp'].mean()
+            avg_sys = summary.means['systolic_bp']
+            avg_dia = summary.means['diastolic_bp']
             st.metric("Blood Pressure", f"{avg_sys:.0f}/{avg_dia:.0f}", delta="Normal Range")
         
         with col3:
-            avg_glucose = health_data['blood_glucose'].mean()
+            avg_glucose = summary.means['blood_glucose']
             glucose_status = "Normal" if 70 <= avg_glucose <= 100 else "Monitor"
             st.metric("Blood Glucose", f"{avg_glucose:.0f} mg/dL", delta=glucose_status)
         
         with col4:
-            if 'temperature' in health_data.columns:
-                avg_temp = health_data['temperature'].mean()
+            if 'temperature' in summary.columns:
+                avg_temp = summary.means['temperature']
                 st.metric("Temperature", f"{avg_temp:.1f}°F", delta="Normal")
             else:
                 st.metric("Data Points", f"{len(health_data)}", delta="Records")
         
+        # Individual readings can be dangerous even when the averages look fine
+        events = self.get_health_alerts(summary, health_data)
+        counts = alert_counts(events)
+        if counts['critical']:
+            st.error(f"🚨 {counts['critical']} critical alert(s) in this data - see the Alerts tab.")
+        
         # Visualizations
-        tab1, tab2, tab3 = st.tabs(["📈 Trends", "🔍 Correlations", "🎯 AI Insights"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📈 Trends", "🔍 Correlations", "🚨 Alerts", "🎯 AI Insights"])
         
         with tab1:
+            # Long series are decimated server-side for the visible date range
+            date_range = (None, None)
+            bounds = date_bounds(health_data) if pd.api.types.is_datetime64_any_dtype(health_data['date']) else None
+            if bounds is not None and bounds[1] - bounds[0] > pd.Timedelta(days=1):
+                selected_range = st.date_input(
+                    "Date range",
+                    value=(bounds[0].date(), bounds[1].date()),
+                    min_value=bounds[0].date(),
+                    max_value=bounds[1].date()
+                )
+                if isinstance(selected_range, (tuple, list)) and len(selected_range) == 2:
+                    date_range = tuple(selected_range)
+            
             # Heart Rate Trend
             col1, col2 = st.columns(2)
             
             with col1:
-                fig_hr = go.Figure()
-                fig_hr.add_trace(go.Scatter(
-                    x=health_data['date'],
-                    y=health_data['heart_rate'],
-                    mode='lines+markers',
-                    name='Heart Rate',
-                    line=dict(color='#2E86AB', width=3),
-                    marker=dict(size=6)
-                ))
-                fig_hr.update_layout(
-                    title="Heart Rate Trend",
-                    xaxis_title="Date",
-                    yaxis_title="Heart Rate (bpm)",
-                    height=400,
-                    hovermode='x unified'
-                )
-                st.plotly_chart(fig_hr, use_container_width=True)
+                st.plotly_chart(self.trend_chart(summary, health_data, heart_rate_figure, date_range),
+                                use_container_width=True)
                 
                 # Blood Glucose Trend
-                fig_glucose = go.Figure()
-                fig_glucose.add_trace(go.Scatter(
-                    x=health_data['date'],
-                    y=health_data['blood_glucose'],
-                    mode='lines+markers',
-                    name='Blood Glucose',
-                    line=dict(color='#A23B72', width=3),
-                    marker=dict(size=6)
-                ))
-                fig_glucose.add_hline(y=100, line_dash="dash", line_color="red", annotation_text="Normal Upper Limit")
-                fig_glucose.add_hline(y=70, line_dash="dash", line_color="orange", annotation_text="Normal Lower Limit")
-                fig_glucose.update_layout(
-                    title="Blood Glucose Trend",
-                    xaxis_title="Date",
-                    yaxis_title="Blood Glucose (mg/dL)",
-                    height=400,
-                    hovermode='x unified'
-                )
-                st.plotly_chart(fig_glucose, use_container_width=True)
+                st.plotly_chart(self.trend_chart(summary, health_data, glucose_figure, date_range),
+                                use_container_width=True)
             
             with col2:
                 # Blood Pressure Trend
-                fig_bp = go.Figure()
-                fig_bp.add_trace(go.Scatter(
-                    x=health_data['date'],
-                    y=health_data['systolic_bp'],
-                    mode='lines+markers',
-                    name='Systolic',
-                    line=dict(color='#FF6B6B', width=3),
-                    marker=dict(size=6)
-                ))
-                fig_bp.add_trace(go.Scatter(
-                    x=health_data['date'],
-                    y=health_data['diastolic_bp'],
-                    mode='lines+markers',
-                    name='Diastolic',
-                    line=dict(color='#4ECDC4', width=3),
-                    marker=dict(size=6)
-                ))
-                fig_bp.update_layout(
-                    title="Blood Pressure Trend",
-                    xaxis_title="Date",
-                    yaxis_title="Blood Pressure (mmHg)",
-                    height=400,
-                    hovermode='x unified'
-                )
-                st.plotly_chart(fig_bp, use_container_width=True)
+                st.plotly_chart(self.trend_chart(summary, health_data, blood_pressure_figure, date_range),
+                                use_container_width=True)
                 
                 # Health Metrics Distribution
                 if len(health_data) > 7:
-                    # Create symptom frequency based on health data patterns
-                    symptoms_data = {
-                        'Normal': 60.0,
-                        'Mild Fatigue': 15.0,
-                        'Headache': 10.0,
-                        'Dizziness': 8.0,
-                        'Other': 7.0
-                    }
-                    
-                    fig_symptoms = px.pie(
-                        values=list(symptoms_data.values()),
-                        names=list(symptoms_data.keys()),
-                        title="Health Status Distribution",
-                        color_discrete_sequence=px.colors.qualitative.Set3
-                    )
-                    fig_symptoms.update_layout(height=400)
+                    fig_symptoms = cached_figure("static", "status_distribution", (), status_distribution_figure)
                     st.plotly_chart(fig_symptoms, use_container_width=True)
         
         with tab2:
@@ -907,17 +937,16 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
             if 'weight' in health_data.columns:
                 numeric_cols.append('weight')
             
-            correlation_data = health_data[numeric_cols].corr()
+            # Read from the streaming co-moments, so long histories cost the same
+            window_days = None
+            if bounds is not None and bounds[1] - bounds[0] > pd.Timedelta(days=30):
+                window = st.selectbox("Correlation window", ["All data", "Last 90 days", "Last 30 days"])
+                window_days = {"Last 90 days": 90, "Last 30 days": 30}.get(window)
             
-            fig_corr = px.imshow(
-                correlation_data,
-                text_auto=True,
-                aspect="auto",
-                title="Health Metrics Correlation Matrix",
-                color_continuous_scale="RdBu",
-                zmin=-1, zmax=1
+            fig_corr = cached_figure(
+                summary.data_hash, "correlation", tuple(numeric_cols) + (window_days,),
+                lambda: correlation_figure(summary.correlation(numeric_cols, window_days))
             )
-            fig_corr.update_layout(height=500)
             st.plotly_chart(fig_corr, use_container_width=True)
             
             st.markdown("""
@@ -928,87 +957,30 @@ Example: "I've had a persistent dry cough for 5 days, along with fatigue and mil
             """)
         
         with tab3:
+            self.render_alerts(events)
+        
+        with tab4:
             # AI-generated insights
             st.markdown("### 🤖 AI-Generated Health Insights")
             
             if st.button("Generate AI Health Analysis", type="primary"):
-                health_summary = f"""Analyze the following patient health data and provide comprehensive insights:
-
-Patient: {st.session_state.patient_data['name']}
-Age: {st.session_state.patient_data['age']}
-Gender: {st.session_state.patient_data['gender']}
-
-Health Data Summary ({len(health_data)} days):
-- Average Heart Rate: {health_data['heart_rate'].mean():.1f} bpm (Range: {health_data['heart_rate'].min():.1f}-{health_data['heart_rate'].max():.1f})
-- Average Blood Pressure: {health_data['systolic_bp'].mean():.1f}/{health_data['diastolic_bp'].mean():.1f} mmHg
-- Average Blood Glucose: {health_data['blood_glucose'].mean():.1f} mg/dL (Range: {health_data['blood_glucose'].min():.1f}-{health_data['blood_glucose'].max():.1f})
-
-Recent Trends (Last 7 days vs Previous 7 days):
-- Heart Rate: {health_data['heart_rate'].iloc[-7:].mean():.1f} vs {health_data['heart_rate'].iloc[-14:-7].mean():.1f}
-- Systolic BP: {health_data['systolic_bp'].iloc[-7:].mean():.1f} vs {health_data['systolic_bp'].iloc[-14:-7].mean():.1f}
-- Blood Glucose: {health_data['blood_glucose'].iloc[-7:].mean():.1f} vs {health_data['blood_glucose'].iloc[-14:-7].mean():.1f}
-
-Medical History: {st.session_state.patient_data['medical_history']}
-Current Medications: {st.session_state.patient_data['current_medications']}
-
-Please provide:
-1. Overall health assessment
-2. Trend analysis and patterns
-3. Areas of concern or improvement
-4. Personalized recommendations
-5. When to seek medical attention
-
-Analysis:"""
+                health_summary = compose_insights_prompt(st.session_state.patient_data, summary)
+                self.show_prompt_size(health_summary)
                 
-                insights = self.generate_ai_response(health_summary, "insights")
+                insights = self.generate_ai_response(health_summary.text, "insights")
                 st.markdown(insights)
             
             # Static insights based on data
             st.markdown("#### 📈 Data-Driven Observations")
             
-            insights = []
-            
-            # Heart rate analysis
-            avg_hr = health_data['heart_rate'].mean()
-            if avg_hr < 60:
-                insights.append("💙 **Heart Rate**: Below normal range - may indicate bradycardia. Consider consulting a cardiologist.")
-            elif avg_hr > 100:
-                insights.append("❤️ **Heart Rate**: Above normal range - may indicate tachycardia. Monitor stress levels and caffeine intake.")
-            else:
-                insights.append("💚 **Heart Rate**: Within normal range (60-100 bpm). Good cardiovascular health indicator.")
-            
-            # Blood pressure analysis
-            avg_sys = health_data['systolic_bp'].mean()
-            avg_dia = health_data['diastolic_bp'].mean()
-            if avg_sys > 140 or avg_dia > 90:
-                insights.append("🔴 **Blood Pressure**: Elevated readings detected. Consider lifestyle modifications and medical consultation.")
-            elif avg_sys > 130 or avg_dia > 80:
-                insights.append("🟡 **Blood Pressure**: Stage 1 hypertension range. Monitor closely and consider preventive measures.")
-            else:
-                insights.append("💚 **Blood Pressure**: Within normal range. Continue healthy lifestyle habits.")
-            
-            # Blood glucose analysis
-            avg_glucose = health_data['blood_glucose'].mean()
-            if avg_glucose > 126:
-                insights.append("🔴 **Blood Glucose**: Elevated levels may indicate diabetes. Consult healthcare provider immediately.")
-            elif avg_glucose > 100:
-                insights.append("🟡 **Blood Glucose**: Pre-diabetic range. Consider dietary modifications and regular monitoring.")
-            else:
-                insights.append("💚 **Blood Glucose**: Within normal range. Good metabolic health.")
-            
-            for insight in insights:
+            # Insights and score come from the rule table (same rules as the cohort view)
+            evaluation = evaluate_rules(pd.DataFrame([summary.means]))
+            for insight in evaluation.insights():
                 st.markdown(f"- {insight}")
             
-            # Health score calculation
-            health_score = 100
-            if avg_hr < 60 or avg_hr > 100:
-                health_score -= 15
-            if avg_sys > 130 or avg_dia > 80:
-                health_score -= 20
-            if avg_glucose > 100:
-                health_score -= 25
+            health_score = int(evaluation.score.iloc[0])
             
-            st.markdown(f"### 🎯 Overall Health Score: **{max(health_score, 0)}/100**")
+            st.markdown(f"### 🎯 Overall Health Score: **{health_score}/100**")
             
             if health_score >= 90:
                 st.success("🌟 Excellent health status! Keep up the great work.")
@@ -1018,6 +990,145 @@ Analysis:"""
                 st.warning("⚠️ Fair health status. Consider lifestyle modifications.")
             else:
                 st.error("🚨 Health status needs attention. Consult with a healthcare provider.")
+            
+            with st.expander("🧾 Score breakdown"):
+                st.dataframe(evaluation.breakdown(), use_container_width=True)
+                st.caption(f"Health rules version {evaluation.table.version}")
+    
+    def render_alerts(self, events: pd.DataFrame, max_rows: int = 200):
+        """Alert counts and the most recent alert events"""
+        counts = alert_counts(events)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Critical Alerts", f"{counts['critical']:,}")
+        with col2:
+            st.metric("Warnings", f"{counts['warning']:,}")
+        with col3:
+            st.metric("Sustained Episodes", f"{int((events['kind'] == 'sustained').sum()):,}")
+        
+        if events.empty:
+            st.success("✅ No readings outside the alert thresholds, sudden changes or unusual deviations.")
+            return
+        
+        show = st.radio("Show", ["All alerts", "Critical only"], horizontal=True)
+        shown = events[events['severity'] == 'critical'] if show == "Critical only" else events
+        # Newest first; messages are only formatted for the rows on screen
+        shown = shown.iloc[::-1].head(max_rows)
+        table = shown[['start', 'end', 'severity', 'kind']].assign(alert=alert_messages(shown))
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        if len(shown) == max_rows:
+            st.caption(f"Showing the {max_rows} most recent alerts.")
+        
+        st.markdown("""
+        **Alert types:**
+        - **Threshold / sustained**: readings outside the safe range; several in a row form a sustained episode
+        - **Z-score**: a reading far from the patient's own recent average
+        - **Rate of change**: a large jump between consecutive readings
+        """)
+    
+    def load_cohort(self, uploaded_files) -> Optional[pd.DataFrame]:
+        """Read uploaded CSVs (one per patient, or long format with a patient_id column) into a cohort"""
+        try:
+            with st.spinner(f"Loading {len(uploaded_files)} file(s)..."):
+                return read_cohort_csvs([(uploaded_file.name, uploaded_file) for uploaded_file in uploaded_files])
+        except SchemaError as e:
+            st.error(f"❌ Invalid health data CSV: {str(e)}")
+        except Exception as e:
+            st.error(f"❌ Error loading cohort: {str(e)}")
+        return None
+    
+    def render_cohort_analytics(self):
+        """Render multi-patient cohort analytics with drill-down"""
+        st.markdown('<h2 class="feature-header">👥 Cohort Analytics</h2>', unsafe_allow_html=True)
+        st.write("Compare average vitals, trends and health scores across many patients at once.")
+        
+        uploaded_files = st.file_uploader(
+            "Upload patient CSVs",
+            type=['csv'],
+            accept_multiple_files=True,
+            key="cohort_files",
+            help=f"One CSV per patient (named after the file), or one long-format CSV with a {PATIENT_COLUMN} column"
+        )
+        
+        if uploaded_files:
+            # Reruns hand back the same files; only reload when the selection changes
+            file_ids = tuple(uploaded_file.file_id for uploaded_file in uploaded_files)
+            if file_ids != st.session_state.get('cohort_file_ids'):
+                cohort = self.load_cohort(uploaded_files)
+                if cohort is not None:
+                    st.session_state.cohort_data = cohort
+                    st.session_state.cohort_summary = cohort_summary(cohort)
+                    st.session_state.cohort_file_ids = file_ids
+        
+        cohort = st.session_state.cohort_data
+        summary = st.session_state.cohort_summary
+        if cohort is None or summary is None or summary.empty:
+            st.info("📁 Upload patient CSVs to compare a cohort.")
+            return
+        
+        flagged = summary['health_score'] < 75
+        
+        # Cohort overview
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Patients", f"{len(summary):,}")
+        with col2:
+            st.metric("Readings", f"{len(cohort):,}")
+        with col3:
+            st.metric("Avg Health Score", f"{summary['health_score'].mean():.0f}/100")
+        with col4:
+            st.metric("Needing Review", f"{int(flagged.sum()):,}", delta="Score below 75", delta_color="off")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(score_distribution_figure(score_distribution(summary)), use_container_width=True)
+        with col2:
+            st.markdown("**Status Breakdown (patients)**")
+            statuses = summary[['hr_status', 'bp_status', 'glucose_status']].apply(pd.Series.value_counts)
+            statuses.columns = ['Heart Rate', 'Blood Pressure', 'Blood Glucose']
+            st.dataframe(statuses.fillna(0).astype(int), use_container_width=True)
+        
+        # Patient table, lowest scores first
+        only_flagged = st.checkbox("Show only patients needing review", value=False)
+        table = summary[flagged] if only_flagged else summary
+        st.dataframe(
+            table.sort_values('health_score', kind='stable').round(1),
+            use_container_width=True,
+            height=350
+        )
+        
+        # Drill-down to one patient
+        st.markdown("#### 🔎 Patient Drill-down")
+        patient_id = st.selectbox("Patient", summary.index.astype(str).tolist())
+        patient_rows = cohort_patient_data(cohort, patient_id)
+        if patient_rows is None:
+            return
+        
+        patient = summary.loc[patient_id]
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Heart Rate", f"{patient['avg_heart_rate']:.0f} bpm", delta=patient['hr_status'], delta_color="off")
+        with col2:
+            st.metric("Blood Pressure", f"{patient['avg_systolic_bp']:.0f}/{patient['avg_diastolic_bp']:.0f}",
+                      delta=patient['bp_status'], delta_color="off")
+        with col3:
+            st.metric("Blood Glucose", f"{patient['avg_blood_glucose']:.0f} mg/dL",
+                      delta=patient['glucose_status'], delta_color="off")
+        with col4:
+            st.metric("Health Score", f"{patient['health_score']}/100")
+        
+        patient_summary = summarize_health_data(patient_rows)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(self.trend_chart(patient_summary, patient_rows, heart_rate_figure, (None, None)),
+                            use_container_width=True)
+        with col2:
+            st.plotly_chart(self.trend_chart(patient_summary, patient_rows, blood_pressure_figure, (None, None)),
+                            use_container_width=True)
+        
+        if st.button("📊 Open in Health Analytics", key="cohort_open_patient"):
+            st.session_state.uploaded_health_data = patient_rows
+            st.success(f"✅ {patient_id} loaded into the Health Analytics tab.")
     
     def run(self):
         """Main application runner"""
@@ -1028,11 +1139,12 @@ Analysis:"""
         self.render_sidebar()
         
         # Main content tabs
-        tab1, tab2, tab3, tab4 = st.tabs([
+        tab1, tab2, tab3, tab4, tab5 = st.tabs([
             "💬 Patient Chat", 
             "🔍 Disease Prediction", 
             "📋 Treatment Plans", 
-            "📊 Health Analytics"
+            "📊 Health Analytics",
+            "👥 Cohort Analytics"
         ])
         
         with tab1:
@@ -1047,13 +1159,16 @@ Analysis:"""
         with tab4:
             self.render_health_analytics()
         
+        with tab5:
+            self.render_cohort_analytics()
+        
         # Footer
         st.markdown("---")
         st.markdown(f"""
         <div style='text-align: center; color: #666; padding: 2rem;'>
             <p><strong>HealthAI - Intelligent Healthcare Assistant</strong></p>
             <p>Powered by IBM Watson & Granite-13b-instruct-v2 AI Model</p>
-            <p><strong>API Status:</strong> {'🟢 Connected' if self.watson_credentials else '🔴 Disconnected'} | 
+            <p><strong>API Status:</strong> {'🟢 Connected' if self.watson_client else '🔴 Disconnected'} | 
             <strong>Region:</strong> US-South | 
             <strong>Model:</strong> granite-13b-instruct-v2</p>
             <p><strong>⚠️ Medical Disclaimer:</strong> This application is for informational purposes only and should not replace professional medical advice, diagnosis, or treatment.</p>
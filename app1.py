@@ -5,23 +5,42 @@ This file provides additional functionality and can be used as a backup or exten
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import datetime
+import logging
 import os
 from dotenv import load_dotenv
-import json
 import random
 
+from healthai.backends import get_backend, selected_backend
+from healthai.charts import cached_figure, correlation_figure, normalized_trends_figure
+from healthai.conversation import ConversationMemory
+from healthai.health_data import generate_sample_health_data
+from healthai.health_rules import evaluate_rules
+from healthai.health_summary import summarize_health_data
+from healthai.prompts import (
+    build_chat_prompt,
+    build_prediction_prompt,
+    build_treatment_prompt,
+    chat_health_context,
+    normalize_patient_profile,
+    prediction_health_context,
+    treatment_health_context,
+)
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+OFFLINE_NOTICE = ("📴 **Offline sample response** - no AI backend is configured, so this is a generic "
+                  "example and not an assessment of your question.\n\n")
+
 class HealthAIAssistant:
     def __init__(self):
         self.initialize_session_state()
         self.setup_page_config()
         self.apply_custom_styles()
+        self.watson_client = self.init_ai_client()
     
     def initialize_session_state(self):
         """Initialize all session state variables"""
@@ -36,8 +55,8 @@ class HealthAIAssistant:
                 'emergency_contact': ''
             }
         
-        if 'conversation_history' not in st.session_state:
-            st.session_state.conversation_history = []
+        if 'conversation_memory' not in st.session_state:
+            st.session_state.conversation_memory = ConversationMemory()
         
         if 'health_metrics' not in st.session_state:
             self.generate_sample_health_data()
@@ -113,32 +132,65 @@ class HealthAIAssistant:
         </style>
         """, unsafe_allow_html=True)
     
-    def generate_sample_health_data(self):
-        """Generate realistic sample health data"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    def init_ai_client(self):
+        """Return the shared generation backend, or None when none is configured or it failed to load"""
+        self.ai_client_error = None
+        backend_name = selected_backend()
+        if backend_name != "watsonx":
+            try:
+                return get_backend(name=backend_name)
+            except Exception as e:
+                logger.exception("Could not load the %s generation backend", backend_name)
+                self.ai_client_error = f"could not load the {backend_name} backend ({e})"
+                return None
         
-        # Generate realistic health metrics with trends
-        base_hr = 72
-        base_systolic = 120
-        base_diastolic = 80
-        base_glucose = 95
+        api_key = os.getenv('WATSONX_API_KEY')
+        project_id = os.getenv('WATSONX_PROJECT_ID')
+        if not api_key or not project_id:
+            return None
         
-        st.session_state.health_metrics = pd.DataFrame({
-            'date': dates,
-            'heart_rate': np.random.normal(base_hr, 6, len(dates)) + np.sin(np.arange(len(dates)) * 0.1) * 3,
-            'systolic_bp': np.random.normal(base_systolic, 8, len(dates)) + np.sin(np.arange(len(dates)) * 0.05) * 5,
-            'diastolic_bp': np.random.normal(base_diastolic, 6, len(dates)) + np.sin(np.arange(len(dates)) * 0.05) * 3,
-            'blood_glucose': np.random.normal(base_glucose, 12, len(dates)) + np.random.choice([-1, 1], len(dates)) * np.random.exponential(2, len(dates)),
-            'sleep_hours': np.random.normal(7.5, 1, len(dates)),
-            'steps': np.random.normal(8000, 2000, len(dates)),
-            'weight': np.random.normal(70, 0.5, len(dates))
+        return get_backend({
+            'api_key': api_key,
+            'project_id': project_id,
+            'url': os.getenv('WATSONX_URL', 'https://us-south.ml.cloud.ibm.com')
         })
     
-    def advanced_ai_response(self, query_type, content, patient_data=None):
+    def generate_sample_health_data(self):
+        """Generate realistic sample health data"""
+        st.session_state.health_metrics = generate_sample_health_data(days=90)
+    
+    def advanced_ai_response(self, query_type, content, patient_data=None, health_data=None, memory=None):
         """Enhanced AI response system with more detailed responses"""
         
+        if self.watson_client:
+            profile = normalize_patient_profile(patient_data or {})
+            summary = summarize_health_data(health_data)
+            recent = summary.recent if summary else None
+            if query_type == "consultation":
+                conversation = memory.context() if memory else ""
+                prompt = build_chat_prompt(content, profile, chat_health_context(recent), conversation)
+            elif query_type == "diagnosis":
+                prompt = build_prediction_prompt(content, profile, prediction_health_context(recent))
+            else:
+                prompt = build_treatment_prompt(content, profile, treatment_health_context(recent))
+            
+            try:
+                generated_text = self.watson_client.generate(prompt)
+            except Exception as e:
+                logger.exception("AI generation failed for a %s request", query_type)
+                return f"❌ AI service unavailable: {e}. Please try again later."
+            if not generated_text:
+                return "❌ No response generated from the model."
+            return generated_text.strip()
+        
+        if self.ai_client_error:
+            return f"❌ AI service unavailable: {self.ai_client_error}."
+        
+        # No backend configured at all: canned examples, labelled as such
+        return OFFLINE_NOTICE + self.offline_response(query_type, patient_data or {})
+    
+    def offline_response(self, query_type, patient_data):
+        """Canned example answers used when no AI backend is configured"""
         if query_type == "consultation":
             detailed_responses = [
                 f"""**Medical Assessment for {patient_data.get('name', 'Patient')}**
@@ -489,11 +541,16 @@ Based on current clinical guidelines and research:
         """Render advanced chat interface"""
         st.markdown('<h2 class="section-header">💬 Advanced Medical Consultation</h2>', unsafe_allow_html=True)
         
-        # Chat history display
+        # Chat history display: the newest page, with older pages on request
+        memory = st.session_state.conversation_memory
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.conversation_history:
-                if message['sender'] == 'user':
+            pages = memory.page_count()
+            page = pages
+            if pages > 1:
+                page = st.select_slider("Conversation page", options=list(range(1, pages + 1)), value=pages)
+            for message in memory.page(page):
+                if message['role'] == 'user':
                     st.markdown(f'<div class="chat-bubble-user">👤 {message["content"]}</div>', unsafe_allow_html=True)
                 else:
                     st.markdown(f'<div class="chat-bubble-ai">🤖 {message["content"]}</div>', unsafe_allow_html=True)
@@ -524,28 +581,18 @@ Based on current clinical guidelines and research:
             submit_btn = st.form_submit_button("🚀 Get Advanced Analysis", use_container_width=True)
             
             if submit_btn and user_query:
-                # Add user message
-                st.session_state.conversation_history.append({
-                    "sender": "user",
-                    "content": user_query,
-                    "timestamp": datetime.now(),
-                    "type": query_type
-                })
-                
-                # Generate AI response
+                # Generate AI response with the conversation so far as context
                 with st.spinner("🔍 Analyzing your health concern..."):
                     ai_response = self.advanced_ai_response(
                         query_type, 
                         user_query, 
-                        st.session_state.patient_profile
+                        st.session_state.patient_profile,
+                        st.session_state.health_metrics,
+                        memory
                     )
                     
-                    st.session_state.conversation_history.append({
-                        "sender": "ai",
-                        "content": ai_response,
-                        "timestamp": datetime.now(),
-                        "type": query_type
-                    })
+                    memory.add("user", user_query, timestamp=datetime.now(), type=query_type)
+                    memory.add("ai", ai_response, timestamp=datetime.now(), type=query_type)
                 
                 st.rerun()
     
@@ -553,68 +600,51 @@ Based on current clinical guidelines and research:
         """Render enhanced health analytics dashboard"""
         st.markdown('<h2 class="section-header">📊 Advanced Health Analytics</h2>', unsafe_allow_html=True)
         
+        summary = summarize_health_data(st.session_state.health_metrics)
+        
         # Key metrics overview
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_hr = st.session_state.health_metrics['heart_rate'].mean()
-            hr_trend = "↗️" if st.session_state.health_metrics['heart_rate'].iloc[-7:].mean() > st.session_state.health_metrics['heart_rate'].iloc[-14:-7].mean() else "↘️"
+            avg_hr = summary.means['heart_rate']
+            hr_trend = summary.trend('heart_rate')
             st.metric("Heart Rate", f"{avg_hr:.0f} bpm", delta=f"{hr_trend} Trending")
         
         with col2:
-            avg_bp = f"{st.session_state.health_metrics['systolic_bp'].mean():.0f}/{st.session_state.health_metrics['diastolic_bp'].mean():.0f}"
+            avg_bp = f"{summary.means['systolic_bp']:.0f}/{summary.means['diastolic_bp']:.0f}"
             st.metric("Blood Pressure", avg_bp, delta="Normal Range")
         
         with col3:
-            avg_glucose = st.session_state.health_metrics['blood_glucose'].mean()
+            avg_glucose = summary.means['blood_glucose']
             st.metric("Blood Glucose", f"{avg_glucose:.0f} mg/dL", delta="Stable")
         
         with col4:
-            avg_sleep = st.session_state.health_metrics['sleep_hours'].mean()
+            avg_sleep = summary.means['sleep_hours']
             st.metric("Sleep Quality", f"{avg_sleep:.1f} hrs", delta="Good")
         
         # Advanced visualizations
         tab1, tab2, tab3 = st.tabs(["📈 Trends", "🔍 Correlations", "🎯 Insights"])
         
         with tab1:
-            # Multi-metric trend chart
-            fig = go.Figure()
-            
-            # Normalize data for comparison
+            # Multi-metric trend chart, normalized for comparison
             metrics = ['heart_rate', 'systolic_bp', 'blood_glucose']
             colors = ['#1f77b4', '#ff7f0e', '#2ca02c']
             
-            for i, metric in enumerate(metrics):
-                normalized_data = (st.session_state.health_metrics[metric] - st.session_state.health_metrics[metric].min()) / (st.session_state.health_metrics[metric].max() - st.session_state.health_metrics[metric].min()) * 100
-                
-                fig.add_trace(go.Scatter(
-                    x=st.session_state.health_metrics['date'],
-                    y=normalized_data,
-                    mode='lines',
-                    name=metric.replace('_', ' ').title(),
-                    line=dict(color=colors[i], width=2)
-                ))
-            
-            fig.update_layout(
-                title="Normalized Health Metrics Trends (90 Days)",
-                xaxis_title="Date",
-                yaxis_title="Normalized Value (0-100)",
-                height=400,
-                hovermode='x unified'
+            fig = cached_figure(
+                summary.data_hash, "normalized_trends", tuple(metrics),
+                lambda: normalized_trends_figure(
+                    st.session_state.health_metrics, metrics, colors,
+                    summary.mins, summary.maxs, "Normalized Health Metrics Trends (90 Days)"
+                )
             )
-            
             st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
             # Correlation analysis
-            correlation_data = st.session_state.health_metrics[['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose', 'sleep_hours']].corr()
-            
-            fig_corr = px.imshow(
-                correlation_data,
-                text_auto=True,
-                aspect="auto",
-                title="Health Metrics Correlation Matrix",
-                color_continuous_scale="RdBu"
+            numeric_cols = ['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose', 'sleep_hours']
+            fig_corr = cached_figure(
+                summary.data_hash, "correlation", tuple(numeric_cols) + ("auto_range",),
+                lambda: correlation_figure(summary.correlation(numeric_cols), height=None, fixed_range=False)
             )
             
             st.plotly_chart(fig_corr, use_container_width=True)
@@ -623,10 +653,10 @@ Based on current clinical guidelines and research:
             # AI-generated insights
             st.markdown("### 🤖 AI-Generated Health Insights")
             
-            insights = [
+            # Vitals insights and the score come from the shared rule table
+            evaluation = evaluate_rules(pd.DataFrame([summary.means]))
+            insights = evaluation.insights() + [
                 "📊 **Trend Analysis**: Your heart rate shows a stable pattern with normal circadian variation.",
-                "🩺 **Blood Pressure**: Readings are consistently within the normal range (120/80 mmHg).",
-                "🍯 **Glucose Levels**: Blood glucose levels are well-controlled with minimal fluctuation.",
                 "😴 **Sleep Pattern**: Sleep duration is adequate, averaging 7.5 hours per night.",
                 "🏃 **Activity Correlation**: Higher step counts correlate with better sleep quality.",
                 "⚠️ **Recommendations**: Continue current lifestyle habits. Consider increasing physical activity on days with lower step counts."
@@ -635,8 +665,7 @@ Based on current clinical guidelines and research:
             for insight in insights:
                 st.markdown(f"- {insight}")
             
-            # Health score calculation
-            health_score = random.randint(75, 95)
+            health_score = int(evaluation.score.iloc[0])
             st.markdown(f"### 🎯 Overall Health Score: **{health_score}/100**")
             
             if health_score >= 90:
@@ -0,0 +1,3 @@
+"""
+Core HealthAI components shared by the Streamlit apps and headless workers
+"""
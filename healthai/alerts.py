@@ -0,0 +1,277 @@
+"""
+Vectorized alert detection over a patient's vitals time series
+
+Every check is a NumPy pass over whole columns, and runs of consecutive
+flagged readings are found from the edges of the boolean mask, so a year
+of minute data is scanned in milliseconds and one long episode becomes
+one event rather than thousands:
+
+- threshold: readings outside the limits (critical when past the critical limits)
+- sustained: a threshold run at least SUSTAINED_READINGS readings long
+- zscore: readings far from their trailing-window mean
+- rate_of_change: large jumps between consecutive readings
+
+Limits are in the dashboard's units; temperatures recorded in °C (below
+CELSIUS_BELOW, as in the sample CSV) are converted to °F first.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from healthai.vitals_extraction import CELSIUS_BELOW
+
+# metric: {column: (critical_low, low, high, critical_high)}
+READING_LIMITS: Dict[str, Dict[str, Tuple[float, float, float, float]]] = {
+    'heart_rate': {'heart_rate': (40, 50, 120, 150)},
+    'blood_pressure': {
+        'systolic_bp': (70, 90, 140, 180),
+        'diastolic_bp': (40, 60, 90, 120),
+    },
+    'blood_glucose': {'blood_glucose': (54, 70, 180, 300)},
+    'temperature': {'temperature': (93, 95, 100.4, 103)},
+}
+
+# Largest expected change between consecutive readings
+RATE_LIMITS = {
+    'heart_rate': 30,
+    'systolic_bp': 30,
+    'diastolic_bp': 20,
+    'blood_glucose': 60,
+    'temperature': 2.0,
+    'weight': 2.0,
+}
+
+# Readings further apart than this are not compared for rate of change
+RATE_MAX_GAP = pd.Timedelta(hours=36)
+
+SUSTAINED_READINGS = 3
+
+ZSCORE_WINDOW = 30
+ZSCORE_LIMIT = 4.0
+ZSCORE_COLUMNS = ['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose', 'temperature']
+
+LABELS = {
+    'heart_rate': ('Heart rate', 'bpm'),
+    'blood_pressure': ('Blood pressure', 'mmHg'),
+    'systolic_bp': ('Systolic BP', 'mmHg'),
+    'diastolic_bp': ('Diastolic BP', 'mmHg'),
+    'blood_glucose': ('Blood glucose', 'mg/dL'),
+    'temperature': ('Temperature', '°F'),
+    'weight': ('Weight', 'kg'),
+}
+
+EVENT_COLUMNS = ['start', 'end', 'metric', 'kind', 'severity', 'direction', 'readings', 'value', 'diastolic_value']
+
+SEVERITIES = ['critical', 'warning']
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and stop (exclusive) indices of each run of True"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges[::2], edges[1::2]
+
+
+def _reduce_runs(ufunc: np.ufunc, x: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """ufunc (e.g. np.fmax) reduced over x[start:stop] for each run"""
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = stops
+    # A stop may equal len(x); the padding element is never inside a run
+    return ufunc.reduceat(np.append(x, np.nan), bounds)[0::2]
+
+
+def _signed_peaks(x: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Value furthest from zero in each run, keeping its sign"""
+    high = _reduce_runs(np.fmax, x, starts, stops)
+    low = _reduce_runs(np.fmin, x, starts, stops)
+    return np.where(high >= -low, high, low)
+
+
+def _count_in_runs(mask: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    counts = np.concatenate(([0], np.cumsum(mask)))
+    return counts[stops] - counts[starts]
+
+
+class _Events:
+    """Column arrays of events, collected per check and concatenated once"""
+
+    def __init__(self, dates: np.ndarray):
+        self.dates = dates
+        self.parts: List[Dict[str, np.ndarray]] = []
+
+    def add(self, metric: str, kind, severity, direction, starts: np.ndarray, stops: np.ndarray,
+            value: np.ndarray, diastolic_value: Optional[np.ndarray] = None):
+        n = len(starts)
+        if not n:
+            return
+        self.parts.append({
+            'start': self.dates[starts],
+            'end': self.dates[stops - 1],
+            'metric': np.full(n, metric, dtype=object),
+            'kind': np.broadcast_to(np.asarray(kind, dtype=object), n),
+            'severity': np.broadcast_to(np.asarray(severity, dtype=object), n),
+            'direction': np.broadcast_to(np.asarray(direction, dtype=object), n),
+            'readings': stops - starts,
+            'value': value.astype(np.float64),
+            'diastolic_value': np.full(n, np.nan) if diastolic_value is None else diastolic_value.astype(np.float64),
+        })
+
+    def frame(self) -> pd.DataFrame:
+        if self.parts:
+            columns = {column: np.concatenate([part[column] for part in self.parts]) for column in EVENT_COLUMNS}
+        else:
+            columns = {column: np.array([], dtype=object) for column in EVENT_COLUMNS}
+            columns.update(start=self.dates[:0], end=self.dates[:0],
+                           readings=np.array([], dtype=np.intp), value=np.array([]), diastolic_value=np.array([]))
+        events = pd.DataFrame(columns)
+        events['severity'] = pd.Categorical(events['severity'], categories=SEVERITIES, ordered=True)
+        return events.sort_values(['start', 'severity'], kind='stable').reset_index(drop=True)
+
+
+def _threshold_events(events: _Events, values: Dict[str, np.ndarray], sustained: int):
+    for metric, limits in READING_LIMITS.items():
+        columns = [column for column in limits if column in values]
+        if not columns:
+            continue
+        for direction in ('high', 'low'):
+            outside = np.zeros(len(events.dates), dtype=bool)
+            critical = np.zeros(len(events.dates), dtype=bool)
+            for column in columns:
+                critical_low, low, high, critical_high = limits[column]
+                x = values[column]
+                if direction == 'high':
+                    outside |= x > high
+                    critical |= x > critical_high
+                else:
+                    outside |= x < low
+                    critical |= x < critical_low
+            starts, stops = _runs(outside)
+            if not len(starts):
+                continue
+
+            n = stops - starts
+            is_critical = _count_in_runs(critical, starts, stops) > 0
+            kind = np.where(n >= sustained, 'sustained', 'threshold')
+            severity = np.where(is_critical | (n >= sustained), 'critical', 'warning')
+            extreme = np.fmax if direction == 'high' else np.fmin
+            peaks = {column: _reduce_runs(extreme, values[column], starts, stops) for column in columns}
+            primary = peaks.pop(columns[0])
+            events.add(metric, kind, severity, direction, starts, stops, primary, peaks.get('diastolic_bp'))
+
+
+def _trailing_sums(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """Sum over the `window` items before each position, from a cumulative sum with a leading 0"""
+    n = len(cumulative) - 1
+    before = np.concatenate((np.zeros(min(window, n)), cumulative[:max(n - window, 0)]))
+    return cumulative[:n] - before
+
+
+def _trailing_zscores(x: np.ndarray, window: int) -> np.ndarray:
+    """z-score of each reading against the mean and SD of the `window` readings before it"""
+    valid = ~np.isnan(x)
+    # Centering keeps the running sums small enough for float64 to stay exact
+    centered = np.where(valid, x - np.nanmean(x) if valid.any() else 0.0, 0.0)
+    n = _trailing_sums(np.concatenate(([0], np.cumsum(valid))), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = _trailing_sums(np.concatenate(([0.0], np.cumsum(centered))), window) / n
+        variance = _trailing_sums(np.concatenate(([0.0], np.cumsum(centered * centered))), window) / n - mean * mean
+        std = np.sqrt(np.maximum(variance, 0.0))
+        z = (centered - mean) / std
+    # Need a mostly full window and some spread to call anything unusual
+    z[(n < window // 2) | ~valid | ~(std > 1e-6)] = 0.0
+    return z
+
+
+def _zscore_events(events: _Events, values: Dict[str, np.ndarray], window: int, limit: float):
+    for column in ZSCORE_COLUMNS:
+        if column not in values:
+            continue
+        z = _trailing_zscores(values[column], window)
+        starts, stops = _runs(np.abs(z) >= limit)
+        if not len(starts):
+            continue
+        peak = _signed_peaks(z, starts, stops)
+        events.add(column, 'zscore', 'warning', np.where(peak > 0, 'high', 'low'), starts, stops, peak)
+
+
+def _rate_events(events: _Events, values: Dict[str, np.ndarray], dates: np.ndarray,
+                 max_gap: pd.Timedelta):
+    if len(dates) < 2:
+        return
+    gaps = np.diff(dates)
+    close = ~np.isnat(gaps) & (gaps <= max_gap.to_timedelta64())
+    for column, limit in RATE_LIMITS.items():
+        if column not in values:
+            continue
+        change = np.diff(values[column])
+        starts, stops = _runs(close & (np.abs(change) > limit))
+        if not len(starts):
+            continue
+        # Change i is between readings i and i + 1
+        peak = _signed_peaks(change, starts, stops)
+        events.add(column, 'rate_of_change', 'warning', np.where(peak > 0, 'high', 'low'), starts, stops + 1, peak)
+
+
+def detect_alerts(health_data: pd.DataFrame, sustained: int = SUSTAINED_READINGS,
+                  zscore_window: int = ZSCORE_WINDOW, zscore_limit: float = ZSCORE_LIMIT,
+                  rate_max_gap: pd.Timedelta = RATE_MAX_GAP) -> pd.DataFrame:
+    """Events table for one patient, one row per run of flagged readings
+
+    value is the most extreme reading in the run (systolic for blood
+    pressure, with diastolic_value alongside), the z-score for zscore
+    events, and the largest change for rate_of_change events.
+    """
+    if 'date' in health_data.columns:
+        dates = health_data['date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, errors='coerce')
+        dates = dates.to_numpy().astype('datetime64[ns]', copy=False)
+    else:
+        dates = np.full(len(health_data), np.datetime64('NaT'), dtype='datetime64[ns]')
+    order = None
+    if len(dates) > 1 and not pd.Index(dates).is_monotonic_increasing:
+        order = np.argsort(dates, kind='stable')
+        dates = dates[order]
+
+    values = {}
+    for column in LABELS:
+        if column in health_data.columns:
+            x = pd.to_numeric(health_data[column], errors='coerce').to_numpy(dtype=np.float64)
+            if column == 'temperature':
+                x = np.where(x < CELSIUS_BELOW, x * 9 / 5 + 32, x)
+            values[column] = x[order] if order is not None else x
+
+    events = _Events(dates)
+    if len(health_data):
+        _threshold_events(events, values, sustained)
+        _zscore_events(events, values, zscore_window, zscore_limit)
+        _rate_events(events, values, dates, rate_max_gap)
+    return events.frame()
+
+
+def alert_counts(events: pd.DataFrame) -> pd.Series:
+    """Events per severity, most severe first"""
+    return events['severity'].value_counts().reindex(SEVERITIES, fill_value=0)
+
+
+def alert_message(event) -> str:
+    """Readable description of one events-table row"""
+    label, unit = LABELS[event.metric]
+    high = event.direction == 'high'
+    if event.kind == 'zscore':
+        return f"{label} {abs(event.value):.1f} SD {'above' if high else 'below'} its recent average"
+    if event.kind == 'rate_of_change':
+        return f"{label} {'rose' if high else 'fell'} by {abs(event.value):.1f} {unit} between consecutive readings"
+
+    limits = READING_LIMITS[event.metric]
+    shown = "/".join(f"{column_limits[2 if high else 1]:g}" for column_limits in limits.values())
+    peak = f"{event.value:.0f}" if np.isnan(event.diastolic_value) else f"{event.value:.0f}/{event.diastolic_value:.0f}"
+    readings = f"{event.readings} reading{'s' if event.readings != 1 else ''}"
+    return f"{label} {'above' if high else 'below'} {shown} {unit} for {readings} ({'peak' if high else 'lowest'} {peak} {unit})"
+
+
+def alert_messages(events: pd.DataFrame) -> List[str]:
+    """Descriptions for the given rows; format only the rows being shown"""
+    return [alert_message(event) for event in events.itertuples(index=False)]
@@ -0,0 +1,241 @@
+"""
+asyncio generation engine for running many watsonx prompts concurrently
+"""
+
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from healthai.watson_client import (
+    GENERATION_API_VERSION,
+    RETRY_STATUS_CODES,
+    WatsonAPIError,
+    WatsonXClient,
+)
+
+GenerationResult = Union[str, None, BaseException]
+
+
+class ConcurrencyLimiter:
+    """Process-wide cap on in-flight generations that works across event loops
+
+    Streamlit runs each session's script in its own thread, so every session
+    may drive its own event loop. asyncio.Semaphore is bound to one loop; this
+    limiter hands slots to waiters on whichever loop they are running on.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def acquire(self):
+        with self._lock:
+            if self._active < self.limit:
+                self._active += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            if waiter[1].done() and not waiter[1].cancelled():
+                # _grant handed us the slot before the cancellation reached us
+                self.release()
+            # Otherwise the future was cancelled and _grant will give the slot back
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                if not future.done():
+                    # Transfer the slot directly so _active stays unchanged
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+            self._active -= 1
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+_limiter: Optional[ConcurrencyLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> ConcurrencyLimiter:
+    """Return the process-wide limiter sized by HEALTHAI_MAX_CONCURRENCY"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ConcurrencyLimiter(int(os.getenv("HEALTHAI_MAX_CONCURRENCY", "8")))
+        return _limiter
+
+
+class AsyncBackend:
+    """Async facade over a synchronous backend from healthai.backends
+
+    Generations run in worker threads, at most limiter-many at a time.
+    """
+
+    def __init__(self, backend, limiter: Optional[ConcurrencyLimiter] = None):
+        self.backend = backend
+        self.limiter = limiter or get_limiter()
+
+    async def __aenter__(self) -> "AsyncBackend":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def generate(self, prompt: str) -> Optional[str]:
+        async with self.limiter:
+            return await asyncio.to_thread(self.backend.generate, prompt)
+
+
+class AsyncWatsonXClient:
+    """Async counterpart of WatsonXClient sharing its settings, token manager and cache
+
+    Use as an async context manager so the underlying httpx connection pool
+    is opened and closed on the running event loop.
+    """
+
+    def __init__(self, client: WatsonXClient, limiter: Optional[ConcurrencyLimiter] = None):
+        self.client = client
+        self.limiter = limiter or get_limiter()
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncWatsonXClient":
+        connect_timeout, read_timeout = self.client.timeout
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.client.pool_maxsize,
+                max_keepalive_connections=self.client.pool_maxsize
+            )
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._http.aclose()
+        self._http = None
+
+    async def generate(self, prompt: str) -> Optional[str]:
+        """Generate text for a prompt; same contract as WatsonXClient.generate"""
+        key = self.client.cache_key(prompt) if self.client.cache else None
+        if key:
+            cached = self.client.cache.get(key)
+            if cached is not None:
+                return cached
+
+        url = f"{self.client.url}/ml/v1/text/generation?version={GENERATION_API_VERSION}"
+        body = self.client.build_body(prompt)
+
+        async with self.limiter:
+            response = await self._post(url, body)
+
+        if response.status_code != 200:
+            raise WatsonAPIError(response.status_code, response.text)
+
+        data = response.json()
+        if 'results' in data and len(data['results']) > 0:
+            generated_text = data['results'][0]['generated_text']
+            if key:
+                self.client.cache.set(key, generated_text)
+            return generated_text
+        return None
+
+    async def generate_many(self, prompts: List[str], concurrency: Optional[int] = None) -> List[GenerationResult]:
+        """Run prompts concurrently; failures are returned in place as exceptions
+
+        concurrency caps this call's in-flight requests below the process-wide limit.
+        """
+        if not concurrency:
+            return await asyncio.gather(*(self.generate(prompt) for prompt in prompts), return_exceptions=True)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(prompt: str) -> Optional[str]:
+            async with semaphore:
+                return await self.generate(prompt)
+
+        return await asyncio.gather(*(generate(prompt) for prompt in prompts), return_exceptions=True)
+
+    async def _post(self, url: str, body: Dict[str, Any]) -> httpx.Response:
+        """POST with retries on 429/5xx and one token refresh on 401"""
+        loop = asyncio.get_running_loop()
+        refreshed = False
+        attempt = 0
+
+        while True:
+            # Token lookups are normally a cache hit, but a refresh blocks on IAM
+            token = await loop.run_in_executor(None, self.client.token_manager.get_token)
+            headers = {
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}"
+            }
+            response = await self._http.post(url, headers=headers, json=body)
+
+            if response.status_code == 401 and not refreshed:
+                refreshed = True
+                self.client.token_manager.invalidate()
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.client.max_retries:
+                await asyncio.sleep(self._retry_delay(response, attempt))
+                attempt += 1
+                continue
+
+            return response
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.client.backoff_factor * (2 ** attempt)
+
+
+async def _generate_all(client: WatsonXClient, prompts: List[str],
+                        concurrency: Optional[int] = None) -> List[GenerationResult]:
+    async with AsyncWatsonXClient(client) as async_client:
+        return await async_client.generate_many(prompts, concurrency)
+
+
+def run_generations(client: WatsonXClient, prompts: List[str],
+                    concurrency: Optional[int] = None) -> List[GenerationResult]:
+    """Run prompts concurrently from synchronous code such as a Streamlit script
+
+    Other backends (see healthai.backends) run the prompts with their own generate_many.
+    """
+    if not isinstance(client, WatsonXClient):
+        return client.generate_many(prompts, concurrency)
+    return asyncio.run(_generate_all(client, prompts, concurrency))
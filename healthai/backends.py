@@ -0,0 +1,182 @@
+"""
+Pluggable text generation backends
+
+The apps talk to any object with the GenerationBackend interface
+(generate, generate_stream, generate_many and an optional response cache).
+HEALTHAI_BACKEND picks one:
+
+- watsonx (default): the pooled watsonx.ai client
+- llama_cpp: a local GGUF model (e.g. a quantized Granite) on the CPU via
+  the optional llama-cpp-python package, for sites without outbound network
+- stub: deterministic canned answers, for tests and demos
+
+Decoding is greedy everywhere, so each backend's answers can be cached.
+"""
+
+import hashlib
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from healthai.async_client import GenerationResult
+from healthai.response_cache import ResponseCache, make_cache_key
+from healthai.watson_client import DEFAULT_PARAMETERS, get_shared_client
+
+BACKENDS = ("watsonx", "llama_cpp", "stub")
+
+
+class GenerationBackend(ABC):
+    """Interface shared by every backend (WatsonXClient provides the same methods)"""
+
+    name = "backend"
+    model_id = ""
+    cache: Optional[ResponseCache] = None
+
+    @abstractmethod
+    def generate(self, prompt: str) -> Optional[str]:
+        """Generate text for a prompt; returns None when the model produced no result"""
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Generate text for a prompt, yielding chunks as they are produced"""
+        text = self.generate(prompt)
+        if text:
+            yield text
+
+    def generate_many(self, prompts: List[str], concurrency: Optional[int] = None) -> List[GenerationResult]:
+        """Generate for several prompts; failures are returned in place as exceptions"""
+        def run(prompt: str) -> GenerationResult:
+            try:
+                return self.generate(prompt)
+            except Exception as e:
+                return e
+
+        if not concurrency or concurrency <= 1 or len(prompts) <= 1:
+            return [run(prompt) for prompt in prompts]
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(prompts))) as pool:
+            return list(pool.map(run, prompts))
+
+    def _cached(self, prompt: str) -> Optional[str]:
+        return self.cache.get(self.cache_key(prompt)) if self.cache else None
+
+    def cache_key(self, prompt: str) -> str:
+        return make_cache_key(self.model_id, DEFAULT_PARAMETERS, {}, prompt)
+
+
+class LlamaCppBackend(GenerationBackend):
+    """Local CPU inference on a GGUF model through llama-cpp-python"""
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str, context_tokens: int = 4096, threads: Optional[int] = None,
+                 max_new_tokens: int = DEFAULT_PARAMETERS["max_new_tokens"],
+                 cache: Optional[ResponseCache] = None):
+        from llama_cpp import Llama
+
+        self.model_id = f"local:{os.path.basename(model_path)}"
+        self.max_new_tokens = max_new_tokens
+        self.cache = cache
+        self._llm = Llama(model_path=model_path, n_ctx=context_tokens, n_threads=threads, verbose=False)
+        # One model instance is not safe to call from several sessions at once
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LlamaCppBackend":
+        model_path = os.getenv("HEALTHAI_LOCAL_MODEL_PATH")
+        if not model_path:
+            raise RuntimeError("HEALTHAI_LOCAL_MODEL_PATH must point at a GGUF model file")
+        return cls(
+            model_path,
+            context_tokens=int(os.getenv("HEALTHAI_LOCAL_CONTEXT", "4096")),
+            threads=int(os.getenv("HEALTHAI_LOCAL_THREADS", "0")) or None,
+            cache=ResponseCache.from_env()
+        )
+
+    def _completion(self, prompt: str, stream: bool = False):
+        # temperature 0 is greedy decoding, matching the watsonx parameters
+        return self._llm(prompt, max_tokens=self.max_new_tokens, temperature=0.0,
+                         repeat_penalty=float(DEFAULT_PARAMETERS["repetition_penalty"]), stream=stream)
+
+    def generate(self, prompt: str) -> Optional[str]:
+        cached = self._cached(prompt)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            output = self._completion(prompt)
+        text = output["choices"][0]["text"] if output.get("choices") else None
+        if text and self.cache:
+            self.cache.set(self.cache_key(prompt), text)
+        return text
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        cached = self._cached(prompt)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        with self._lock:
+            for part in self._completion(prompt, stream=True):
+                chunk = part["choices"][0]["text"]
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+        if chunks and self.cache:
+            self.cache.set(self.cache_key(prompt), "".join(chunks))
+
+    def generate_many(self, prompts: List[str], concurrency: Optional[int] = None) -> List[GenerationResult]:
+        # The model lock serializes calls anyway; threads would only add overhead
+        return super().generate_many(prompts, None)
+
+
+class StubBackend(GenerationBackend):
+    """Deterministic answers derived from the prompt, for tests and offline demos"""
+
+    name = "stub"
+    model_id = "stub"
+
+    def __init__(self, response: Optional[str] = None):
+        self.response = response
+
+    def generate(self, prompt: str) -> Optional[str]:
+        if self.response is not None:
+            return self.response
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return (f"Stub response {digest}: this is a placeholder answer for a "
+                f"{len(prompt.split())}-word prompt. Consult a healthcare provider for medical advice.")
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        words = self.generate(prompt).split(" ")
+        for number, word in enumerate(words, 1):
+            yield word if number == len(words) else word + " "
+
+
+def selected_backend() -> str:
+    """Backend named by HEALTHAI_BACKEND (read at call time, after .env is loaded)"""
+    return os.getenv("HEALTHAI_BACKEND", "watsonx").strip().lower() or "watsonx"
+
+
+_local_backends: Dict[str, GenerationBackend] = {}
+_local_backends_lock = threading.Lock()
+
+
+def get_backend(credentials: Optional[Dict[str, str]] = None, name: Optional[str] = None):
+    """Return the process-wide backend selected by HEALTHAI_BACKEND
+
+    The watsonx backend needs credentials and is None without them; local
+    backends are loaded once and shared by every session.
+    """
+    name = name or selected_backend()
+    if name == "watsonx":
+        return get_shared_client(credentials) if credentials else None
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HEALTHAI_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+
+    with _local_backends_lock:
+        backend = _local_backends.get(name)
+        if backend is None:
+            backend = LlamaCppBackend.from_env() if name == "llama_cpp" else StubBackend(os.getenv("HEALTHAI_STUB_RESPONSE"))
+            _local_backends[name] = backend
+        return backend
@@ -0,0 +1,253 @@
+"""
+Headless batch inference for disease prediction and treatment plans
+
+Each input line is a JSON object such as:
+
+    {"id": "p-001", "task": "prediction", "patient": {"age": 54, "gender": "Female"}, "symptoms": "..."}
+    {"id": "p-002", "task": "treatment", "patient": {...}, "condition": "Type 2 Diabetes"}
+
+"task" may be omitted when the record has exactly one of "symptoms" or
+"condition". Results are appended to the output JSONL as each one finishes,
+so an interrupted run can be resumed by running the same command again:
+records that already have an "ok" result, or were rejected as "invalid",
+are skipped, and failed ones are retried. A line that is not a JSON object
+is recorded as an "invalid" result for "line-<number>" and the run goes on.
+The output keeps only the latest result per id. HEALTHAI_BACKEND selects
+the model backend as in the app.
+
+    python -m healthai.batch_inference patients.jsonl results.jsonl --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from dotenv import load_dotenv
+
+from healthai.async_client import AsyncBackend, AsyncWatsonXClient, ConcurrencyLimiter
+from healthai.backends import get_backend, selected_backend
+from healthai.prompts import build_prediction_prompt, build_treatment_prompt
+from healthai.watson_client import WatsonXClient
+
+TASKS = ("prediction", "treatment")
+
+# Final outcomes: running these records again would give the same result
+DONE_STATUSES = ("ok", "invalid")
+
+
+# A parsed record, or the reason its line could not be parsed
+Record = Union[Dict[str, Any], ValueError]
+
+
+def read_records(path: str) -> Iterator[Tuple[str, Record]]:
+    """Yield (record id, record) pairs from a JSONL file, skipping blank lines
+
+    A malformed line is yielded as a ValueError in place of its record.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"line-{line_number}", ValueError(f"Malformed JSON on line {line_number}: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield f"line-{line_number}", ValueError(f"Line {line_number} is not a JSON object")
+                continue
+            yield str(record.get("id", f"line-{line_number}")), record
+
+
+def read_results(output_path: str) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Latest result per id (later lines win, first-seen order) and the number of lines read"""
+    results: Dict[str, Dict[str, Any]] = {}
+    lines = 0
+    if not os.path.exists(output_path):
+        return results, lines
+
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            lines += 1
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            results[str(result["id"])] = result
+    return results, lines
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids whose latest result is final, so a resumed run skips them"""
+    results, _ = read_results(output_path)
+    return {record_id for record_id, result in results.items() if result.get("status") in DONE_STATUSES}
+
+
+def compact_results(output_path: str):
+    """Rewrite the output with only the latest result per id, if it has anything else"""
+    results, lines = read_results(output_path)
+    if lines == len(results):
+        return
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as out:
+        for result in results.values():
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(temp_path, output_path)
+
+
+def resolve_task(record: Dict[str, Any]) -> str:
+    """Work out which prompt a record needs"""
+    task = record.get("task")
+    if task is None:
+        if record.get("symptoms") and not record.get("condition"):
+            task = "prediction"
+        elif record.get("condition") and not record.get("symptoms"):
+            task = "treatment"
+    if task not in TASKS:
+        raise ValueError(f"Record needs a task of {TASKS} or exactly one of symptoms/condition")
+    return task
+
+
+def build_prompt(record: Dict[str, Any]) -> Tuple[str, str]:
+    """Build the same prompt the Streamlit app would for a record"""
+    task = resolve_task(record)
+    patient = record.get("patient", {})
+    health_context = record.get("health_context", "")
+
+    if task == "prediction":
+        return task, build_prediction_prompt(record["symptoms"], patient, health_context)
+    return task, build_treatment_prompt(record["condition"], patient, health_context)
+
+
+def load_credentials() -> Optional[Dict[str, str]]:
+    """Read watsonx credentials the same way the app does"""
+    load_dotenv()
+    api_key = os.getenv('WATSONX_API_KEY')
+    project_id = os.getenv('WATSONX_PROJECT_ID')
+    if not api_key or not project_id:
+        return None
+    return {
+        'api_key': api_key,
+        'project_id': project_id,
+        'url': os.getenv('WATSONX_URL', 'https://us-south.ml.cloud.ibm.com')
+    }
+
+
+async def run_batch(client, records: List[Tuple[str, Record]],
+                    output_path: str, concurrency: int) -> Dict[str, int]:
+    """Generate responses for records, appending each result as soon as it is ready
+
+    client is a WatsonXClient or any other backend from healthai.backends.
+    """
+    limiter = ConcurrencyLimiter(concurrency)
+    counts = {"ok": 0, "error": 0, "invalid": 0}
+
+    async def process(async_client, record_id: str, record: Record) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"id": record_id}
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            task, prompt = build_prompt(record)
+        except (KeyError, ValueError) as e:
+            # Bad input fails the same way every time, so it is not retried
+            message = f"Record is missing {e}" if isinstance(e, KeyError) else str(e)
+            result.update(status="invalid", error=message, elapsed=round(time.perf_counter() - started, 3))
+            return result
+
+        try:
+            result["task"] = task
+            generated_text = await async_client.generate(prompt)
+            if generated_text is None:
+                raise RuntimeError("No response generated from the model.")
+            result.update(status="ok", response=generated_text.strip())
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        result["elapsed"] = round(time.perf_counter() - started, 3)
+        return result
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        if isinstance(client, WatsonXClient):
+            async_generator = AsyncWatsonXClient(client, limiter)
+        else:
+            async_generator = AsyncBackend(client, limiter)
+        async with async_generator as async_client:
+            tasks = [asyncio.ensure_future(process(async_client, record_id, record))
+                     for record_id, record in records]
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                # Flush every result so a crash loses at most the in-flight ones
+                out.flush()
+                os.fsync(out.fileno())
+                counts[result["status"]] += 1
+
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run HealthAI predictions and treatment plans over a JSONL file")
+    parser.add_argument("input", help="JSONL file of patient records")
+    parser.add_argument("output", help="JSONL file to append results to (also used to resume)")
+    parser.add_argument("--concurrency", type=int,
+                        default=int(os.getenv("HEALTHAI_MAX_CONCURRENCY", "8")),
+                        help="Maximum number of generations in flight")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Process every record even if the output already has a result for it")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    backend = selected_backend()
+    credentials = load_credentials() if backend == "watsonx" else None
+    if backend == "watsonx" and credentials is None:
+        print("❌ IBM Watson credentials not found in .env file!", file=sys.stderr)
+        return 1
+
+    # Drop rows superseded by later attempts so the file stays one row per id
+    compact_results(args.output)
+    done = set() if args.no_resume else completed_ids(args.output)
+    records = [(record_id, record) for record_id, record in read_records(args.input)
+               if record_id not in done]
+
+    if done:
+        print(f"Resuming: {len(done)} records already completed", file=sys.stderr)
+    if not records:
+        print("Nothing to do.", file=sys.stderr)
+        return 0
+
+    if credentials is not None:
+        # A client of its own, with a connection pool as large as the batch concurrency
+        client = WatsonXClient.from_credentials(credentials, pool_maxsize=max(args.concurrency, 1))
+    else:
+        try:
+            client = get_backend(name=backend)
+        except (RuntimeError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+
+    started = time.perf_counter()
+    counts = asyncio.run(run_batch(client, records, args.output, args.concurrency))
+    elapsed = time.perf_counter() - started
+    compact_results(args.output)
+
+    per_minute = len(records) / elapsed * 60 if elapsed else 0.0
+    print(
+        f"Processed {len(records)} records in {elapsed:.1f}s "
+        f"({per_minute:.1f} patients/min): {counts['ok']} ok, {counts['error']} errors, "
+        f"{counts['invalid']} invalid",
+        file=sys.stderr
+    )
+    return 0 if counts["error"] == 0 and counts["invalid"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Benchmarks for the ingestion and analytics hot paths
+
+Each benchmark runs over synthetic datasets in the shape
+generate_sample_health_data produces, at 30 days, 1 year and 5 years of
+daily and minute readings (up to 2.6 million rows). Wall time is the
+median of several timed runs after a warm-up; memory is the peak traced
+by tracemalloc (NumPy and pandas buffers included) in one extra run.
+
+Results are written as JSON under benchmarks/results/, named after the
+git revision, so releases can be compared:
+
+    python -m healthai.benchmarks --sizes 30d,1y
+    python -m healthai.benchmarks --compare benchmarks/results/v1.2.0.json --threshold 1.25
+
+With --compare the command exits with status 2 when any benchmark is
+slower (or uses more memory) than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from healthai.alerts import detect_alerts
+from healthai.charts import (
+    blood_pressure_figure,
+    correlation_figure,
+    glucose_figure,
+    heart_rate_figure,
+    normalized_trends_figure,
+    select_date_range,
+)
+from healthai.health_data import generate_sample_health_data
+from healthai.health_rules import evaluate_rules
+from healthai.health_summary import HealthSummary
+from healthai.ingestion import read_health_csv
+
+SIZES = {"30d": 30, "1y": 365, "5y": 1825}
+
+RESOLUTIONS = {"daily": "D", "minute": "min"}
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "results")
+
+# Fixed so every run and every machine benchmarks the same rows
+END_DATE = datetime(2025, 1, 1)
+
+CORRELATION_COLUMNS = ['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose', 'sleep_hours', 'weight']
+
+TREND_METRICS = ['heart_rate', 'systolic_bp', 'blood_glucose']
+TREND_COLORS = ['#e74c3c', '#3498db', '#2ecc71']
+
+
+class Dataset:
+    """One synthetic dataset, with its CSV and summary built on first use"""
+
+    def __init__(self, size: str, resolution: str, workdir: str, seed: int = 0):
+        self.name = f"{size}-{resolution}"
+        np.random.seed(seed)
+        self.frame = generate_sample_health_data(SIZES[size], RESOLUTIONS[resolution], end_date=END_DATE)
+        self.workdir = workdir
+        self._csv_path: Optional[str] = None
+        self._summary: Optional[HealthSummary] = None
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def csv_path(self) -> str:
+        """The dataset as an upload would arrive: a CSV with two-decimal readings"""
+        if self._csv_path is None:
+            self._csv_path = os.path.join(self.workdir, f"{self.name}.csv")
+            self.frame.to_csv(self._csv_path, index=False, float_format="%.2f")
+        return self._csv_path
+
+    @property
+    def summary(self) -> HealthSummary:
+        if self._summary is None:
+            self._summary = HealthSummary(self.frame)
+        return self._summary
+
+
+def _trend_figures(dataset: Dataset):
+    # What render_health_analytics builds for the full date range
+    visible = select_date_range(dataset.frame)
+    return [heart_rate_figure(visible), glucose_figure(visible), blood_pressure_figure(visible)]
+
+
+def _dashboard_figures(dataset: Dataset):
+    summary = dataset.summary
+    return _trend_figures(dataset) + [
+        correlation_figure(summary.correlation(CORRELATION_COLUMNS)),
+        normalized_trends_figure(dataset.frame, TREND_METRICS, TREND_COLORS, summary.mins, summary.maxs,
+                                 "Normalized Health Metrics Trends"),
+    ]
+
+
+def _prepare_figures(dataset: Dataset) -> Callable[[], Any]:
+    figures = _dashboard_figures(dataset)
+    return lambda: [figure.to_json() for figure in figures]
+
+
+# name: (description, prepare) where prepare(dataset) does any untimed setup
+# and returns the zero-argument callable that is timed
+BENCHMARKS: Dict[str, Tuple[str, Callable[[Dataset], Callable[[], Any]]]] = {
+    "ingest_csv": ("read_health_csv on the dataset's CSV",
+                   lambda dataset: (lambda path=dataset.csv_path: read_health_csv(path))),
+    "summary": ("HealthSummary: content hash, rolling stats and co-moments",
+                lambda dataset: (lambda: HealthSummary(dataset.frame))),
+    "correlation": ("Full and last-30-days correlation matrices from the summary",
+                    lambda dataset: (lambda summary=dataset.summary: (
+                        summary.correlation(CORRELATION_COLUMNS), summary.correlation(CORRELATION_COLUMNS, 30)))),
+    "health_score": ("Rule table insights and score for the average vitals",
+                     lambda dataset: (lambda means=pd.DataFrame([dataset.summary.means]): evaluate_rules(means))),
+    "alerts": ("detect_alerts over every reading",
+               lambda dataset: (lambda: detect_alerts(dataset.frame))),
+    "trend_figures": ("Heart rate, glucose and blood pressure trend figures",
+                      lambda dataset: (lambda: _trend_figures(dataset))),
+    "dashboard_figures": ("Trend, correlation and normalized-trend figures",
+                          lambda dataset: (lambda: _dashboard_figures(dataset))),
+    "figure_json": ("Serializing the dashboard figures as st.plotly_chart does",
+                    _prepare_figures),
+}
+
+
+def measure(func: Callable[[], Any], repeat: int, max_seconds: float) -> Dict[str, Any]:
+    """Median and min wall time over up to `repeat` runs, plus traced peak memory"""
+    func()  # warm-up: imports, caches and first-touch allocation
+
+    times: List[float] = []
+    budget_end = time.perf_counter() + max_seconds
+    while len(times) < repeat and (not times or time.perf_counter() < budget_end):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": round(statistics.median(times), 6),
+        "min_s": round(min(times), 6),
+        "runs": len(times),
+        "peak_bytes": peak,
+    }
+
+
+def git_revision() -> str:
+    """`git describe` of the working tree, or "unknown" outside a checkout"""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--tags", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def run_benchmarks(sizes: List[str], resolutions: List[str], names: List[str], repeat: int = 5,
+                   max_seconds: float = 10.0, log: Callable[[str], None] = print) -> Dict[str, Dict[str, Any]]:
+    """Results keyed by "benchmark/dataset", e.g. "alerts/1y-minute" """
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="healthai-bench-") as workdir:
+        for resolution in resolutions:
+            for size in sizes:
+                dataset = Dataset(size, resolution, workdir)
+                for name in names:
+                    func = BENCHMARKS[name][1](dataset)
+                    result = {"rows": len(dataset), **measure(func, repeat, max_seconds)}
+                    key = f"{name}/{dataset.name}"
+                    results[key] = result
+                    log(f"{key:<32}{result['rows']:>10,} rows {result['median_s'] * 1000:>11.2f} ms"
+                        f" {result['peak_bytes'] / 2 ** 20:>9.1f} MiB")
+                # Large datasets are freed before the next one is generated
+                del dataset
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Benchmarks whose time or memory grew by more than `threshold` times the baseline"""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        for field, label in (("median_s", "time"), ("peak_bytes", "memory")):
+            # Ignore noise on measurements too small to matter
+            floor = 1e-3 if field == "median_s" else 2 ** 20
+            if before[field] > 0 and result[field] > floor and result[field] / before[field] > threshold:
+                regressions.append(f"{key}: {label} {result[field] / before[field]:.2f}x baseline "
+                                   f"({before[field]:g} -> {result[field]:g})")
+    return regressions
+
+
+def _choices(value: str, allowed, option: str) -> List[str]:
+    chosen = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in chosen if item not in allowed]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"{option}: unknown {', '.join(unknown)}; expected {', '.join(allowed)}")
+    return chosen
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark HealthAI ingestion, statistics, alerts and charts")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS),
+                        help=f"Comma-separated subset of {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--bench", default=None, help="Only run benchmarks whose name matches this regex")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop repeating a benchmark after this many seconds")
+    parser.add_argument("--label", default=None, help="Name for the results file (default: git describe)")
+    parser.add_argument("--output-dir", default=RESULTS_DIR, help="Where results JSON files are written")
+    parser.add_argument("--no-save", action="store_true", help="Print results without writing a file")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Slowdown or memory growth ratio that counts as a regression")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (description, _) in BENCHMARKS.items():
+            print(f"{name:<20}{description}")
+        return 0
+
+    try:
+        sizes = _choices(args.sizes, SIZES, "--sizes")
+        resolutions = _choices(args.resolutions, RESOLUTIONS, "--resolutions")
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    names = [name for name in BENCHMARKS if args.bench is None or re.search(args.bench, name)]
+    if not names:
+        parser.error(f"No benchmark matches {args.bench!r}")
+
+    revision = git_revision()
+    started = time.perf_counter()
+    results = run_benchmarks(sizes, resolutions, names, args.repeat, args.max_seconds)
+    print(f"\n{len(results)} benchmarks in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    report = {
+        "revision": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "max_seconds": args.max_seconds},
+        "results": results,
+    }
+    if not args.no_save:
+        os.makedirs(args.output_dir, exist_ok=True)
+        path = os.path.join(args.output_dir, f"{args.label or revision}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {baseline.get('revision', args.compare)}:",
+                  file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 2
+        print(f"✅ No regressions against {baseline.get('revision', args.compare)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Plotly figure builders for the analytics dashboard
+
+Long series are decimated server-side with min/max bucketing before they
+are handed to Plotly, and switch to WebGL traces past a size threshold, so
+a year of minute-level readings does not ship millions of points to the
+browser on every rerun.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Upper bound on points per trace sent to the browser
+MAX_POINTS = 2000
+
+# Series longer than this (before decimation) are drawn with Scattergl
+WEBGL_THRESHOLD = 5000
+
+# Below this many points markers are still readable
+MARKER_THRESHOLD = 500
+
+FIGURE_CACHE_SIZE = int(os.getenv("HEALTHAI_FIGURE_CACHE_SIZE", "64"))
+
+
+def minmax_indices(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Indices of the min and max of each of n_buckets equal slices, plus the endpoints
+
+    Keeping both extremes of every bucket preserves spikes that averaging or
+    plain striding would drop.
+    """
+    n = len(values)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+
+    bucket_size = int(np.ceil(n / n_buckets))
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(n_buckets, bucket_size)
+
+    # NaN never wins; an all-NaN bucket falls back to its first index
+    offsets = np.arange(n_buckets) * bucket_size
+    lows = np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1) + offsets
+    highs = np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1) + offsets
+
+    indices = np.concatenate(([0], lows, highs, [n - 1]))
+    return np.unique(indices[indices < n])
+
+
+def decimate(x: pd.Series, y: pd.Series, max_points: int = MAX_POINTS) -> Tuple[pd.Series, pd.Series]:
+    """Reduce a series to at most max_points points, keeping local extremes"""
+    if len(y) <= max_points:
+        return x, y
+
+    # Two points per bucket plus the two endpoints
+    indices = minmax_indices(y.to_numpy(dtype=np.float64, na_value=np.nan), max(1, (max_points - 2) // 2))
+    return x.iloc[indices], y.iloc[indices]
+
+
+def select_date_range(health_data: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """Rows whose date falls in [start, end] (inclusive, whole days)"""
+    if start is None and end is None:
+        return health_data
+
+    dates = health_data['date']
+    mask = np.ones(len(health_data), dtype=bool)
+    if start is not None:
+        mask &= (dates >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (dates < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+    return health_data[mask]
+
+
+def trend_trace(x: pd.Series, y: pd.Series, name: str, color: str,
+                max_points: int = MAX_POINTS) -> go.Scatter:
+    """Line trace for one vital, decimated and switched to WebGL when the series is long"""
+    raw_points = len(y)
+    x, y = decimate(x, y, max_points)
+
+    trace_type = go.Scattergl if raw_points > WEBGL_THRESHOLD else go.Scatter
+    if len(y) <= MARKER_THRESHOLD:
+        return trace_type(
+            x=x,
+            y=y,
+            mode='lines+markers',
+            name=name,
+            line=dict(color=color, width=3),
+            marker=dict(size=6)
+        )
+    return trace_type(x=x, y=y, mode='lines', name=name, line=dict(color=color, width=2))
+
+
+def _trend_layout(fig: go.Figure, title: str, yaxis_title: str) -> go.Figure:
+    fig.update_layout(
+        title=title,
+        xaxis_title="Date",
+        yaxis_title=yaxis_title,
+        height=400,
+        hovermode='x unified'
+    )
+    return fig
+
+
+def heart_rate_figure(health_data: pd.DataFrame, max_points: int = MAX_POINTS) -> go.Figure:
+    """Heart Rate Trend chart"""
+    fig = go.Figure()
+    fig.add_trace(trend_trace(health_data['date'], health_data['heart_rate'],
+                              'Heart Rate', '#2E86AB', max_points))
+    return _trend_layout(fig, "Heart Rate Trend", "Heart Rate (bpm)")
+
+
+def glucose_figure(health_data: pd.DataFrame, max_points: int = MAX_POINTS) -> go.Figure:
+    """Blood Glucose Trend chart with the normal range marked"""
+    fig = go.Figure()
+    fig.add_trace(trend_trace(health_data['date'], health_data['blood_glucose'],
+                              'Blood Glucose', '#A23B72', max_points))
+    fig.add_hline(y=100, line_dash="dash", line_color="red", annotation_text="Normal Upper Limit")
+    fig.add_hline(y=70, line_dash="dash", line_color="orange", annotation_text="Normal Lower Limit")
+    return _trend_layout(fig, "Blood Glucose Trend", "Blood Glucose (mg/dL)")
+
+
+def blood_pressure_figure(health_data: pd.DataFrame, max_points: int = MAX_POINTS) -> go.Figure:
+    """Blood Pressure Trend chart with systolic and diastolic traces"""
+    fig = go.Figure()
+    fig.add_trace(trend_trace(health_data['date'], health_data['systolic_bp'],
+                              'Systolic', '#FF6B6B', max_points))
+    fig.add_trace(trend_trace(health_data['date'], health_data['diastolic_bp'],
+                              'Diastolic', '#4ECDC4', max_points))
+    return _trend_layout(fig, "Blood Pressure Trend", "Blood Pressure (mmHg)")
+
+
+def date_bounds(health_data: pd.DataFrame) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """First and last date in the data, or None when there are no valid dates"""
+    dates = health_data['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    start, end = dates.min(), dates.max()
+    if pd.isna(start) or pd.isna(end):
+        return None
+    return start, end
+
+
+def status_distribution_figure() -> go.Figure:
+    """Health Status Distribution pie chart"""
+    # Create symptom frequency based on health data patterns
+    symptoms_data = {
+        'Normal': 60.0,
+        'Mild Fatigue': 15.0,
+        'Headache': 10.0,
+        'Dizziness': 8.0,
+        'Other': 7.0
+    }
+
+    fig = px.pie(
+        values=list(symptoms_data.values()),
+        names=list(symptoms_data.keys()),
+        title="Health Status Distribution",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def correlation_figure(correlation_data: pd.DataFrame, height: Optional[int] = 500,
+                       fixed_range: bool = True) -> go.Figure:
+    """Health Metrics Correlation Matrix heatmap"""
+    color_range = dict(zmin=-1, zmax=1) if fixed_range else {}
+    fig = px.imshow(
+        correlation_data,
+        text_auto=True,
+        aspect="auto",
+        title="Health Metrics Correlation Matrix",
+        color_continuous_scale="RdBu",
+        **color_range
+    )
+    if height:
+        fig.update_layout(height=height)
+    return fig
+
+
+def normalized_trends_figure(health_data: pd.DataFrame, metrics: List[str], colors: List[str],
+                             mins: dict, maxs: dict, title: str,
+                             max_points: int = MAX_POINTS) -> go.Figure:
+    """Several vitals rescaled to 0-100 on one chart"""
+    fig = go.Figure()
+
+    for metric, color in zip(metrics, colors):
+        normalized_data = (health_data[metric] - mins[metric]) / (maxs[metric] - mins[metric]) * 100
+        x, y = decimate(health_data['date'], normalized_data, max_points)
+        trace_type = go.Scattergl if len(health_data) > WEBGL_THRESHOLD else go.Scatter
+        fig.add_trace(trace_type(
+            x=x,
+            y=y,
+            mode='lines',
+            name=metric.replace('_', ' ').title(),
+            line=dict(color=color, width=2)
+        ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Date",
+        yaxis_title="Normalized Value (0-100)",
+        height=400,
+        hovermode='x unified'
+    )
+    return fig
+
+
+def score_distribution_figure(bands: pd.Series) -> go.Figure:
+    """Patients per health-score band for the cohort view"""
+    fig = px.bar(
+        x=bands.index.astype(str),
+        y=bands.to_numpy(),
+        title="Health Score Distribution",
+        labels={'x': "Health Score Band", 'y': "Patients"},
+        color=bands.index.astype(str),
+        color_discrete_sequence=['#FF6B6B', '#FFB347', '#4ECDC4', '#2E86AB']
+    )
+    fig.update_layout(height=400, showlegend=False)
+    return fig
+
+
+class FigureCache:
+    """Process-wide LRU of built figures keyed by (dataset hash, chart type, options)
+
+    Figures are cached as objects rather than JSON: st.plotly_chart re-validates
+    dicts by rebuilding a Figure, but serializes a Figure directly.
+    """
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._figures: "OrderedDict[Tuple[Hashable, ...], go.Figure]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, data_hash: str, chart_type: str, options: Tuple[Hashable, ...],
+                     build: Callable[[], go.Figure]) -> go.Figure:
+        key = (data_hash, chart_type) + tuple(options)
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+
+        fig = build()
+        with self._lock:
+            self._figures[key] = fig
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+_figure_cache = FigureCache()
+
+
+def cached_figure(data_hash: str, chart_type: str, options: Tuple[Hashable, ...],
+                  build: Callable[[], go.Figure]) -> go.Figure:
+    """Return a cached figure for a dataset, building it on first use"""
+    return _figure_cache.get_or_build(data_hash, chart_type, options, build)
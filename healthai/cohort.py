@@ -0,0 +1,106 @@
+"""
+Multi-patient cohort analytics
+
+A cohort is one long-format DataFrame (a categorical patient_id column plus
+the usual vitals), so per-patient means, trend flags and health scores are
+single groupby/NumPy passes over the whole cohort rather than a Python loop
+per patient.
+"""
+
+import os
+from typing import IO, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from healthai.health_data import VITAL_COLUMNS
+from healthai.health_rules import evaluate_rules
+from healthai.ingestion import DEFAULT_CHUNKSIZE, read_health_csv
+from healthai.rolling_stats import RECENT_WINDOW
+
+PATIENT_COLUMN = 'patient_id'
+
+
+def build_cohort(datasets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Stack per-patient DataFrames into one long frame with a categorical patient_id"""
+    frames = [health_data.drop(columns=[PATIENT_COLUMN], errors='ignore') for health_data in datasets.values()]
+    if not frames:
+        return pd.DataFrame({PATIENT_COLUMN: pd.Categorical([])})
+
+    cohort = pd.concat(frames, ignore_index=True, copy=False)
+    lengths = [len(frame) for frame in frames]
+    codes = np.repeat(np.arange(len(frames)), lengths)
+    cohort.insert(0, PATIENT_COLUMN, pd.Categorical.from_codes(codes, categories=list(datasets)))
+    return cohort
+
+
+def read_cohort_csvs(sources: Iterable[Tuple[str, Union[str, IO]]],
+                     chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Read (name, file) pairs into a cohort
+
+    A file with a patient_id column is taken as a long-format export of many
+    patients; any other file is one patient, named after the file.
+    """
+    cohorts = []
+    singles = {}
+    for name, source in sources:
+        health_data = read_health_csv(source, chunksize=chunksize, id_column=PATIENT_COLUMN)
+        if PATIENT_COLUMN in health_data.columns:
+            cohorts.append(health_data)
+        else:
+            singles[os.path.splitext(os.path.basename(name))[0]] = health_data
+
+    if singles:
+        cohorts.append(build_cohort(singles))
+    if not cohorts:
+        return build_cohort({})
+
+    cohort = pd.concat(cohorts, ignore_index=True, copy=False)
+    # Categories differ between files, so concat falls back to object
+    cohort[PATIENT_COLUMN] = cohort[PATIENT_COLUMN].astype('category')
+    return cohort
+
+
+def classify_vitals(means: pd.DataFrame) -> pd.DataFrame:
+    """Status labels and health score for each row of average vitals (vectorized rule table)"""
+    return evaluate_rules(means).frame()
+
+
+def cohort_summary(cohort: pd.DataFrame, window: int = RECENT_WINDOW) -> pd.DataFrame:
+    """One row per patient: readings, mean vitals, trend flags, statuses and health score"""
+    vitals = [column for column in VITAL_COLUMNS if column in cohort.columns]
+    if 'date' in cohort.columns:
+        cohort = cohort.sort_values([PATIENT_COLUMN, 'date'], kind='stable')
+
+    grouped = cohort.groupby(PATIENT_COLUMN, observed=True, sort=True)
+    means = grouped[vitals].mean()
+
+    # Position from the end of each patient's series splits the two trend windows
+    from_end = grouped.cumcount(ascending=False).to_numpy()
+    recent = cohort[from_end < window].groupby(PATIENT_COLUMN, observed=True)[vitals].mean()
+    previous = cohort[(from_end >= window) & (from_end < 2 * window)].groupby(
+        PATIENT_COLUMN, observed=True)[vitals].mean().reindex(means.index)
+    recent = recent.reindex(means.index)
+
+    summary = means.add_prefix('avg_')
+    summary.insert(0, 'readings', grouped.size())
+    for column in ('heart_rate', 'systolic_bp', 'blood_glucose'):
+        summary[f'{column}_rising'] = (recent[column] > previous[column]).to_numpy()
+
+    return summary.join(classify_vitals(means))
+
+
+def score_distribution(summary: pd.DataFrame, bins: Tuple[int, ...] = (0, 60, 75, 90, 101)) -> pd.Series:
+    """Patients per health-score band (the bands the dashboard's status messages use)"""
+    labels = ['Needs attention', 'Fair', 'Good', 'Excellent'][:len(bins) - 1]
+    bands = pd.cut(summary['health_score'], bins=list(bins), labels=labels, right=False)
+    return bands.value_counts().reindex(labels, fill_value=0)
+
+
+def patient_data(cohort: pd.DataFrame, patient_id: str) -> Optional[pd.DataFrame]:
+    """One patient's rows, in the single-patient shape the dashboard expects"""
+    patients = cohort[PATIENT_COLUMN].cat
+    if patient_id not in patients.categories:
+        return None
+    rows = patients.codes.to_numpy() == patients.categories.get_loc(patient_id)
+    return cohort[rows].drop(columns=[PATIENT_COLUMN]).reset_index(drop=True)
@@ -0,0 +1,105 @@
+"""
+Bounded conversation memory for the patient chat
+
+The last few question/answer turns are kept verbatim; older turns are
+folded into a rolling summary of one short line per exchange, and the
+oldest summary lines are dropped once it outgrows its token allowance.
+Folding is extractive (first sentence of each side), so it needs no model
+call and the prompt context stays bounded however long the session runs.
+The displayed transcript is kept separately, capped, and read a page at
+a time.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from healthai.prompt_budget import compact_text, count_tokens, truncate_to_tokens
+
+MEMORY_TURNS = int(os.getenv("HEALTHAI_CHAT_MEMORY_TURNS", "4"))
+
+SUMMARY_TOKENS = int(os.getenv("HEALTHAI_CHAT_SUMMARY_TOKENS", "300"))
+
+PAGE_SIZE = int(os.getenv("HEALTHAI_CHAT_PAGE_SIZE", "20"))
+
+# Messages kept for display; older ones are dropped from the transcript
+TRANSCRIPT_LIMIT = 500
+
+# Tokens of each side of an exchange kept in its summary line
+GIST_TOKENS = 40
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def gist(text: str, max_tokens: int = GIST_TOKENS) -> str:
+    """First sentence of a message, without markdown emphasis, cut to max_tokens"""
+    text = compact_text(re.sub(r"[*#_`>]+", "", text)).replace("\n", " ")
+    return truncate_to_tokens(_SENTENCE_END.split(text, 1)[0], max_tokens)
+
+
+class ConversationMemory:
+    """Chat transcript plus the bounded context that is sent to the model"""
+
+    def __init__(self, max_turns: int = MEMORY_TURNS, summary_tokens: int = SUMMARY_TOKENS,
+                 transcript_limit: int = TRANSCRIPT_LIMIT):
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.transcript_limit = transcript_limit
+        self.messages: List[Dict] = []
+        self.dropped_messages = 0
+        self.recent: List[Tuple[str, str]] = []
+        self.summary_lines: List[str] = []
+        self.omitted_turns = 0
+        self._question: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def add(self, role: str, content: str, **details):
+        """Record a message; role is 'user' or 'ai', details are kept for display"""
+        self.messages.append({'role': role, 'content': content, **details})
+        if len(self.messages) > self.transcript_limit:
+            excess = len(self.messages) - self.transcript_limit
+            del self.messages[:excess]
+            self.dropped_messages += excess
+
+        if role == 'user':
+            self._question = content
+        elif self._question is not None:
+            self.recent.append((self._question, content))
+            self._question = None
+            while len(self.recent) > self.max_turns:
+                self._fold(*self.recent.pop(0))
+
+    def _fold(self, question: str, answer: str):
+        self.summary_lines.append(f"- Patient asked: {gist(question)} | HealthAI answered: {gist(answer)}")
+        # Keep at least the latest line even if it alone is over the allowance
+        while len(self.summary_lines) > 1 and count_tokens("\n".join(self.summary_lines)) > self.summary_tokens:
+            self.summary_lines.pop(0)
+            self.omitted_turns += 1
+
+    def summary(self) -> str:
+        lines = list(self.summary_lines)
+        if self.omitted_turns:
+            lines.insert(0, f"- ({self.omitted_turns} earlier exchanges not shown)")
+        return "\n".join(lines)
+
+    def context(self) -> str:
+        """Conversation so far, for the chat prompt ("" before the first answer)"""
+        parts = []
+        summary = self.summary()
+        if summary:
+            parts.append(f"Earlier exchanges (summarized):\n{summary}")
+        if self.recent:
+            turns = "\n".join(f"Patient: {question}\nHealthAI: {answer}" for question, answer in self.recent)
+            parts.append(f"Most recent exchanges:\n{turns}")
+        return "\n\n".join(parts)
+
+    def page_count(self, page_size: int = PAGE_SIZE) -> int:
+        return max(1, -(-len(self.messages) // page_size))
+
+    def page(self, number: int, page_size: int = PAGE_SIZE) -> List[Dict]:
+        """Messages on a 1-based page; the last page holds the newest messages"""
+        # Pages are aligned to the newest message so the last page is always full
+        stop = len(self.messages) - (self.page_count(page_size) - number) * page_size
+        return self.messages[max(0, stop - page_size):max(0, stop)]
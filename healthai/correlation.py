@@ -0,0 +1,154 @@
+"""
+Streaming correlation matrices for the vitals
+
+Pairwise co-moments (count, means, sums of squared deviations and the
+cross term for every pair of columns) are accumulated chunk by chunk and
+merged with the parallel form of Welford's update, so the matrix matches
+DataFrame.corr() (pairwise-complete observations) without rescanning the
+data. Per-day moments for recent days are kept as well, which makes a
+windowed matrix such as "last 30 days" a merge of at most 30 small
+blocks.
+"""
+
+import warnings
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Days of per-day moments kept for windowed correlations
+RETAIN_DAYS = 90
+
+
+class CoMoments:
+    """Pairwise co-moments of a set of columns
+
+    For every pair (a, b) over the rows where both are present: n[a, b],
+    mean[a, b] (mean of a), m2[a, b] (squared deviations of a) and
+    c[a, b] (cross deviations, symmetric).
+    """
+
+    def __init__(self, n_columns: int):
+        shape = (n_columns, n_columns)
+        self.n = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.c = np.zeros(shape)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "CoMoments":
+        moments = cls(values.shape[1])
+        if not len(values):
+            return moments
+
+        present = ~np.isnan(values)
+        weights = present.astype(np.float64)
+        # Center on the column means first so the products stay small
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            center = np.nan_to_num(np.nanmean(values, axis=0))
+        deviations = np.where(present, values - center, 0.0)
+
+        n = weights.T @ weights
+        sums = deviations.T @ weights
+        squares = (deviations * deviations).T @ weights
+        cross = deviations.T @ deviations
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            moments.n = n
+            moments.mean = np.where(n > 0, center[:, None] + sums / n, 0.0)
+            moments.m2 = np.where(n > 0, squares - sums * sums / n, 0.0)
+            moments.c = np.where(n > 0, cross - sums * sums.T / n, 0.0)
+        return moments
+
+    def copy(self) -> "CoMoments":
+        other = CoMoments(len(self.n))
+        other.n = self.n.copy()
+        other.mean = self.mean.copy()
+        other.m2 = self.m2.copy()
+        other.c = self.c.copy()
+        return other
+
+    def merge(self, other: "CoMoments"):
+        """Fold another block of rows in (Chan et al. pairwise update)"""
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        ratio = np.divide(other.n, n, out=np.zeros_like(n), where=n > 0)
+        weight = self.n * ratio
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + other.m2 + delta * delta * weight
+        self.c = self.c + other.c + delta * delta.T * weight
+        self.n = n
+
+    def correlation(self) -> np.ndarray:
+        # Rounding leaves a constant column with a tiny nonzero spread; treat it
+        # as zero so it comes out NaN like DataFrame.corr()
+        scale = np.maximum(np.abs(self.mean), 1.0)
+        m2 = np.where(self.m2 > self.n * (1e-7 * scale) ** 2, self.m2, 0.0)
+        spread = m2 * m2.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.c / np.sqrt(spread)
+        corr[(self.n < 2) | (spread == 0)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+class StreamingCorrelation:
+    """Correlation matrix over all rows seen, plus windowed matrices over recent days"""
+
+    def __init__(self, columns: List[str], retain_days: int = RETAIN_DAYS):
+        self.columns = list(columns)
+        self.retain_days = retain_days
+        self.total = CoMoments(len(self.columns))
+        self.daily: "OrderedDict[np.datetime64, CoMoments]" = OrderedDict()
+
+    def copy(self) -> "StreamingCorrelation":
+        other = StreamingCorrelation(self.columns, self.retain_days)
+        other.total = self.total.copy()
+        other.daily = OrderedDict((day, moments.copy()) for day, moments in self.daily.items())
+        return other
+
+    def update(self, chunk: pd.DataFrame):
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.total.merge(CoMoments.from_values(values))
+
+        if 'date' not in chunk.columns or not pd.api.types.is_datetime64_any_dtype(chunk['date']):
+            return
+
+        days = chunk['date'].to_numpy().astype('datetime64[D]')
+        valid = ~np.isnat(days)
+        if not valid.any():
+            return
+
+        # Only days that can still fall inside the retained span are bucketed
+        last_day = days[valid].max()
+        if self.daily:
+            last_day = max(last_day, next(reversed(self.daily)))
+        first_kept = last_day - np.timedelta64(self.retain_days - 1, 'D')
+        keep = np.flatnonzero(valid & (days >= first_kept))
+        order = keep[np.argsort(days[keep], kind='stable')]
+        kept_days, starts = np.unique(days[order], return_index=True)
+        for day, rows in zip(kept_days, np.split(order, starts[1:])):
+            block = CoMoments.from_values(values[rows])
+            if day in self.daily:
+                self.daily[day].merge(block)
+            else:
+                self.daily[day] = block
+
+        self.daily = OrderedDict(sorted(
+            ((day, moments) for day, moments in self.daily.items() if day >= first_kept),
+            key=lambda item: item[0]
+        ))
+
+    def matrix(self, days: Optional[int] = None) -> pd.DataFrame:
+        """Correlation matrix over all rows, or over the last `days` days of data"""
+        if days is None:
+            moments = self.total
+        else:
+            moments = CoMoments(len(self.columns))
+            if self.daily:
+                first_day = next(reversed(self.daily)) - np.timedelta64(days - 1, 'D')
+                for day, block in self.daily.items():
+                    if day >= first_day:
+                        moments.merge(block)
+        return pd.DataFrame(moments.correlation(), index=self.columns, columns=self.columns)
@@ -0,0 +1,46 @@
+"""
+Health data helpers shared by the apps, batch workers and benchmarks
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns of the wearable/vitals CSV format the dashboard expects
+VITAL_COLUMNS = [
+    'heart_rate',
+    'systolic_bp',
+    'diastolic_bp',
+    'blood_glucose',
+    'temperature',
+    'weight',
+    'sleep_hours'
+]
+EXPECTED_COLUMNS = ['date'] + VITAL_COLUMNS
+
+
+def generate_sample_health_data(days: int = 90, freq: str = 'D',
+                                end_date: Optional[datetime] = None) -> pd.DataFrame:
+    """Generate realistic sample health data with gentle periodic trends"""
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=days)
+    dates = pd.date_range(start=start_date, end=end_date, freq=freq)
+
+    # Generate realistic health metrics with trends
+    base_hr = 72
+    base_systolic = 120
+    base_diastolic = 80
+    base_glucose = 95
+
+    return pd.DataFrame({
+        'date': dates,
+        'heart_rate': np.random.normal(base_hr, 6, len(dates)) + np.sin(np.arange(len(dates)) * 0.1) * 3,
+        'systolic_bp': np.random.normal(base_systolic, 8, len(dates)) + np.sin(np.arange(len(dates)) * 0.05) * 5,
+        'diastolic_bp': np.random.normal(base_diastolic, 6, len(dates)) + np.sin(np.arange(len(dates)) * 0.05) * 3,
+        'blood_glucose': np.random.normal(base_glucose, 12, len(dates)) + np.random.choice([-1, 1], len(dates)) * np.random.exponential(2, len(dates)),
+        'sleep_hours': np.random.normal(7.5, 1, len(dates)),
+        'steps': np.random.normal(8000, 2000, len(dates)),
+        'weight': np.random.normal(70, 0.5, len(dates))
+    })
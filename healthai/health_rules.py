@@ -0,0 +1,185 @@
+"""
+Declarative health rules for the static insights and the health score
+
+The status thresholds, score deductions and insight texts live in a
+versioned JSON rule table (health_rules.json, or HEALTHAI_RULES_PATH).
+It is loaded once per process and flattened into condition arrays, so
+scoring any number of patients is one comparison per (column, operator)
+pair plus a reduceat over the rules, with no Python loop per patient.
+
+Each rule belongs to a metric; a metric's status is that of its
+highest-level matching rule (or its normal status), and the rule's
+penalty is deducted from max_score.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+RULES_PATH = os.getenv("HEALTHAI_RULES_PATH",
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), "health_rules.json"))
+
+OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+
+class RuleTableError(ValueError):
+    """Raised when a rule table file is malformed"""
+
+
+class RuleEvaluation:
+    """Per-rule hits, per-metric statuses and deductions, and scores for each row of vitals"""
+
+    def __init__(self, table: "RuleTable", index: pd.Index, hits: np.ndarray,
+                 chosen: Dict[str, np.ndarray]):
+        self.table = table
+        self.index = index
+        self.hits = pd.DataFrame(hits, index=index, columns=table.rule_ids)
+        # Position in table.rule_ids of the rule that set each metric's status, -1 for normal
+        self.chosen = chosen
+
+        statuses = {}
+        deductions = {}
+        for metric, settings in table.metrics.items():
+            # Position -1 picks the appended normal entry
+            rule = chosen[metric]
+            statuses[settings['status_column']] = np.append(table.statuses, settings['normal_status'])[rule]
+            deductions[metric] = np.append(table.penalties, 0)[rule]
+        self.statuses = pd.DataFrame(statuses, index=index)
+        self.deductions = pd.DataFrame(deductions, index=index)
+        total = np.sum(list(deductions.values()), axis=0) if deductions else np.zeros(len(index), dtype=np.int64)
+        self.score = pd.Series(np.maximum(table.max_score - total, 0), index=index, name='health_score')
+
+    def frame(self) -> pd.DataFrame:
+        """Status columns plus health_score"""
+        return self.statuses.assign(health_score=self.score)
+
+    def hit_counts(self) -> pd.Series:
+        """Rows matching each rule"""
+        return self.hits.sum()
+
+    def insights(self, row: int = 0) -> List[str]:
+        """Insight texts for one row (by position), one per metric"""
+        texts = []
+        for metric, settings in self.table.metrics.items():
+            rule = self.chosen[metric][row]
+            texts.append(settings['normal_insight'] if rule < 0 else self.table.insights[rule])
+        return texts
+
+    def breakdown(self, row: int = 0) -> pd.DataFrame:
+        """Status and points deducted per metric for one row (by position)"""
+        return pd.DataFrame({
+            'status': self.statuses.iloc[row].to_numpy(),
+            'deduction': self.deductions.iloc[row].to_numpy(),
+        }, index=list(self.table.metrics))
+
+
+class RuleTable:
+    """Rules flattened into condition arrays, ordered by rule"""
+
+    def __init__(self, spec: Dict):
+        try:
+            self.version = str(spec['version'])
+            self.max_score = int(spec.get('max_score', 100))
+            self.metrics: Dict[str, Dict] = spec['metrics']
+            rules = spec['rules']
+        except (KeyError, TypeError) as e:
+            raise RuleTableError(f"Rule table is missing {e}")
+
+        self.rule_ids = [rule['id'] for rule in rules]
+        self.rule_metrics = np.array([rule['metric'] for rule in rules], dtype=object)
+        self.levels = np.array([rule.get('level', 1) for rule in rules], dtype=np.int64)
+        self.statuses = np.array([rule['status'] for rule in rules], dtype=object)
+        self.penalties = np.array([rule.get('penalty', 0) for rule in rules], dtype=np.int64)
+        self.insights = [rule.get('insight', "") for rule in rules]
+        self.match_all = np.array([rule.get('match', 'any') == 'all' for rule in rules])
+
+        unknown = set(self.rule_metrics) - set(self.metrics)
+        if unknown:
+            raise RuleTableError(f"Rules refer to undefined metrics: {', '.join(sorted(unknown))}")
+        empty = [rule['id'] for rule in rules if not rule.get('conditions')]
+        if empty:
+            raise RuleTableError(f"Rules without conditions: {', '.join(empty)}")
+
+        conditions = [(number, column, operator, float(value))
+                      for number, rule in enumerate(rules) for column, operator, value in rule['conditions']]
+        bad_operators = {operator for _, _, operator, _ in conditions} - set(OPERATORS)
+        if bad_operators:
+            raise RuleTableError(f"Unknown operators: {', '.join(sorted(bad_operators))}")
+
+        self.condition_rules = np.array([number for number, _, _, _ in conditions], dtype=np.intp)
+        self.condition_columns = np.array([column for _, column, _, _ in conditions], dtype=object)
+        self.condition_operators = np.array([operator for _, _, operator, _ in conditions], dtype=object)
+        self.thresholds = np.array([value for _, _, _, value in conditions], dtype=np.float64)
+        # Conditions are grouped by rule, so each rule's conditions start here
+        self.rule_starts = np.searchsorted(self.condition_rules, np.arange(len(rules)))
+        self.condition_counts = np.bincount(self.condition_rules, minlength=len(rules))
+
+    @property
+    def columns(self) -> List[str]:
+        """Vitals the rules read"""
+        return sorted(set(self.condition_columns))
+
+    def evaluate(self, means: pd.DataFrame) -> RuleEvaluation:
+        """Apply every rule to every row of average vitals"""
+        n_rows = len(means)
+        matched = np.zeros((n_rows, len(self.thresholds)), dtype=bool)
+        for column in set(self.condition_columns):
+            # Missing columns compare as NaN, which matches nothing
+            values = (means[column].to_numpy(dtype=np.float64) if column in means.columns
+                      else np.full(n_rows, np.nan))[:, None]
+            for operator in set(self.condition_operators[self.condition_columns == column]):
+                positions = np.flatnonzero((self.condition_columns == column) & (self.condition_operators == operator))
+                matched[:, positions] = OPERATORS[operator](values, self.thresholds[positions])
+
+        if len(self.rule_ids) and n_rows:
+            counts = np.add.reduceat(matched, self.rule_starts, axis=1, dtype=np.int64)
+        else:
+            counts = np.zeros((n_rows, len(self.rule_ids)), dtype=np.int64)
+        hits = np.where(self.match_all, counts == self.condition_counts, counts > 0)
+
+        chosen = {}
+        for metric in self.metrics:
+            rules = np.flatnonzero(self.rule_metrics == metric)
+            if not len(rules):
+                chosen[metric] = np.full(n_rows, -1)
+                continue
+            # Highest level wins; ties go to the rule listed first
+            levels = np.where(hits[:, rules], self.levels[rules], -1)
+            best = np.argmax(levels, axis=1)
+            chosen[metric] = np.where(levels.max(axis=1) >= 0, rules[best], -1)
+        return RuleEvaluation(self, means.index, hits, chosen)
+
+
+def load_rule_table(path: str = RULES_PATH) -> RuleTable:
+    with open(path, encoding="utf-8") as f:
+        try:
+            spec = json.load(f)
+        except json.JSONDecodeError as e:
+            raise RuleTableError(f"{path} is not valid JSON: {e}")
+    return RuleTable(spec)
+
+
+_rule_table: Optional[RuleTable] = None
+_rule_table_lock = threading.Lock()
+
+
+def get_rule_table() -> RuleTable:
+    """Return the process-wide rule table, loaded on first use"""
+    global _rule_table
+    with _rule_table_lock:
+        if _rule_table is None:
+            _rule_table = load_rule_table()
+        return _rule_table
+
+
+def evaluate_rules(means: pd.DataFrame) -> RuleEvaluation:
+    return get_rule_table().evaluate(means)
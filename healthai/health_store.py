@@ -0,0 +1,141 @@
+"""
+Columnar on-disk store for uploaded patient health data
+
+Uploads are written once as uncompressed Arrow IPC files and opened with
+memory mapping, so every session (and every worker process) viewing the same
+patient shares the OS page cache instead of holding its own DataFrame copy.
+Only a patient's latest upload is kept on disk.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from healthai.health_summary import dataset_hash
+
+DEFAULT_STORE_DIR = os.path.join(".cache", "health_store")
+
+# Opened datasets kept per process; the memory itself lives in the page cache
+OPEN_DATASETS_LIMIT = 16
+
+
+class HealthDataStore:
+    """Per-patient Arrow file of the latest dataset, plus a pointer to it"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("HEALTHAI_DATA_DIR", DEFAULT_STORE_DIR)
+        self._open: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def patient_dir(self, patient_id: str) -> str:
+        # Hash the identifier so patient names never appear in paths
+        key = hashlib.sha256(patient_id.strip().lower().encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, key)
+
+    def save(self, patient_id: str, health_data: pd.DataFrame, data_hash: Optional[str] = None) -> str:
+        """Write a dataset for a patient (once per distinct content), mark it latest and drop older ones"""
+        data_hash = data_hash or dataset_hash(health_data)
+        directory = self.patient_dir(patient_id)
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, f"{data_hash}.arrow")
+        if not os.path.exists(path):
+            table = _to_arrow(health_data)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+
+        _write_pointer(os.path.join(directory, "latest"), data_hash)
+        self._remove_older(directory, path)
+        return data_hash
+
+    def _remove_older(self, directory: str, latest_path: str):
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not name.endswith(".arrow") or path == latest_path:
+                continue
+            with self._lock:
+                self._open.pop(path, None)
+            try:
+                # Sessions that still have the file mapped keep their view of it
+                os.remove(path)
+            except OSError:
+                # Already removed by another process, or mapped on a platform that forbids it
+                pass
+
+    def latest_hash(self, patient_id: str) -> Optional[str]:
+        pointer = os.path.join(self.patient_dir(patient_id), "latest")
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer, encoding="utf-8") as f:
+            return f.read().strip() or None
+
+    def open(self, patient_id: str, data_hash: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Open a stored dataset memory-mapped; defaults to the patient's latest upload"""
+        data_hash = data_hash or self.latest_hash(patient_id)
+        if data_hash is None:
+            return None
+
+        path = os.path.join(self.patient_dir(patient_id), f"{data_hash}.arrow")
+        with self._lock:
+            health_data = self._open.get(path)
+            if health_data is not None:
+                self._open.move_to_end(path)
+                return health_data
+
+        if not os.path.exists(path):
+            return None
+
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        # split_blocks keeps one block per column so null-free numeric columns
+        # are wrapped zero-copy over the mapped file instead of consolidated
+        health_data = table.to_pandas(split_blocks=True)
+
+        with self._lock:
+            self._open[path] = health_data
+            while len(self._open) > OPEN_DATASETS_LIMIT:
+                self._open.popitem(last=False)
+        return health_data
+
+
+def _to_arrow(health_data: pd.DataFrame) -> pa.Table:
+    """Convert to Arrow keeping NaN as a float value rather than a null
+
+    Null-free columns are what lets to_pandas hand back views of the mapped file.
+    """
+    arrays = []
+    for column in health_data.columns:
+        values = health_data[column]
+        if pd.api.types.is_float_dtype(values):
+            arrays.append(pa.array(values.to_numpy(), from_pandas=False))
+        else:
+            arrays.append(pa.array(values, from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[str(column) for column in health_data.columns])
+
+
+def _write_pointer(path: str, data_hash: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data_hash)
+    os.replace(tmp_path, path)
+
+
+_store: Optional[HealthDataStore] = None
+_store_lock = threading.Lock()
+
+
+def get_health_store() -> HealthDataStore:
+    """Return the process-wide health data store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HealthDataStore()
+        return _store
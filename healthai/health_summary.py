@@ -0,0 +1,139 @@
+"""
+Memoized per-dataset health summaries
+
+Every consumer (prompt context, sidebar metrics, analytics dashboard) reads
+the same HealthSummary, computed once per dataset and keyed by a content
+hash so identical uploads in other sessions reuse it too. Summaries are
+backed by RollingStats, so a dataset that only gained rows is summarized
+from the new rows alone.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from healthai.health_data import VITAL_COLUMNS
+from healthai.rolling_stats import RECENT_WINDOW, RollingStats
+
+SUMMARY_CACHE_SIZE = 32
+
+
+def dataset_digest(health_data: pd.DataFrame) -> "hashlib._Hash":
+    """SHA-256 state over column names and per-row hashes; rows can be fed in later"""
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(map(str, health_data.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(health_data, index=True).values.tobytes())
+    return digest
+
+
+def dataset_hash(health_data: pd.DataFrame) -> str:
+    """Stable content hash of a DataFrame (values, index and column names)"""
+    return dataset_digest(health_data).hexdigest()
+
+
+class HealthSummary:
+    """Per-vital statistics for one dataset, read from an incremental RollingStats"""
+
+    def __init__(self, health_data: Optional[pd.DataFrame] = None, data_hash: Optional[str] = None,
+                 window: int = RECENT_WINDOW, stats: Optional[RollingStats] = None):
+        if stats is None:
+            columns = [column for column in VITAL_COLUMNS if column in health_data.columns]
+            stats = RollingStats.from_frame(health_data, columns, window)
+
+        self.stats = stats
+        self.data_hash = data_hash or dataset_hash(health_data)
+        self.count = stats.rows
+        self.window = stats.window
+        self.columns: List[str] = stats.columns
+
+        self.means = stats.means()
+        self.stds = stats.stds()
+        self.mins = stats.mins()
+        self.maxs = stats.maxs()
+        self.recent = stats.recent() or self._nan_by_column()
+        self.previous = stats.previous() or self._nan_by_column()
+
+    def _nan_by_column(self) -> Dict[str, float]:
+        return {column: float("nan") for column in self.columns}
+
+    def correlation(self, columns: List[str], days: Optional[int] = None) -> pd.DataFrame:
+        """Correlation matrix of the given vitals, over all data or the last `days` days"""
+        return self.stats.correlation.matrix(days).loc[columns, columns]
+
+    def trend(self, column: str) -> str:
+        """Arrow comparing the recent window with the window before it"""
+        return "↗️" if self.recent[column] > self.previous[column] else "↘️"
+
+    def __len__(self) -> int:
+        return self.count
+
+
+_summaries: "OrderedDict[str, HealthSummary]" = OrderedDict()
+_summaries_lock = threading.Lock()
+
+
+def _remember(summary: HealthSummary) -> HealthSummary:
+    with _summaries_lock:
+        _summaries[summary.data_hash] = summary
+        while len(_summaries) > SUMMARY_CACHE_SIZE:
+            _summaries.popitem(last=False)
+    return summary
+
+
+def summarize_health_data(health_data: Optional[pd.DataFrame], data_hash: Optional[str] = None,
+                          stats: Optional[RollingStats] = None) -> Optional[HealthSummary]:
+    """Return the summary for a dataset, computing it only the first time it is seen
+
+    Pass the stats gathered while ingesting the data to skip rescanning it.
+    """
+    if health_data is None or len(health_data) == 0:
+        return None
+
+    data_hash = data_hash or dataset_hash(health_data)
+
+    with _summaries_lock:
+        summary = _summaries.get(data_hash)
+        if summary is not None:
+            _summaries.move_to_end(data_hash)
+            return summary
+
+    return _remember(HealthSummary(health_data, data_hash, stats=stats))
+
+
+def extend_health_summary(previous: Optional[HealthSummary],
+                          health_data: Optional[pd.DataFrame]) -> Optional[HealthSummary]:
+    """Summary for a dataset that may be previous's data with rows appended
+
+    Appended data is recognised by hashing its leading rows, which costs no more
+    than hashing the whole frame would; the statistics then only see the new rows.
+    Anything else falls back to summarize_health_data.
+    """
+    if (previous is None or health_data is None or len(health_data) <= previous.count
+            or previous.columns != [column for column in VITAL_COLUMNS if column in health_data.columns]):
+        return summarize_health_data(health_data)
+
+    # Cheap rejection first: the rows previous ended with must still be there
+    tail = previous.stats.tail()
+    overlap = health_data[previous.columns].iloc[previous.count - len(tail):previous.count]
+    if not np.array_equal(overlap.to_numpy(dtype=np.float64, na_value=np.nan), tail, equal_nan=True):
+        return summarize_health_data(health_data)
+
+    digest = dataset_digest(health_data.iloc[:previous.count])
+    if digest.hexdigest() != previous.data_hash:
+        return summarize_health_data(health_data)
+
+    digest.update(pd.util.hash_pandas_object(health_data.iloc[previous.count:], index=True).values.tobytes())
+    data_hash = digest.hexdigest()
+    with _summaries_lock:
+        summary = _summaries.get(data_hash)
+        if summary is not None:
+            _summaries.move_to_end(data_hash)
+            return summary
+
+    stats = previous.stats.copy()
+    stats.update(health_data.iloc[previous.count:])
+    return _remember(HealthSummary(data_hash=data_hash, stats=stats))
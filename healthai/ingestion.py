@@ -0,0 +1,90 @@
+"""
+Chunked ingestion of wearable/vitals CSV exports
+
+Large exports are read in chunks with compact dtypes (float32 vitals,
+datetime64 dates) so peak memory stays close to the size of the final
+DataFrame, and running statistics are available after every chunk.
+"""
+
+import os
+from typing import IO, Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from healthai.health_data import EXPECTED_COLUMNS, VITAL_COLUMNS
+from healthai.rolling_stats import RollingStats
+
+# Columns the dashboard cannot work without; the rest of VITAL_COLUMNS are optional
+REQUIRED_COLUMNS = ['date', 'heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose']
+
+VITAL_DTYPES = {column: np.float32 for column in VITAL_COLUMNS}
+
+DEFAULT_CHUNKSIZE = int(os.getenv("HEALTHAI_CSV_CHUNKSIZE", "100000"))
+
+CsvSource = Union[str, IO]
+
+
+class SchemaError(ValueError):
+    """Raised when a CSV is missing columns the dashboard needs"""
+
+
+def validate_columns(columns: List[str]):
+    """Check a CSV header against the expected health data schema"""
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise SchemaError(
+            f"Missing required columns: {', '.join(missing)}. "
+            f"Expected columns: {', '.join(EXPECTED_COLUMNS)}"
+        )
+
+
+def read_health_csv(source: CsvSource, chunksize: int = DEFAULT_CHUNKSIZE,
+                    on_chunk: Optional[Callable[[RollingStats], None]] = None,
+                    id_column: Optional[str] = None) -> pd.DataFrame:
+    """Read a health data CSV in chunks with compact dtypes
+
+    Only the expected columns are kept. on_chunk is called with the running
+    statistics after each chunk so callers can show early summaries; after the
+    last chunk they cover the whole file and can seed its HealthSummary.
+    id_column, when present in the file, is kept (as a categorical) so
+    long-format exports covering many patients can be read too.
+    """
+    header = pd.read_csv(source, nrows=0).columns.tolist()
+    validate_columns(header)
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    columns = [column for column in EXPECTED_COLUMNS if column in header]
+    vitals = [column for column in columns if column != 'date']
+    stats = RollingStats(vitals)
+
+    dtypes = {column: VITAL_DTYPES[column] for column in vitals}
+    if id_column is not None and id_column in header:
+        columns = [id_column] + columns
+        dtypes[id_column] = str
+
+    chunks = []
+    reader = pd.read_csv(
+        source,
+        usecols=columns,
+        dtype=dtypes,
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        chunk['date'] = pd.to_datetime(chunk['date'], errors='coerce')
+        stats.update(chunk)
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(stats)
+
+    if not chunks:
+        empty_dtypes = {**dict.fromkeys(columns, 'datetime64[ns]'), **VITAL_DTYPES}
+        if id_column in columns:
+            empty_dtypes[id_column] = 'category'
+        return pd.DataFrame({column: pd.Series(dtype=empty_dtypes[column]) for column in columns})
+
+    health_data = pd.concat(chunks, ignore_index=True, copy=False)[columns]
+    if id_column in health_data.columns:
+        health_data[id_column] = health_data[id_column].astype('category')
+    return health_data
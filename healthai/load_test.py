@@ -0,0 +1,266 @@
+"""
+Load generator for the assistant's generation paths
+
+Requests are issued open-loop at a fixed rate: each one has a scheduled
+start time and its latency is measured from then, so time spent waiting
+for a free worker counts against the server rather than being hidden.
+Prompts are built with the same templates the app uses, the response
+cache is off, and the client's own retries stay on, so the numbers are
+what a patient would see.
+
+    python -m healthai.load_test --mock --qps 20 --duration 30 --latency 0.3 --error-rate 0.01
+    python -m healthai.load_test --qps 2 --duration 60 --mix chat=1 --json results.json
+
+With --mock a local healthai.mock_watsonx server is started in-process
+(its latency and failure options are accepted here); otherwise the
+watsonx credentials in .env are used.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from healthai.batch_inference import load_credentials
+from healthai.mock_watsonx import add_settings_arguments, create_server, settings_from_args
+from healthai.prompts import build_chat_prompt, build_prediction_prompt, build_treatment_prompt
+from healthai.watson_client import WatsonXClient
+
+PATHS = ("chat", "stream", "prediction", "treatment", "token")
+
+DEFAULT_MIX = "chat=4,stream=4,prediction=1,treatment=1"
+
+PERCENTILES = (50, 95, 99)
+
+SAMPLE_PATIENT = {
+    'name': 'Load Test',
+    'age': 52,
+    'gender': 'Female',
+    'medical_history': 'Hypertension, seasonal allergies',
+    'current_medications': 'Lisinopril 10mg',
+    'allergies': 'Penicillin'
+}
+
+SAMPLE_HEALTH_CONTEXT = ("Recent Health Metrics (last 7 days average):\n"
+                         "- Heart Rate: 78.0 bpm\n- Blood Pressure: 134/86 mmHg\n- Blood Glucose: 104.0 mg/dL")
+
+
+class Sample:
+    """Outcome of one request"""
+
+    __slots__ = ("path", "latency", "first_token", "error")
+
+    def __init__(self, path: str, latency: float, first_token: Optional[float] = None,
+                 error: Optional[str] = None):
+        self.path = path
+        self.latency = latency
+        self.first_token = first_token
+        self.error = error
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse "chat=4,stream=1" into normalized weights"""
+    weights: Dict[str, float] = {}
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in PATHS:
+            raise ValueError(f"Unknown path {name!r}; expected one of {', '.join(PATHS)}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("The mix needs at least one positive weight")
+    return {name: weight / total for name, weight in weights.items() if weight > 0}
+
+
+def request_prompt(path: str, number: int) -> str:
+    """Prompt for one request; the number keeps prompts distinct"""
+    if path == "prediction":
+        return build_prediction_prompt(f"Headache and dizziness for {number % 14 + 1} days",
+                                       SAMPLE_PATIENT, SAMPLE_HEALTH_CONTEXT)
+    if path == "treatment":
+        return build_treatment_prompt("Hypertension", SAMPLE_PATIENT,
+                                      f"{SAMPLE_HEALTH_CONTEXT}\n- Request: {number}")
+    return build_chat_prompt(f"Is my blood pressure reading number {number} something to worry about?",
+                             SAMPLE_PATIENT, SAMPLE_HEALTH_CONTEXT)
+
+
+def run_request(client: WatsonXClient, path: str, number: int, scheduled: float) -> Sample:
+    """Run one request and time it from its scheduled start"""
+    first_token = None
+    try:
+        if path == "token":
+            client.token_manager.get_token()
+        elif path == "stream":
+            received = False
+            for chunk in client.generate_stream(request_prompt(path, number)):
+                if not received and chunk:
+                    first_token = time.perf_counter() - scheduled
+                    received = True
+            if not received:
+                raise RuntimeError("Empty stream")
+        elif client.generate(request_prompt(path, number)) is None:
+            raise RuntimeError("No response generated from the model.")
+    except Exception as e:
+        return Sample(path, time.perf_counter() - scheduled, first_token, type(e).__name__)
+    return Sample(path, time.perf_counter() - scheduled, first_token)
+
+
+def run_load(call: Callable[[str, int, float], Sample], mix: Dict[str, float], qps: float,
+             duration: float, workers: int, seed: int = 0) -> Tuple[List[Sample], float]:
+    """Issue qps * duration requests on schedule; returns the samples and wall time"""
+    total = int(qps * duration)
+    paths = np.random.default_rng(seed).choice(list(mix), size=total, p=list(mix.values()))
+    samples: List[Sample] = []
+    lock = threading.Lock()
+
+    def worker(path: str, number: int, scheduled: float):
+        sample = call(path, number, scheduled)
+        with lock:
+            samples.append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for number, path in enumerate(paths):
+            scheduled = started + number / qps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(worker, str(path), number, scheduled)
+    return samples, time.perf_counter() - started
+
+
+def _latency_stats(values: List[float], prefix: str = "") -> Dict[str, float]:
+    if not values:
+        return {}
+    ms = np.asarray(values) * 1000
+    stats = {f"{prefix}p{p}_ms": round(float(np.percentile(ms, p)), 1) for p in PERCENTILES}
+    stats[f"{prefix}max_ms"] = round(float(ms.max()), 1)
+    return stats
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """Per-path and overall counts, throughput and latency percentiles"""
+    groups = {"all": samples}
+    for sample in samples:
+        groups.setdefault(sample.path, []).append(sample)
+
+    report = {}
+    for name, group in groups.items():
+        ok = [sample for sample in group if sample.error is None]
+        stats: Dict[str, Any] = {
+            "requests": len(group),
+            "ok": len(ok),
+            "errors": len(group) - len(ok),
+            "error_rate": round((len(group) - len(ok)) / len(group), 4) if group else 0.0,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        }
+        stats.update(_latency_stats([sample.latency for sample in ok]))
+        stats.update(_latency_stats([sample.first_token for sample in ok if sample.first_token is not None],
+                                    prefix="ttft_"))
+        error_types = Counter(sample.error for sample in group if sample.error)
+        if error_types:
+            stats["error_types"] = dict(error_types)
+        report[name] = stats
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, Any]]) -> str:
+    header = f"{'path':<11}{'requests':>9}{'errors':>8}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ttft p95':>10}"
+    lines = [header, "-" * len(header)]
+    for name, stats in report.items():
+        lines.append(
+            f"{name:<11}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>8.1f}"
+            f"{stats.get('p50_ms', float('nan')):>9.1f}{stats.get('p95_ms', float('nan')):>9.1f}"
+            f"{stats.get('p99_ms', float('nan')):>9.1f}{stats.get('ttft_p95_ms', float('nan')):>10.1f}"
+        )
+        if stats.get("error_types"):
+            lines.append(f"{'':<11}errors: {', '.join(f'{k} x{v}' for k, v in stats['error_types'].items())}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Drive HealthAI generation paths at a target request rate")
+    parser.add_argument("--qps", type=float, default=5.0, help="Requests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep starting requests")
+    parser.add_argument("--workers", type=int, default=64,
+                        help="Maximum requests in flight (also the connection pool size)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Weighted request mix over {', '.join(PATHS)}")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this JSON file")
+    parser.add_argument("--max-error-rate", type=float, default=None,
+                        help="Exit with status 2 if the overall error rate is higher")
+    parser.add_argument("--max-p95-ms", type=float, default=None,
+                        help="Exit with status 2 if the overall p95 latency is higher")
+    mock = parser.add_argument_group("mock server", "Used with --mock")
+    mock.add_argument("--mock", action="store_true", help="Run against an in-process mock watsonx server")
+    add_settings_arguments(mock)
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None
+    overrides: Dict[str, Any] = {"pool_maxsize": max(args.workers, 1), "cache": None}
+    if args.mock:
+        server = create_server("127.0.0.1", 0, settings_from_args(args))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        credentials = {'api_key': 'load-test', 'project_id': 'load-test', 'url': base_url}
+        overrides["token_url"] = f"{base_url}/identity/token"
+    else:
+        credentials = load_credentials()
+        if credentials is None:
+            print("❌ IBM Watson credentials not found in .env file! Use --mock to test locally.", file=sys.stderr)
+            return 1
+
+    client = WatsonXClient.from_credentials(credentials, **overrides)
+    print(f"Sending {int(args.qps * args.duration)} requests at {args.qps:g} qps to {credentials['url']}",
+          file=sys.stderr)
+
+    try:
+        samples, elapsed = run_load(lambda path, number, scheduled: run_request(client, path, number, scheduled),
+                                    mix, args.qps, args.duration, args.workers)
+        report: Dict[str, Any] = summarize(samples, elapsed)
+        print(format_report(report))
+        print(f"\nWall time {elapsed:.1f}s", file=sys.stderr)
+
+        result: Dict[str, Any] = {
+            "target_qps": args.qps,
+            "duration": args.duration,
+            "workers": args.workers,
+            "mix": mix,
+            "elapsed": round(elapsed, 3),
+            "paths": report,
+        }
+        if server is not None:
+            result["mock_requests"] = requests.get(f"{credentials['url']}/mock/stats", timeout=5).json()
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    overall = report["all"]
+    if args.max_error_rate is not None and overall["error_rate"] > args.max_error_rate:
+        print(f"❌ Error rate {overall['error_rate']:.2%} is above {args.max_error_rate:.2%}", file=sys.stderr)
+        return 2
+    if args.max_p95_ms is not None and overall.get("p95_ms", float("inf")) > args.max_p95_ms:
+        print(f"❌ p95 latency {overall.get('p95_ms')} ms is above {args.max_p95_ms:g} ms", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
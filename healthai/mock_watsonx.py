@@ -0,0 +1,306 @@
+"""
+Local stand-in for the IBM IAM token and watsonx text generation endpoints
+
+Run it and point the app at it:
+
+    python -m healthai.mock_watsonx --port 8080
+    WATSONX_URL=http://127.0.0.1:8080 WATSONX_IAM_URL=http://127.0.0.1:8080/identity/token streamlit run app.py
+
+Latency, failures and streaming behaviour are configurable so the client's
+retries, token refresh and streaming can be exercised under load (see
+healthai.load_test):
+
+    python -m healthai.mock_watsonx --latency 0.4 --latency-sigma 0.5 --error-rate 0.02 --rate-limit-rate 0.05
+
+GET /mock/stats returns request counts by endpoint and status.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def mock_generated_text(prompt: str) -> str:
+    """Deterministic reply used by the fake generation endpoints"""
+    question = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+    return (
+        "This is a mock HealthAI response generated locally for testing. "
+        f"The prompt had {len(prompt.split())} words and ended with: {question[:80]}"
+    )
+
+
+def split_tokens(text: str) -> List[str]:
+    """Split text into word-sized pieces that join back to the original"""
+    words = text.split(" ")
+    return [word if i == len(words) - 1 else word + " " for i, word in enumerate(words)]
+
+
+class MockSettings:
+    """Simulated model latency, failure rates and streaming behaviour
+
+    Latency before the first token is lognormal around `latency` seconds
+    (sigma 0 makes it fixed); every generated token then takes token_delay,
+    for the plain endpoint as well as the streaming one. scripted_statuses
+    answers the next generation requests with those statuses (e.g. [401] or
+    [429]) before the random behaviour applies, and split_events writes every
+    streamed event in two halves so clients see it across reads.
+    """
+
+    def __init__(self, latency: float = 0.0, latency_sigma: float = 0.0, token_delay: float = 0.02,
+                 error_rate: float = 0.0, error_status: int = 503, rate_limit_rate: float = 0.0,
+                 retry_after: int = 1, stream_abort_rate: float = 0.0, tokens_per_event: int = 1,
+                 token_ttl: int = 3600, scripted_statuses: Optional[List[int]] = None,
+                 split_events: bool = False, seed: Optional[int] = None):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.stream_abort_rate = stream_abort_rate
+        self.tokens_per_event = max(1, tokens_per_event)
+        self.token_ttl = token_ttl
+        self.scripted_statuses = deque(scripted_statuses or [])
+        self.split_events = split_events
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: "Counter[Tuple[str, int]]" = Counter()
+
+    def draw(self) -> Tuple[float, float]:
+        """(uniform draw for failure injection, first-token latency) for one request"""
+        with self._lock:
+            roll = self._random.random()
+            if self.latency_sigma > 0 and self.latency > 0:
+                latency = self._random.lognormvariate(0.0, self.latency_sigma) * self.latency
+            else:
+                latency = self.latency
+        return roll, latency
+
+    def next_scripted_status(self) -> Optional[int]:
+        with self._lock:
+            return self.scripted_statuses.popleft() if self.scripted_statuses else None
+
+    def should_abort_stream(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.stream_abort_rate
+
+    def record(self, endpoint: str, status: int):
+        with self._lock:
+            self.requests[(endpoint, status)] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            stats: Dict[str, Dict[str, int]] = {}
+            for (endpoint, status), count in sorted(self.requests.items()):
+                stats.setdefault(endpoint, {})[str(status)] = count
+            return stats
+
+
+class MockWatsonHandler(BaseHTTPRequestHandler):
+    """Serves /identity/token, /ml/v1/text/generation and /ml/v1/text/generation_stream"""
+
+    protocol_version = "HTTP/1.1"
+    settings = MockSettings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/mock/stats"):
+            self._send_json(200, self.settings.stats())
+        else:
+            self._send_json(404, {"errors": [{"message": f"Unknown path {self.path}"}]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length)
+        settings = self.settings
+
+        if self.path.startswith("/identity/token"):
+            settings.record("token", 200)
+            self._send_json(200, {
+                "access_token": "mock-access-token",
+                "token_type": "Bearer",
+                "expires_in": settings.token_ttl,
+                "expiration": int(time.time()) + settings.token_ttl
+            })
+            return
+
+        streaming = self.path.startswith("/ml/v1/text/generation_stream")
+        endpoint = "generation_stream" if streaming else "generation"
+        if not self.path.startswith("/ml/v1/text/generation"):
+            self._send_json(404, {"errors": [{"message": f"Unknown path {self.path}"}]})
+            return
+
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            settings.record(endpoint, 401)
+            self._send_json(401, {"errors": [{"message": "Missing bearer token"}]})
+            return
+
+        scripted = settings.next_scripted_status()
+        if scripted is not None:
+            settings.record(endpoint, scripted)
+            if scripted == 401:
+                self._send_json(401, {"errors": [{"message": "Token expired"}]})
+            elif scripted == 429:
+                self._send_rate_limited()
+            else:
+                self._send_json(scripted, {"errors": [{"message": "Scripted error"}]})
+            return
+
+        roll, latency = settings.draw()
+        if roll < settings.rate_limit_rate:
+            settings.record(endpoint, 429)
+            self._send_rate_limited()
+            return
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            time.sleep(latency)
+            settings.record(endpoint, settings.error_status)
+            self._send_json(settings.error_status, {"errors": [{"message": "Simulated server error"}]})
+            return
+
+        body = json.loads(raw_body or b"{}")
+        text = mock_generated_text(body.get("input", ""))
+        time.sleep(latency)
+
+        if streaming:
+            self._send_stream(body, text)
+        else:
+            time.sleep(settings.token_delay * len(split_tokens(text)))
+            settings.record(endpoint, 200)
+            self._send_json(200, {
+                "model_id": body.get("model_id"),
+                "results": [{
+                    "generated_text": text,
+                    "generated_token_count": len(text.split()),
+                    "stop_reason": "eos_token"
+                }]
+            })
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_rate_limited(self):
+        self._send_json(429, {"errors": [{"message": "Rate limit exceeded"}]},
+                        {"Retry-After": str(self.settings.retry_after)})
+
+    def _send_stream(self, body: Dict[str, Any], text: str):
+        settings = self.settings
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        tokens = split_tokens(text)
+        per_event = settings.tokens_per_event
+        events = ["".join(tokens[start:start + per_event]) for start in range(0, len(tokens), per_event)]
+        # An aborted stream drops the connection halfway through, as a proxy timeout would
+        stop = len(events) // 2 if settings.should_abort_stream() else len(events)
+        settings.record("generation_stream", 200 if stop == len(events) else 499)
+
+        for i, chunk in enumerate(events[:stop], start=1):
+            event = {
+                "model_id": body.get("model_id"),
+                "results": [{
+                    "generated_text": chunk,
+                    "generated_token_count": min(i * per_event, len(tokens)),
+                    "stop_reason": "eos_token" if i == len(events) else "not_finished"
+                }]
+            }
+            data = f"id: {i}\nevent: message\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+            if settings.split_events:
+                # Cut mid-payload so the event only parses once both reads are joined
+                self.wfile.write(data[:len(data) // 2])
+                self.wfile.flush()
+                time.sleep(0.005)
+                data = data[len(data) // 2:]
+            self.wfile.write(data)
+            self.wfile.flush()
+            time.sleep(settings.token_delay * per_event)
+
+        self.close_connection = True
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8080,
+                  settings: Optional[MockSettings] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) a mock watsonx server"""
+    handler = type("ConfiguredMockWatsonHandler", (MockWatsonHandler,), {"settings": settings or MockSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser):
+    """Add the MockSettings options to a command line parser"""
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Median seconds before the first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.0,
+                        help="Lognormal spread of the latency (0 for a fixed latency)")
+    parser.add_argument("--token-delay", type=float, default=0.02,
+                        help="Seconds per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of generation requests that fail with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of generation requests rejected with 429")
+    parser.add_argument("--retry-after", type=int, default=1,
+                        help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--stream-abort-rate", type=float, default=0.0,
+                        help="Fraction of streams cut off halfway")
+    parser.add_argument("--tokens-per-event", type=int, default=1,
+                        help="Tokens in each streamed event")
+    parser.add_argument("--token-ttl", type=int, default=3600,
+                        help="Lifetime in seconds of issued IAM tokens")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed for reproducible latency and failures")
+
+
+def settings_from_args(args: argparse.Namespace) -> MockSettings:
+    return MockSettings(
+        latency=args.latency,
+        latency_sigma=args.latency_sigma,
+        token_delay=args.token_delay,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        stream_abort_rate=args.stream_abort_rate,
+        tokens_per_event=args.tokens_per_event,
+        token_ttl=args.token_ttl,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock of the watsonx APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, settings_from_args(args))
+    print(f"Mock watsonx listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+PDF text extraction for uploaded medical reports
+
+Pages are extracted in parallel in a process pool (PyPDF2 is pure Python,
+so threads would serialize on the GIL), the page texts are joined once,
+and the result is cached by the file's content hash so re-uploads and
+other sessions never parse the same PDF twice.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import PyPDF2
+
+# Below this many pages, starting work in the pool costs more than it saves
+PARALLEL_MIN_PAGES = int(os.getenv("HEALTHAI_PDF_PARALLEL_MIN_PAGES", "16"))
+
+PDF_WORKERS = int(os.getenv("HEALTHAI_PDF_WORKERS", "0")) or os.cpu_count() or 1
+
+TEXT_CACHE_SIZE = 32
+
+
+def pdf_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def count_pages(data: bytes) -> int:
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+def extract_page_range(data: bytes, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); runs in a worker process"""
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+
+def page_ranges(n_pages: int, n_parts: int) -> List[range]:
+    """Split pages into n_parts contiguous, nearly equal ranges"""
+    bounds = [round(n_pages * part / n_parts) for part in range(n_parts + 1)]
+    return [range(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the process-wide extraction pool, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit server is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def extract_pdf_pages(data: bytes, workers: int = PDF_WORKERS) -> List[str]:
+    """Extract the text of every page, in parallel for long documents"""
+    n_pages = count_pages(data)
+    if n_pages < PARALLEL_MIN_PAGES or workers <= 1:
+        pages = extract_page_range(data, 0, n_pages)
+    else:
+        # Two ranges per worker evens out slow (image-heavy) pages while keeping
+        # the number of copies of the file sent to workers small
+        ranges = page_ranges(n_pages, workers * 2)
+        pool = get_pdf_pool()
+        futures = [pool.submit(extract_page_range, data, pages.start, pages.stop) for pages in ranges]
+        pages = [text for future in futures for text in future.result()]
+    return pages
+
+
+def extract_pdf_text(data: bytes, workers: int = PDF_WORKERS) -> str:
+    return "".join(extract_pdf_pages(data, workers))
+
+
+class PdfTextCache:
+    """Extracted page texts per PDF content hash, shared by every session in the process"""
+
+    def __init__(self, max_entries: int = TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._pages: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            pages = self._pages.get(key)
+            if pages is not None:
+                self._pages.move_to_end(key)
+            return pages
+
+    def set(self, key: str, pages: List[str]):
+        with self._lock:
+            self._pages[key] = pages
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+
+_text_cache = PdfTextCache()
+
+
+def read_pdf_pages(data: bytes) -> List[str]:
+    """Page texts of a PDF, extracted once per distinct file"""
+    key = pdf_hash(data)
+    pages = _text_cache.get(key)
+    if pages is None:
+        pages = extract_pdf_pages(data)
+        _text_cache.set(key, pages)
+    return list(pages)
+
+
+def read_pdf_text(data: bytes) -> str:
+    """Text of a PDF, extracted once per distinct file"""
+    return "".join(read_pdf_pages(data))
@@ -0,0 +1,196 @@
+"""
+Token-budgeted prompt assembly
+
+A prompt is a list of sections in template order. Fixed sections (the
+instructions) are always kept whole; the others carry a priority and are
+compacted, then truncated, lowest priority first, until the prompt fits
+the token budget. Tokens are counted locally: with a Hugging Face
+tokenizer.json when HEALTHAI_TOKENIZER_PATH points at one and the
+optional `tokenizers` package is installed, otherwise with a word-piece
+approximation of the model's BPE tokenizer.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Prompt tokens allowed per request; the model's window is 8192 and the
+# answer needs room too
+PROMPT_TOKEN_BUDGET = int(os.getenv("HEALTHAI_PROMPT_TOKENS", "4096"))
+
+TRUNCATION_MARKER = " […] "
+
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+class ApproximateTokenizer:
+    """Word-piece estimate of a BPE tokenizer (about 1.3 tokens per English word)"""
+
+    # Letters a single token covers on average in long words
+    LETTERS_PER_TOKEN = 6
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of each token"""
+        spans = []
+        for match in _PIECES.finditer(text):
+            start, end = match.span()
+            for piece_start in range(start, end, self.LETTERS_PER_TOKEN):
+                spans.append((piece_start, min(piece_start + self.LETTERS_PER_TOKEN, end)))
+        return spans
+
+    def count(self, text: str) -> int:
+        return len(self.spans(text))
+
+
+class HuggingFaceTokenizer:
+    """Exact counts from a local tokenizer.json (e.g. the Granite model's)"""
+
+    def __init__(self, path: str):
+        from tokenizers import Tokenizer
+        self._tokenizer = Tokenizer.from_file(path)
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        return list(self._tokenizer.encode(text, add_special_tokens=False).offsets)
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """Return the process-wide tokenizer, preferring an exact local one when configured"""
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            path = os.getenv("HEALTHAI_TOKENIZER_PATH")
+            try:
+                _tokenizer = HuggingFaceTokenizer(path) if path else ApproximateTokenizer()
+            except Exception:
+                # tokenizers not installed, or the file is missing/invalid
+                _tokenizer = ApproximateTokenizer()
+        return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    return get_tokenizer().count(text)
+
+
+def compact_text(text: str) -> str:
+    """Collapse runs of whitespace and drop repeated lines (pasted records repeat headers)"""
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        key = line.lower()
+        if not line or key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the beginning and end of text within max_tokens, marking the cut"""
+    spans = get_tokenizer().spans(text)
+    if len(spans) <= max_tokens:
+        return text
+    keep = max_tokens - count_tokens(TRUNCATION_MARKER)
+    if keep <= 0:
+        return ""
+    # Most of the budget goes to the start; the end usually holds the latest entries
+    head = (keep * 2 + 2) // 3
+    tail = keep - head
+    head_end = spans[head - 1][1] if head else 0
+    tail_start = spans[len(spans) - tail][0] if tail else len(text)
+    return text[:head_end].rstrip() + TRUNCATION_MARKER + text[tail_start:].lstrip()
+
+
+class Section:
+    """One part of a prompt
+
+    Only `text` can shrink; prefix and suffix (labels, separators) are kept
+    as long as the section is. priority None marks instructions that are
+    never shortened. A section is not truncated below min_tokens.
+    """
+
+    def __init__(self, name: str, text: str, priority: Optional[int] = None, min_tokens: int = 0,
+                 prefix: str = "", suffix: str = ""):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.min_tokens = min_tokens
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def render(self) -> str:
+        return f"{self.prefix}{self.text}{self.suffix}"
+
+
+class BuiltPrompt:
+    """Final prompt text with its size and what was shortened to fit"""
+
+    def __init__(self, text: str, tokens: int, budget: int, original_tokens: int,
+                 shortened: Dict[str, Tuple[int, int]]):
+        self.text = text
+        self.tokens = tokens
+        self.budget = budget
+        self.original_tokens = original_tokens
+        self.shortened = shortened
+
+    def describe(self) -> str:
+        """One-line size report"""
+        report = f"{self.tokens:,} prompt tokens (budget {self.budget:,})"
+        if self.shortened:
+            parts = ", ".join(f"{name.replace('_', ' ')} {before:,}→{after:,}"
+                              for name, (before, after) in self.shortened.items())
+            report += f"; shortened: {parts}"
+        return report
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def build_prompt(sections: List[Section], budget: Optional[int] = None) -> BuiltPrompt:
+    """Join sections, compacting then truncating low-priority ones until the budget is met"""
+    budget = budget or PROMPT_TOKEN_BUDGET
+    sizes = [count_tokens(section.render()) for section in sections]
+    original_tokens = total = sum(sizes)
+    original = {section.name: count_tokens(section.text) for section in sections if section.priority is not None}
+
+    shrinkable = sorted((index for index, section in enumerate(sections) if section.priority is not None),
+                        key=lambda index: sections[index].priority)
+
+    def resize(index: int, text: str):
+        nonlocal total
+        sections[index].text = text
+        new_size = count_tokens(sections[index].render())
+        total += new_size - sizes[index]
+        sizes[index] = new_size
+
+    # Compaction only drops layout and repeated lines, so every section gets it before any truncation
+    for index in shrinkable:
+        if total <= budget:
+            break
+        resize(index, compact_text(sections[index].text))
+
+    for index in shrinkable:
+        if total <= budget:
+            break
+        section = sections[index]
+        overflow = total - budget
+        allowed = max(section.min_tokens, count_tokens(section.text) - overflow)
+        resize(index, truncate_to_tokens(section.text, allowed))
+
+    text = "".join(section.render() for section in sections)
+    shortened = {}
+    for section in sections:
+        if section.priority is None:
+            continue
+        after = count_tokens(section.text)
+        if after < original[section.name]:
+            shortened[section.name] = (original[section.name], after)
+    return BuiltPrompt(text, count_tokens(text), budget, original_tokens, shortened)
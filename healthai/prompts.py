@@ -0,0 +1,303 @@
+"""
+Prompt templates for the HealthAI generation tasks
+
+These take plain dicts, strings and DataFrames so they can be used outside Streamlit,
+e.g. by the batch inference CLI.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from healthai.prompt_budget import BuiltPrompt, Section, build_prompt, truncate_to_tokens
+
+if TYPE_CHECKING:
+    from healthai.health_summary import HealthSummary
+
+# app1.py stores current medications under a shorter key
+_PROFILE_ALIASES = {'medications': 'current_medications'}
+
+
+def normalize_patient_profile(patient_data: Dict) -> Dict:
+    """Return a profile using the field names the prompts expect"""
+    profile = dict(patient_data)
+    for alias, field in _PROFILE_ALIASES.items():
+        if alias in profile and field not in profile:
+            profile[field] = profile.pop(alias)
+    return profile
+
+
+def chat_health_context(recent: Optional[Dict[str, float]]) -> str:
+    """Recent-vitals block for the patient chat prompt"""
+    if not recent:
+        return ""
+    return f"""
+Recent Health Data (Last 7 days):
+- Average Heart Rate: {recent['heart_rate']:.1f} bpm
+- Average Blood Pressure: {recent['systolic_bp']:.1f}/{recent['diastolic_bp']:.1f} mmHg
+- Average Blood Glucose: {recent['blood_glucose']:.1f} mg/dL
+"""
+
+
+def prediction_health_context(recent: Optional[Dict[str, float]]) -> str:
+    """Recent-vitals block for the disease prediction prompt"""
+    if not recent:
+        return ""
+    temperature = f"- Temperature: {recent['temperature']:.1f}°F\n" if 'temperature' in recent else ""
+    return f"""
+Recent Health Metrics:
+- Heart Rate: {recent['heart_rate']:.1f} bpm
+- Blood Pressure: {recent['systolic_bp']:.1f}/{recent['diastolic_bp']:.1f} mmHg
+- Blood Glucose: {recent['blood_glucose']:.1f} mg/dL
+{temperature}"""
+
+
+def treatment_health_context(recent: Optional[Dict[str, float]]) -> str:
+    """Recent-vitals block for the treatment plan prompt"""
+    if not recent:
+        return ""
+    return f"""
+Current Health Status:
+- Heart Rate: {recent['heart_rate']:.1f} bpm
+- Blood Pressure: {recent['systolic_bp']:.1f}/{recent['diastolic_bp']:.1f} mmHg
+- Blood Glucose: {recent['blood_glucose']:.1f} mg/dL
+"""
+
+
+def _profile_sections(patient_data: Dict, intro: str, heading: str, include_name: bool = True) -> List[Section]:
+    """Instructions and patient profile; free-text history and medications may be shortened"""
+    name = f"- Name: {patient_data.get('name', 'Patient')}\n" if include_name else ""
+    return [
+        Section('instructions', f"""{intro}
+
+{heading}:
+{name}- Age: {patient_data.get('age', 'Not specified')}
+- Gender: {patient_data.get('gender', 'Not specified')}
+"""),
+        Section('medical_history', str(patient_data.get('medical_history', 'None reported')),
+                priority=30, min_tokens=64, prefix="- Medical History: ", suffix="\n"),
+        Section('current_medications', str(patient_data.get('current_medications', 'None reported')),
+                priority=50, min_tokens=64, prefix="- Current Medications: ", suffix="\n"),
+        # Allergies are safety-critical and short; they go last
+        Section('allergies', str(patient_data.get('allergies', 'None reported')),
+                priority=90, min_tokens=128, prefix="- Allergies: ", suffix="\n\n"),
+    ]
+
+
+def compose_chat_prompt(query: str, patient_data: Dict, health_context: str = "",
+                        conversation: str = "", budget: Optional[int] = None) -> BuiltPrompt:
+    """Patient support chat prompt fitted to the token budget"""
+    sections = _profile_sections(
+        patient_data,
+        "You are a knowledgeable healthcare AI assistant. Respond as a doctor would, providing clear, empathetic, and medically accurate information.",
+        "Patient Information"
+    )
+    sections += [
+        Section('health_context', health_context, priority=60, suffix="\n\n"),
+    ]
+    if conversation:
+        # Older context than the vitals, so it is the first thing to shrink
+        sections.append(Section('conversation', conversation, priority=20, min_tokens=128,
+                                prefix="Conversation So Far:\n", suffix="\n\n"))
+    sections += [
+        Section('query', query, priority=80, min_tokens=256, prefix="Patient Question: ", suffix="\n\n"),
+        Section('response_format', """Please provide a comprehensive response that:
+1. Directly addresses the patient's question
+2. Includes relevant medical information
+3. Considers the patient's profile and recent health data
+4. Suggests when to seek professional medical care
+5. Uses clear, understandable language
+6. Acknowledges the limitations of AI medical advice
+
+Response:"""),
+    ]
+    return build_prompt(sections, budget)
+
+
+def build_chat_prompt(query: str, patient_data: Dict, health_context: str = "", conversation: str = "") -> str:
+    """Build the patient support chat prompt"""
+    return compose_chat_prompt(query, patient_data, health_context, conversation).text
+
+
+def compose_prediction_prompt(symptoms: str, patient_data: Dict, health_context: str = "",
+                              budget: Optional[int] = None) -> BuiltPrompt:
+    """Diagnostic assessment prompt fitted to the token budget"""
+    sections = _profile_sections(
+        patient_data,
+        "You are a medical AI assistant specializing in diagnostic assessment. Analyze the following patient symptoms and provide potential diagnoses.",
+        "Patient Profile",
+        include_name=False
+    )
+    sections += [
+        Section('health_context', health_context, priority=60, suffix="\n\n"),
+        Section('symptoms', symptoms, priority=80, min_tokens=256, prefix="Reported Symptoms: ", suffix="\n\n"),
+        Section('response_format', """Please provide a comprehensive diagnostic assessment including:
+
+1. **Top 3 Most Likely Conditions:**
+   - Condition 1: [Name] - Likelihood: [High/Medium/Low]
+     * Explanation: [Brief medical explanation]
+   - Condition 2: [Name] - Likelihood: [High/Medium/Low]
+     * Explanation: [Brief medical explanation]
+   - Condition 3: [Name] - Likelihood: [High/Medium/Low]
+     * Explanation: [Brief medical explanation]
+
+2. **Recommended Next Steps:**
+   - Immediate actions to take
+   - When to seek medical attention
+   - Additional tests or evaluations needed
+
+3. **Red Flags - Seek Immediate Medical Care If:**
+   - List warning signs that require urgent attention
+
+**Important Disclaimer:** This assessment is for informational purposes only and should not replace professional medical diagnosis.
+
+Analysis:"""),
+    ]
+    return build_prompt(sections, budget)
+
+
+def build_prediction_prompt(symptoms: str, patient_data: Dict, health_context: str = "") -> str:
+    """Build the diagnostic assessment prompt for a set of symptoms"""
+    return compose_prediction_prompt(symptoms, patient_data, health_context).text
+
+
+def compose_treatment_prompt(condition: str, patient_data: Dict, health_context: str = "",
+                             budget: Optional[int] = None) -> BuiltPrompt:
+    """Treatment plan prompt fitted to the token budget"""
+    sections = _profile_sections(
+        patient_data,
+        "You are a medical AI assistant creating a comprehensive treatment plan. Develop personalized recommendations for the given condition.",
+        "Patient Profile"
+    )
+    # The condition is repeated in the plan heading; keep that copy short
+    heading_condition = truncate_to_tokens(condition, 32)
+    sections += [
+        Section('health_context', health_context, priority=60, suffix="\n\n"),
+        Section('condition', condition, priority=80, min_tokens=128, prefix="Medical Condition: ", suffix="\n\n"),
+        Section('response_format', f"""Please create a detailed treatment plan including:
+
+## 🏥 **Comprehensive Treatment Plan for {heading_condition}**
+
+### 1. **Medication Recommendations:**
+   - Primary medications with dosages
+   - Alternative options if applicable
+   - Drug interaction considerations
+   - Duration of treatment
+
+### 2. **Lifestyle Modifications:**
+   - Dietary recommendations
+   - Exercise guidelines
+   - Sleep hygiene
+   - Stress management techniques
+
+### 3. **Follow-up Care Schedule:**
+   - Initial follow-up timeline
+   - Monitoring parameters
+   - Long-term care plan
+   - Specialist referrals if needed
+
+### 4. **Dietary Guidelines:**
+   - Foods to include
+   - Foods to avoid
+   - Nutritional supplements
+   - Hydration recommendations
+
+### 5. **Physical Activity Plan:**
+   - Recommended exercises
+   - Activity restrictions
+   - Gradual progression plan
+   - Warning signs to stop activity
+
+### 6. **Warning Signs - Seek Immediate Medical Attention:**
+   - Emergency symptoms to watch for
+   - When to contact healthcare provider
+   - Emergency contact information
+
+### 7. **Patient Education:**
+   - Understanding the condition
+   - Self-monitoring techniques
+   - Medication compliance tips
+
+**Important Note:** This treatment plan should be reviewed and approved by a qualified healthcare provider before implementation.
+
+Treatment Plan:"""),
+    ]
+    return build_prompt(sections, budget)
+
+
+def build_treatment_prompt(condition: str, patient_data: Dict, health_context: str = "") -> str:
+    """Build the personalized treatment plan prompt for a condition"""
+    return compose_treatment_prompt(condition, patient_data, health_context).text
+
+
+def compose_insights_prompt(patient_data: Dict, summary: "HealthSummary",
+                            budget: Optional[int] = None) -> BuiltPrompt:
+    """Dashboard health analysis prompt fitted to the token budget"""
+    sections = [
+        Section('instructions', f"""Analyze the following patient health data and provide comprehensive insights:
+
+Patient: {patient_data['name']}
+Age: {patient_data['age']}
+Gender: {patient_data['gender']}
+
+Health Data Summary ({summary.count} days):
+- Average Heart Rate: {summary.means['heart_rate']:.1f} bpm (Range: {summary.mins['heart_rate']:.1f}-{summary.maxs['heart_rate']:.1f})
+- Average Blood Pressure: {summary.means['systolic_bp']:.1f}/{summary.means['diastolic_bp']:.1f} mmHg
+- Average Blood Glucose: {summary.means['blood_glucose']:.1f} mg/dL (Range: {summary.mins['blood_glucose']:.1f}-{summary.maxs['blood_glucose']:.1f})
+
+Recent Trends (Last 7 days vs Previous 7 days):
+- Heart Rate: {summary.recent['heart_rate']:.1f} vs {summary.previous['heart_rate']:.1f}
+- Systolic BP: {summary.recent['systolic_bp']:.1f} vs {summary.previous['systolic_bp']:.1f}
+- Blood Glucose: {summary.recent['blood_glucose']:.1f} vs {summary.previous['blood_glucose']:.1f}
+
+"""),
+        Section('medical_history', str(patient_data['medical_history']),
+                priority=30, min_tokens=64, prefix="Medical History: ", suffix="\n"),
+        Section('current_medications', str(patient_data['current_medications']),
+                priority=50, min_tokens=64, prefix="Current Medications: ", suffix="\n\n"),
+        Section('response_format', """Please provide:
+1. Overall health assessment
+2. Trend analysis and patterns
+3. Areas of concern or improvement
+4. Personalized recommendations
+5. When to seek medical attention
+
+Analysis:"""),
+    ]
+    return build_prompt(sections, budget)
+
+
+def build_insights_prompt(patient_data: Dict, summary: "HealthSummary") -> str:
+    """Build the dashboard's AI health analysis prompt from a dataset summary"""
+    return compose_insights_prompt(patient_data, summary).text
+
+
+def build_pdf_extraction_prompt(text: str, part: int = 1, parts: int = 1) -> str:
+    """Build the prompt that asks the model to pull vitals out of (one chunk of) report text"""
+    section = f" (part {part} of {parts})" if parts > 1 else ""
+    return f"""Extract health metrics from the following medical report text{section} and format as structured data:
+
+Text: {text}
+
+Please extract and format the following health metrics if available:
+- Date/Time
+- Heart Rate (bpm)
+- Blood Pressure (systolic/diastolic)
+- Blood Glucose (mg/dL)
+- Temperature (°F)
+- Weight (kg/lbs)
+- Any symptoms mentioned
+- Medications listed
+
+Format the response as a structured list that can be converted to a DataFrame."""
+
+
+def build_vitals_fallback_prompt(page_text: str) -> str:
+    """Ask the model to restate one report page's vitals in a form the extraction rules parse"""
+    return f"""The following page from a medical report mentions vital signs that could not be read automatically.
+
+Page: {page_text}
+
+List every vital sign reading on the page, one reading per line, in exactly this format
+(leave out any measurement that is not given, and never invent values):
+Date: YYYY-MM-DD | Heart Rate: <bpm> bpm | Blood Pressure: <systolic>/<diastolic> mmHg | Blood Glucose: <value> mg/dL | Temperature: <value> °F | Weight: <value> kg
+
+If the page contains no readings, answer with: No readings"""
@@ -0,0 +1,129 @@
+"""
+Map-reduce extraction over long medical reports
+
+The full report text is split into chunks of at most CHUNK_TOKENS tokens,
+counted with the prompt tokenizer, on paragraph, line and sentence
+boundaries; the extraction prompt runs on every chunk concurrently (map),
+and the per-chunk answers are merged in document order with duplicate
+lines dropped (reduce). The merge needs no model call, so
+the same answers always give the same summary.
+"""
+
+import os
+import re
+from typing import Callable, List
+
+from healthai.prompt_budget import count_tokens, get_tokenizer, truncate_to_tokens
+from healthai.prompts import build_pdf_extraction_prompt
+
+CHUNK_TOKENS = int(os.getenv("HEALTHAI_PDF_CHUNK_TOKENS", "1000"))
+
+# Chunk requests in flight at once for one report
+REPORT_CONCURRENCY = int(os.getenv("HEALTHAI_PDF_CONCURRENCY", "4"))
+
+_SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+
+def _split_tokens(text: str, max_tokens: int) -> List[str]:
+    # Last resort for a run with no separators: cut between tokens
+    spans = get_tokenizer().spans(text)
+    starts = [spans[index][0] for index in range(0, len(spans), max_tokens)]
+    return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+
+def _split(text: str, max_tokens: int, separators: List[str]) -> List[str]:
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return [text]
+    if not separators:
+        return _split_tokens(text, max_tokens)
+
+    separator, rest = separators[0], separators[1:]
+    separator_tokens = count_tokens(separator)
+    chunks, current, current_tokens = [], "", 0
+    for piece in text.split(separator):
+        piece_tokens = count_tokens(piece)
+        if piece_tokens > max_tokens:
+            # An oversized piece is split on finer boundaries into chunks of its own
+            if current:
+                chunks.append(current)
+                current, current_tokens = "", 0
+            chunks.extend(_split(piece, max_tokens, rest))
+            continue
+
+        # Greedily pack neighbouring pieces up to the budget
+        candidate_tokens = current_tokens + separator_tokens + piece_tokens if current else piece_tokens
+        if candidate_tokens <= max_tokens:
+            current = f"{current}{separator}{piece}" if current else piece
+            current_tokens = candidate_tokens
+        else:
+            if current:
+                chunks.append(current)
+            current, current_tokens = piece, piece_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Split text into chunks of at most max_tokens, preferring natural boundaries"""
+    text = text.strip()
+    if not text:
+        return []
+    max_tokens = max(1, max_tokens)
+    # Pieces are counted separately; a merge across a boundary (exact tokenizers) can cost a token more
+    return [truncate_to_tokens(chunk, max_tokens) for chunk in _split(text, max_tokens, _SEPARATORS)
+            if chunk.strip()]
+
+
+def _normalize_line(line: str) -> str:
+    return re.sub(r"\s+", " ", line.strip(" \t-*•")).lower()
+
+
+def merge_extractions(answers: List[str]) -> str:
+    """Combine per-chunk answers in chunk order, keeping the first copy of repeated lines"""
+    seen = set()
+    lines = []
+    for answer in answers:
+        for line in answer.splitlines():
+            key = _normalize_line(line)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            lines.append(line.rstrip())
+    return "\n".join(lines)
+
+
+class ReportSummary:
+    """Merged extraction for a report plus which chunks failed"""
+
+    def __init__(self, text: str, chunks: int, failed: List[int]):
+        self.text = text
+        self.chunks = chunks
+        self.failed = failed
+
+
+def report_prompts(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Extraction prompt for every chunk of the report, in document order"""
+    chunks = split_text(text, max_tokens)
+    return [build_pdf_extraction_prompt(chunk, part, len(chunks)) for part, chunk in enumerate(chunks, 1)]
+
+
+def merge_report(answers: List[str],
+                 is_error: Callable[[str], bool] = lambda answer: answer.startswith("❌")) -> ReportSummary:
+    """Merge the answers to report_prompts, setting failed chunks aside"""
+    failed = [number for number, answer in enumerate(answers) if not answer or is_error(answer)]
+    merged = merge_extractions([answer for number, answer in enumerate(answers) if number not in failed])
+    return ReportSummary(merged, len(answers), failed)
+
+
+def summarize_report(text: str, generate_many: Callable[[List[str]], List[str]],
+                     max_tokens: int = CHUNK_TOKENS,
+                     is_error: Callable[[str], bool] = lambda answer: answer.startswith("❌")) -> ReportSummary:
+    """Run the extraction prompt over every chunk of the report and merge the answers
+
+    generate_many takes all chunk prompts at once (so it can run them
+    concurrently) and returns one answer per prompt, in order.
+    """
+    prompts = report_prompts(text, max_tokens)
+    return merge_report(generate_many(prompts) if prompts else [], is_error)
@@ -0,0 +1,124 @@
+"""
+Incremental per-vital statistics
+
+RollingStats keeps running count, sum, sum of squares, min and max per
+column, the last two windows of rows and streaming co-moments for the
+correlation matrix, so appending readings costs time proportional to the
+new rows only and never rescans the history.
+"""
+
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from healthai.correlation import StreamingCorrelation
+
+# Rows in the "recent" window and the window it is compared against
+RECENT_WINDOW = 7
+
+
+class RollingStats:
+    """Running totals per column and the trailing 2 * window rows"""
+
+    def __init__(self, columns: List[str], window: int = RECENT_WINDOW):
+        self.columns = list(columns)
+        self.window = window
+        self.rows = 0
+        self.count = np.zeros(len(self.columns), dtype=np.int64)
+        self.total = np.zeros(len(self.columns), dtype=np.float64)
+        self.sumsq = np.zeros(len(self.columns), dtype=np.float64)
+        self.min = np.full(len(self.columns), np.inf)
+        self.max = np.full(len(self.columns), -np.inf)
+        self._tail = np.empty((0, len(self.columns)), dtype=np.float64)
+        self.correlation = StreamingCorrelation(self.columns)
+
+    @classmethod
+    def from_frame(cls, health_data: pd.DataFrame, columns: List[str],
+                   window: int = RECENT_WINDOW) -> "RollingStats":
+        stats = cls(columns, window)
+        stats.update(health_data)
+        return stats
+
+    def copy(self) -> "RollingStats":
+        other = RollingStats(self.columns, self.window)
+        other.rows = self.rows
+        other.count = self.count.copy()
+        other.total = self.total.copy()
+        other.sumsq = self.sumsq.copy()
+        other.min = self.min.copy()
+        other.max = self.max.copy()
+        other._tail = self._tail.copy()
+        other.correlation = self.correlation.copy()
+        return other
+
+    def update(self, chunk: pd.DataFrame):
+        """Fold new rows (a chunk of a CSV, or readings just appended) into the totals"""
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        if not len(values):
+            return
+
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+
+        self.rows += len(values)
+        self.count += present.sum(axis=0)
+        self.total += filled.sum(axis=0)
+        self.sumsq += (filled * filled).sum(axis=0)
+        self.min = np.fmin(self.min, np.where(present, values, np.inf).min(axis=0))
+        self.max = np.fmax(self.max, np.where(present, values, -np.inf).max(axis=0))
+
+        keep = 2 * self.window
+        self._tail = np.concatenate((self._tail, values[-keep:]))[-keep:]
+
+        self.correlation.update(chunk)
+
+    def append(self, reading: Dict[str, float]):
+        """Fold a single reading in; missing vitals count as absent"""
+        columns = self.columns + (['date'] if 'date' in reading else [])
+        self.update(pd.DataFrame([reading]).reindex(columns=columns))
+
+    def tail(self) -> np.ndarray:
+        """The last (up to) 2 * window rows seen, oldest first"""
+        return self._tail
+
+    def _by_column(self, row: np.ndarray) -> Dict[str, float]:
+        return {column: float(value) for column, value in zip(self.columns, row)}
+
+    def means(self) -> Dict[str, float]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._by_column(self.total / self.count)
+
+    def variances(self) -> Dict[str, float]:
+        """Sample variance per column (NaN with fewer than two readings)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.total / self.count
+            variance = (self.sumsq - self.count * mean * mean) / (self.count - 1)
+        variance = np.where(self.count > 1, np.maximum(variance, 0.0), np.nan)
+        return self._by_column(variance)
+
+    def stds(self) -> Dict[str, float]:
+        return {column: float(np.sqrt(value)) for column, value in self.variances().items()}
+
+    def mins(self) -> Dict[str, float]:
+        return self._by_column(np.where(self.count > 0, self.min, np.nan))
+
+    def maxs(self) -> Dict[str, float]:
+        return self._by_column(np.where(self.count > 0, self.max, np.nan))
+
+    def _window_mean(self, rows: np.ndarray) -> Optional[Dict[str, float]]:
+        if not len(rows):
+            return None
+        with warnings.catch_warnings():
+            # All-NaN columns simply come out as NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return self._by_column(np.nanmean(rows, axis=0))
+
+    def recent(self) -> Optional[Dict[str, float]]:
+        """Mean of the last window rows"""
+        return self._window_mean(self._tail[-self.window:])
+
+    def previous(self) -> Optional[Dict[str, float]]:
+        """Mean of the window before the recent one"""
+        return self._window_mean(self._tail[:-self.window])
@@ -0,0 +1,194 @@
+"""
+Rule-based extraction of vitals from medical report text
+
+Dates, blood pressure, heart rate, glucose, temperature, weight and sleep
+are parsed out of each page with regular expressions and unit rules. Only
+pages that mention vitals but yield no readings are handed to a fallback
+(the LLM), and its answer is parsed with the same rules, so most uploads
+need no model call at all.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from healthai.health_data import EXPECTED_COLUMNS
+from healthai.ingestion import REQUIRED_COLUMNS, VITAL_DTYPES
+
+_MONTHS = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE = (r"\d{4}-\d{1,2}-\d{1,2}"
+         r"|\d{1,2}/\d{1,2}/\d{4}"
+         rf"|\d{{1,2}}\s+{_MONTHS},?\s+\d{{4}}"
+         rf"|{_MONTHS}\s+\d{{1,2}},?\s+\d{{4}}")
+# Up to a short label suffix such as " (mmHg):" between the label and the value,
+# optionally with a date in it ("Heart rate on 2024-01-05: 72")
+_GAP = rf"[^\d\n]{{0,25}}?(?:\b(?:{_DATE})\b[^\d\n]{{0,25}}?)?"
+# A whole number, never the start of a longer one
+_NUMBER = r"(\d{1,3}(?:\.\d+)?)(?!\.?\d)"
+
+DATE_PATTERN = re.compile(rf"\b({_DATE})\b", re.IGNORECASE)
+
+VITAL_PATTERNS = {
+    'blood_pressure': re.compile(
+        rf"(?:\b(?:blood\s*pressure|B/?P)\b{_GAP}(\d{{2,3}})\s*/\s*(\d{{2,3}})"
+        r"|\b(\d{2,3})\s*/\s*(\d{2,3})\s*mm\s*hg)",
+        re.IGNORECASE
+    ),
+    'heart_rate': re.compile(rf"\b(?:heart\s*rate|pulse(?:\s*rate)?|HR)\b{_GAP}{_NUMBER}", re.IGNORECASE),
+    'blood_glucose': re.compile(
+        rf"\b(?:blood\s*glucose|glucose|blood\s*sugar|FBS|FPG)\b{_GAP}{_NUMBER}\s*(mg\s*/\s*dl|mmol\s*/\s*l)?",
+        re.IGNORECASE
+    ),
+    'temperature': re.compile(rf"\b(?:temperature|temp)\b{_GAP}{_NUMBER}\s*°?\s*([FC]\b)?", re.IGNORECASE),
+    'weight': re.compile(rf"\b(?:weight|wt)\b{_GAP}{_NUMBER}\s*(kgs?|lbs?|pounds)?\b", re.IGNORECASE),
+    'sleep_hours': re.compile(rf"\bsleep\b{_GAP}{_NUMBER}\s*(?:h|hrs?|hours)\b", re.IGNORECASE),
+}
+
+# A page mentioning any of these is expected to contain readings
+VITALS_KEYWORDS = re.compile(
+    r"\b(?:vital|heart\s*rate|pulse|blood\s*pressure|glucose|blood\s*sugar|temperature|weight)",
+    re.IGNORECASE
+)
+
+# Readings outside these ranges are treated as parsing mistakes
+PLAUSIBLE_RANGES = {
+    'heart_rate': (20, 250),
+    'systolic_bp': (60, 260),
+    'diastolic_bp': (30, 160),
+    'blood_glucose': (20, 700),
+    'temperature': (90, 110),
+    'weight': (2, 350),
+    'sleep_hours': (0, 24),
+}
+
+MMOL_TO_MG_DL = 18.0
+
+# Temperatures without a unit below this are taken to be °C
+CELSIUS_BELOW = 50
+LB_TO_KG = 0.45359237
+
+Reading = Dict[str, float]
+
+
+def _plausible(column: str, value: float) -> bool:
+    low, high = PLAUSIBLE_RANGES[column]
+    return low <= value <= high
+
+
+def _parse_vital(kind: str, match: "re.Match") -> Reading:
+    """Values (in the dashboard's units) from one pattern match"""
+    if kind == 'blood_pressure':
+        systolic, diastolic = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        return {'systolic_bp': float(systolic), 'diastolic_bp': float(diastolic)}
+
+    value = float(match.group(1))
+    unit = (match.group(2) or "").lower().replace(" ", "") if match.re.groups > 1 else ""
+    if kind == 'blood_glucose' and (unit.startswith("mmol") or (not unit and value < 30)):
+        value *= MMOL_TO_MG_DL
+    elif kind == 'temperature' and (unit == "c" or (not unit and value < CELSIUS_BELOW)):
+        value = value * 9 / 5 + 32
+    elif kind == 'weight' and unit.startswith(("lb", "pound")):
+        value *= LB_TO_KG
+    return {kind: value}
+
+
+def _parse_date(text: str) -> Optional[pd.Timestamp]:
+    date = pd.to_datetime(text.replace(",", ""), errors='coerce')
+    return None if pd.isna(date) else date
+
+
+def parse_page(text: str, current_date: Optional[pd.Timestamp] = None) -> Tuple[List[Reading], Optional[pd.Timestamp]]:
+    """Readings found on one page, plus the date in effect at its end
+
+    Each reading takes the most recent date seen before it (carried over from
+    earlier pages). A vital repeated under the same date starts a new reading.
+    """
+    events = [(match.start(), 'date', match) for match in DATE_PATTERN.finditer(text)]
+    for kind, pattern in VITAL_PATTERNS.items():
+        # Placed by where the value ends, so a date between label and value applies to it
+        events.extend((match.end(), kind, match) for match in pattern.finditer(text))
+    events.sort(key=lambda event: event[0])
+
+    readings: List[Reading] = []
+    row: Reading = {}
+
+    def flush():
+        if row:
+            readings.append({'date': current_date, **row})
+            row.clear()
+
+    for _, kind, match in events:
+        if kind == 'date':
+            date = _parse_date(match.group(1))
+            if date is not None and date != current_date:
+                flush()
+                current_date = date
+            continue
+
+        values = {column: value for column, value in _parse_vital(kind, match).items()
+                  if _plausible(column, value)}
+        if not values:
+            continue
+        if any(column in row for column in values):
+            flush()
+        row.update(values)
+
+    flush()
+    return readings, current_date
+
+
+def needs_fallback(text: str, readings: List[Reading]) -> bool:
+    """A page that talks about vitals but yielded none"""
+    return not readings and bool(VITALS_KEYWORDS.search(text))
+
+
+def readings_frame(readings: List[Reading]) -> pd.DataFrame:
+    """Typed DataFrame in the CSV schema (datetime64 dates, float32 vitals)
+
+    Required columns are always present; optional ones only when some page had them.
+    """
+    frame = pd.DataFrame.from_records(readings, columns=EXPECTED_COLUMNS)
+    columns = [column for column in EXPECTED_COLUMNS
+               if column in REQUIRED_COLUMNS or frame[column].notna().any()]
+    frame = frame[columns]
+    frame['date'] = pd.to_datetime(frame['date'], errors='coerce')
+    for column in columns[1:]:
+        frame[column] = frame[column].astype(VITAL_DTYPES[column])
+    return frame.sort_values('date', kind='stable', na_position='first').reset_index(drop=True)
+
+
+class ExtractionResult:
+    """Extracted readings plus how many pages the rules could not parse"""
+
+    def __init__(self, health_data: pd.DataFrame, pages: int, unparsed_pages: int):
+        self.health_data = health_data
+        self.pages = pages
+        self.unparsed_pages = unparsed_pages
+
+
+def extract_vitals(pages: List[str],
+                   fallback: Optional[Callable[[List[str]], List[str]]] = None) -> ExtractionResult:
+    """Parse vitals from page texts
+
+    fallback receives the texts of pages the rules could not parse, all at
+    once so it can batch them, and returns one text per page that is parsed
+    with the same rules (e.g. an LLM rewriting the page as labelled readings).
+    """
+    per_page: List[List[Reading]] = []
+    page_dates: List[Optional[pd.Timestamp]] = []
+    current_date = None
+    for text in pages:
+        page_dates.append(current_date)
+        readings, current_date = parse_page(text, current_date)
+        per_page.append(readings)
+
+    unparsed = [number for number, text in enumerate(pages) if needs_fallback(text, per_page[number])]
+    if unparsed and fallback is not None:
+        answers = fallback([pages[number] for number in unparsed])
+        for number, answer in zip(unparsed, answers):
+            # Dates in the answer win; otherwise the page keeps the date in effect before it
+            per_page[number], _ = parse_page(answer or "", page_dates[number])
+
+    readings = [reading for page in per_page for reading in page]
+    return ExtractionResult(readings_frame(readings), len(pages), len(unparsed))
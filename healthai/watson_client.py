@@ -0,0 +1,392 @@
+"""
+IBM watsonx client helpers
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from healthai.response_cache import ResponseCache, make_cache_key
+
+IAM_TOKEN_URL = "https://iam.cloud.ibm.com/identity/token"
+
+# Refresh tokens this many seconds before IAM says they expire
+TOKEN_REFRESH_MARGIN = 300
+
+GENERATION_API_VERSION = "2023-05-29"
+MODEL_ID = "ibm/granite-13b-instruct-v2"
+
+# Greedy decoding only accepts these parameters (no temperature, top_k or top_p)
+DEFAULT_PARAMETERS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 200,
+    "min_new_tokens": 0,
+    "repetition_penalty": 1
+}
+
+_MASKED_FILTER = {
+    "enabled": True,
+    "threshold": 0.5,
+    "mask": {
+        "remove_entity_value": True
+    }
+}
+
+DEFAULT_MODERATIONS = {
+    "hap": {
+        "input": _MASKED_FILTER,
+        "output": _MASKED_FILTER
+    },
+    "pii": {
+        "input": _MASKED_FILTER,
+        "output": _MASKED_FILTER
+    },
+    "granite_guardian": {
+        "input": {
+            "threshold": 1
+        }
+    }
+}
+
+# Responses worth retrying with backoff: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class WatsonTokenError(RuntimeError):
+    """Raised when an IAM access token cannot be obtained"""
+
+
+class WatsonStreamError(RuntimeError):
+    """Raised when a generation stream ends before the model finished"""
+
+
+class WatsonAPIError(RuntimeError):
+    """Raised when the text generation endpoint returns an error status"""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"API Error {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def create_session(pool_connections: int = 10, pool_maxsize: int = 20,
+                   max_retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """Create a keep-alive session with a sized connection pool and retry policy"""
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class WatsonTokenManager:
+    """Caches an IAM access token and refreshes it shortly before expiry"""
+
+    def __init__(self, api_key: str, token_url: str = IAM_TOKEN_URL,
+                 refresh_margin: float = TOKEN_REFRESH_MARGIN, timeout: Any = 30,
+                 session: Optional[requests.Session] = None):
+        self.api_key = api_key
+        self.token_url = token_url
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.session = session
+
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get_token(self) -> str:
+        """Return a valid access token, fetching a new one only when needed"""
+        now = time.time()
+        token = self._access_token
+
+        if token and now < self._expires_at - self.refresh_margin:
+            return token
+
+        if token and now < self._expires_at:
+            # Still valid but close to expiry - serve it and refresh behind the caller
+            self._refresh_in_background()
+            return token
+
+        with self._lock:
+            # Another caller may have refreshed while we were waiting
+            if self._access_token and time.time() < self._expires_at:
+                return self._access_token
+            return self._refresh()
+
+    def invalidate(self):
+        """Drop the cached token so the next call fetches a fresh one"""
+        with self._lock:
+            self._access_token = None
+            self._expires_at = 0.0
+
+    def _refresh(self) -> str:
+        """Request a new token from IAM; caller must hold the lock"""
+        token_data = self._request_token()
+
+        access_token = token_data.get("access_token")
+        if not access_token:
+            raise WatsonTokenError("Token response did not include an access token")
+
+        # IAM returns both an absolute expiry and a lifetime; prefer the lifetime
+        # so clock skew between us and IAM does not matter
+        if "expires_in" in token_data:
+            expires_at = time.time() + float(token_data["expires_in"])
+        else:
+            expires_at = float(token_data.get("expiration", time.time() + 3600))
+
+        self._access_token = access_token
+        self._expires_at = expires_at
+        return access_token
+
+    def _refresh_in_background(self):
+        """Start a single background refresh unless one is already running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def worker():
+            try:
+                with self._lock:
+                    if time.time() < self._expires_at - self.refresh_margin:
+                        return
+                    self._refresh()
+            except Exception:
+                # The current token is still valid; the next caller will retry
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, name="watson-token-refresh", daemon=True).start()
+
+    def _request_token(self) -> Dict:
+        """POST the API key to IAM and return the decoded response"""
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": "application/json"
+        }
+
+        data = {
+            "grant_type": "urn:ibm:params:oauth:grant-type:apikey",
+            "apikey": self.api_key
+        }
+
+        http = self.session or requests
+        response = http.post(self.token_url, headers=headers, data=data, timeout=self.timeout)
+
+        if response.status_code != 200:
+            raise WatsonTokenError(f"Token request failed: {response.status_code} - {response.text}")
+
+        return response.json()
+
+
+_token_managers: Dict[str, WatsonTokenManager] = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_token_manager(api_key: str, session: Optional[requests.Session] = None,
+                      timeout: Any = 30, token_url: str = IAM_TOKEN_URL) -> WatsonTokenManager:
+    """Return the process-wide token manager for an API key"""
+    with _token_managers_lock:
+        manager = _token_managers.get(api_key)
+        if manager is None:
+            manager = WatsonTokenManager(api_key, token_url=token_url, timeout=timeout, session=session)
+            _token_managers[api_key] = manager
+        elif session is not None and manager.session is None:
+            manager.session = session
+        return manager
+
+
+class WatsonXClient:
+    """watsonx text generation client backed by a pooled keep-alive session"""
+
+    name = "watsonx"
+
+    def __init__(self, api_key: str, project_id: str, url: str,
+                 model_id: str = MODEL_ID, pool_connections: int = 10, pool_maxsize: int = 20,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 connect_timeout: float = 5, read_timeout: float = 60,
+                 token_url: str = IAM_TOKEN_URL, cache: Optional[ResponseCache] = None):
+        self.project_id = project_id
+        self.url = url.rstrip("/")
+        self.model_id = model_id
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.cache = cache
+
+        self.session = create_session(pool_connections, pool_maxsize, max_retries, backoff_factor)
+        self.token_manager = get_token_manager(api_key, session=self.session,
+                                               timeout=(connect_timeout, 30), token_url=token_url)
+
+    @classmethod
+    def from_credentials(cls, credentials: Dict[str, str], **overrides) -> "WatsonXClient":
+        """Build a client from the app's credential dict plus WATSONX_* tuning variables"""
+        settings = {
+            "pool_connections": int(os.getenv("WATSONX_POOL_CONNECTIONS", "10")),
+            "pool_maxsize": int(os.getenv("WATSONX_POOL_MAXSIZE", "20")),
+            "max_retries": int(os.getenv("WATSONX_MAX_RETRIES", "3")),
+            "backoff_factor": float(os.getenv("WATSONX_BACKOFF_FACTOR", "0.5")),
+            "connect_timeout": float(os.getenv("WATSONX_CONNECT_TIMEOUT", "5")),
+            "read_timeout": float(os.getenv("WATSONX_READ_TIMEOUT", "60")),
+            "token_url": os.getenv("WATSONX_IAM_URL", IAM_TOKEN_URL),
+            "cache": ResponseCache.from_env()
+        }
+        settings.update(overrides)
+        return cls(credentials['api_key'], credentials['project_id'], credentials['url'], **settings)
+
+    def build_body(self, prompt: str) -> Dict[str, Any]:
+        """Build the text generation request body for a prompt"""
+        return {
+            "input": prompt,
+            "parameters": DEFAULT_PARAMETERS,
+            "model_id": self.model_id,
+            "project_id": self.project_id,
+            "moderations": DEFAULT_MODERATIONS
+        }
+
+    def cache_key(self, prompt: str) -> str:
+        """Response cache key for a prompt under this client's model settings"""
+        return make_cache_key(self.model_id, DEFAULT_PARAMETERS, DEFAULT_MODERATIONS, prompt)
+
+    def generate(self, prompt: str) -> Optional[str]:
+        """Generate text for a prompt; returns None when the model produced no result"""
+        key = self.cache_key(prompt) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        url = f"{self.url}/ml/v1/text/generation?version={GENERATION_API_VERSION}"
+        body = self.build_body(prompt)
+
+        response = self._post(url, body)
+
+        if response.status_code != 200:
+            raise WatsonAPIError(response.status_code, response.text)
+
+        data = response.json()
+        if 'results' in data and len(data['results']) > 0:
+            generated_text = data['results'][0]['generated_text']
+            if key:
+                self.cache.set(key, generated_text)
+            return generated_text
+        return None
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Generate text for a prompt, yielding chunks as the model produces them"""
+        key = self.cache_key(prompt) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        url = f"{self.url}/ml/v1/text/generation_stream?version={GENERATION_API_VERSION}"
+        body = self.build_body(prompt)
+
+        response = self._post(url, body, stream=True, accept="text/event-stream")
+
+        with response:
+            if response.status_code != 200:
+                raise WatsonAPIError(response.status_code, response.text)
+
+            if response.encoding is None:
+                response.encoding = "utf-8"
+
+            chunks = []
+            finished = False
+            for event in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                for result in event.get('results', []):
+                    chunk = result.get('generated_text')
+                    if chunk:
+                        chunks.append(chunk)
+                        yield chunk
+                    if result.get('stop_reason') not in (None, 'not_finished'):
+                        finished = True
+
+        # The last event carries the stop reason; without it the connection was cut
+        if not finished:
+            raise WatsonStreamError(f"Stream ended before the model finished ({len(chunks)} chunks received)")
+
+        # Only complete streams are cached; an abandoned generator never gets here
+        if key and chunks:
+            self.cache.set(key, "".join(chunks))
+
+    def _post(self, url: str, body: Dict[str, Any], accept: str = "application/json",
+              **kwargs) -> requests.Response:
+        """POST with a bearer token, retrying once with a fresh token on 401"""
+        for attempt in range(2):
+            headers = {
+                "Accept": accept,
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.token_manager.get_token()}"
+            }
+            response = self.session.post(url, headers=headers, json=body, timeout=self.timeout, **kwargs)
+
+            if response.status_code == 401 and attempt == 0:
+                # Token was revoked or expired early
+                response.close()
+                self.token_manager.invalidate()
+                continue
+            return response
+        return response
+
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Decode the JSON payloads of a server-sent event stream"""
+    data_lines = []
+
+    def flush():
+        payload = "\n".join(data_lines)
+        data_lines.clear()
+        if payload and payload != "[DONE]":
+            return json.loads(payload)
+        return None
+
+    for line in lines:
+        if not line:
+            # A blank line terminates an event
+            event = flush()
+            if event is not None:
+                yield event
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+        # id:, event: and : comment lines carry nothing we need
+
+    event = flush()
+    if event is not None:
+        yield event
+
+
+_clients: Dict[Tuple[str, str, str], WatsonXClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_client(credentials: Dict[str, str]) -> WatsonXClient:
+    """Return the process-wide client for a set of credentials"""
+    key = (credentials['api_key'], credentials['project_id'], credentials['url'])
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = WatsonXClient.from_credentials(credentials)
+            _clients[key] = client
+        return client
@@ -0,0 +1,38 @@
+import threading
+import uuid
+
+import pytest
+
+from healthai.mock_watsonx import MockSettings, create_server
+from healthai.watson_client import WatsonXClient
+
+
+@pytest.fixture
+def mock_server():
+    """Start a mock watsonx server with the given MockSettings options; returns (url, settings)"""
+    servers = []
+
+    def start(**options):
+        options.setdefault("token_delay", 0)
+        settings = MockSettings(**options)
+        server = create_server("127.0.0.1", 0, settings)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}", settings
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_client():
+    """WatsonXClient for a mock server URL, with its own token manager"""
+    def make(url: str, **overrides) -> WatsonXClient:
+        settings = {"token_url": f"{url}/identity/token", "backoff_factor": 0, "cache": None}
+        settings.update(overrides)
+        # Token managers are shared per API key, so each client gets a fresh key
+        return WatsonXClient(f"key-{uuid.uuid4().hex}", "project", url, **settings)
+
+    return make
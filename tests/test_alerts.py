@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from healthai.alerts import (
+    _trailing_zscores,
+    alert_counts,
+    alert_message,
+    alert_messages,
+    detect_alerts,
+)
+from healthai.ingestion import read_health_csv
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "patient_health_data (1).csv")
+
+NORMAL = {'heart_rate': 72.0, 'systolic_bp': 118.0, 'diastolic_bp': 76.0, 'blood_glucose': 95.0}
+
+
+def _series(overrides, periods=12, freq='D'):
+    """Normal daily readings with {column: {position: value}} replaced"""
+    frame = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=periods, freq=freq),
+                          **{column: np.full(periods, value) for column, value in NORMAL.items()}})
+    for column, values in overrides.items():
+        for position, value in values.items():
+            frame.loc[position, column] = value
+    return frame
+
+
+def test_normal_readings_raise_nothing():
+    events = detect_alerts(_series({}))
+
+    assert events.empty
+    assert list(alert_counts(events)) == [0, 0]
+
+
+def test_bundled_sample_in_celsius_raises_nothing():
+    events = detect_alerts(read_health_csv(SAMPLE_CSV))
+
+    assert events.empty, alert_messages(events)
+
+
+def test_celsius_temperatures_are_checked_in_fahrenheit():
+    frame = _series({})
+    frame['temperature'] = 36.8
+    frame.loc[5, 'temperature'] = 39.5
+    events = detect_alerts(frame)
+    fever = events[events['kind'] == 'threshold']
+
+    assert list(fever[['metric', 'direction', 'readings']].itertuples(index=False, name=None)) == [
+        ('temperature', 'high', 1)]
+    assert fever['value'].iloc[0] == 39.5 * 9 / 5 + 32
+
+
+def test_single_high_reading_is_a_warning_threshold_event():
+    events = detect_alerts(_series({'heart_rate': {4: 130.0}}))
+    hr = events[events['kind'] == 'threshold'].iloc[0]
+
+    assert (hr.metric, hr.severity, hr.direction, hr.readings, hr.value) == ('heart_rate', 'warning', 'high', 1, 130.0)
+    assert hr.start == hr.end == pd.Timestamp('2024-01-05')
+
+
+def test_reading_past_the_critical_limit_is_critical():
+    events = detect_alerts(_series({'blood_glucose': {6: 45.0}}))
+    low = events[(events['metric'] == 'blood_glucose') & (events['kind'] == 'threshold')].iloc[0]
+
+    assert (low.severity, low.direction, low.value) == ('critical', 'low', 45.0)
+
+
+def test_run_of_three_becomes_one_sustained_critical_event():
+    events = detect_alerts(_series({'heart_rate': {3: 125.0, 4: 131.0, 5: 128.0}}))
+    sustained = events[events['kind'] == 'sustained']
+
+    assert len(sustained) == 1
+    event = sustained.iloc[0]
+    assert (event.severity, event.readings, event.value) == ('critical', 3, 131.0)
+    assert (event.start, event.end) == (pd.Timestamp('2024-01-04'), pd.Timestamp('2024-01-06'))
+
+
+def test_blood_pressure_runs_combine_systolic_and_diastolic():
+    events = detect_alerts(_series({'systolic_bp': {2: 145.0}, 'diastolic_bp': {3: 95.0}}))
+    bp = events[(events['metric'] == 'blood_pressure') & (events['kind'] == 'threshold')]
+
+    assert len(bp) == 1
+    event = bp.iloc[0]
+    assert (event.readings, event.value, event.diastolic_value) == (2, 145.0, 95.0)
+    assert alert_message(event) == "Blood pressure above 140/90 mmHg for 2 readings (peak 145/95 mmHg)"
+
+
+def test_large_jump_between_close_readings_is_a_rate_of_change_event():
+    events = detect_alerts(_series({'blood_glucose': {5: 160.0}}))
+    rate = events[events['kind'] == 'rate_of_change']
+
+    # The jump up and the drop back are consecutive changes, so they form one event
+    assert len(rate) == 1
+    event = rate.iloc[0]
+    assert (event.metric, event.direction, event.readings, event.value) == ('blood_glucose', 'high', 3, 65.0)
+    assert alert_message(rate.iloc[0]) == "Blood glucose rose by 65.0 mg/dL between consecutive readings"
+
+
+def test_no_rate_of_change_across_long_gaps():
+    frame = _series({'blood_glucose': {5: 160.0}})
+    frame.loc[5:, 'date'] += pd.Timedelta(days=3)
+    frame.loc[6:, 'date'] += pd.Timedelta(days=3)
+
+    events = detect_alerts(frame)
+    assert events[events['kind'] == 'rate_of_change'].empty
+
+
+def test_outlier_against_a_noisy_baseline_is_a_zscore_event():
+    rng = np.random.default_rng(5)
+    frame = _series({}, periods=60)
+    frame['heart_rate'] = 72.0 + rng.normal(0, 1.0, 60)
+    frame.loc[45, 'heart_rate'] = 95.0
+
+    zscores = detect_alerts(frame).query("kind == 'zscore'")
+    assert list(zscores['metric']) == ['heart_rate']
+    assert zscores.iloc[0].start == frame.loc[45, 'date']
+    assert zscores.iloc[0].value > 4
+
+
+def test_trailing_zscores_match_pandas_rolling():
+    rng = np.random.default_rng(9)
+    x = rng.normal(100, 10, 500)
+    x[rng.choice(500, 40, replace=False)] = np.nan
+    window = 30
+
+    previous = pd.Series(x).rolling(window, min_periods=1).agg(['mean', 'std', 'count']).shift(1)
+    std = pd.Series(x).rolling(window, min_periods=1).std(ddof=0).shift(1)
+    expected = ((pd.Series(x) - previous['mean']) / std).to_numpy()
+    # Readings with too little history, missing readings or no spread score 0
+    expected[(previous['count'].fillna(0) < window // 2).to_numpy() | np.isnan(x)] = 0.0
+
+    np.testing.assert_allclose(_trailing_zscores(x, window), expected, atol=1e-9)
+
+
+def test_unsorted_input_is_ordered_by_date():
+    frame = _series({'heart_rate': {3: 125.0, 4: 131.0, 5: 128.0}})
+    shuffled = frame.sample(frac=1, random_state=1)
+
+    pd.testing.assert_frame_equal(detect_alerts(shuffled), detect_alerts(frame))
+
+
+def test_events_are_sorted_with_critical_first_on_the_same_start():
+    events = detect_alerts(_series({'heart_rate': {4: 160.0}, 'blood_glucose': {4: 190.0}}))
+    same_day = events[events['start'] == pd.Timestamp('2024-01-05')]
+
+    assert list(same_day['severity'])[0] == 'critical'
+    assert list(alert_counts(events).index) == ['critical', 'warning']
+    assert len(alert_messages(events)) == len(events)
+
+
+def test_empty_and_partial_frames():
+    empty = detect_alerts(_series({}).iloc[:0])
+    assert empty.empty and 'severity' in empty.columns
+
+    only_hr = detect_alerts(pd.DataFrame({'heart_rate': [70.0, 155.0, 70.0]}))
+    assert set(only_hr['metric']) == {'heart_rate'}
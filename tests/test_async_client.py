@@ -0,0 +1,69 @@
+import asyncio
+
+from healthai.async_client import ConcurrencyLimiter
+
+
+async def _wait_for_grants():
+    # release() schedules _grant with call_soon_threadsafe; one loop pass runs it
+    await asyncio.sleep(0)
+
+
+def test_cancelling_a_waiter_after_its_slot_was_granted_releases_it():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1)
+        await limiter.acquire()
+        waiters = [asyncio.ensure_future(limiter.acquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        limiter.release()
+        await _wait_for_grants()
+        # The first waiter's future is resolved, but the task has not resumed yet
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return limiter.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_cancelling_waiters_while_slots_are_released_leaves_no_slot_held():
+    async def scenario():
+        limiter = ConcurrencyLimiter(2)
+        await limiter.acquire()
+        await limiter.acquire()
+        waiters = [asyncio.ensure_future(limiter.acquire()) for _ in range(6)]
+        await asyncio.sleep(0)
+
+        limiter.release()
+        waiters[0].cancel()
+        await _wait_for_grants()
+        limiter.release()
+        await _wait_for_grants()
+        for waiter in waiters[1:]:
+            waiter.cancel()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        # Waiters that got a slot before being cancelled still hold it
+        held = sum(1 for result in results if not isinstance(result, BaseException))
+        for _ in range(held):
+            limiter.release()
+        return limiter.active, len(limiter._waiters)
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_cancelled_waiter_does_not_block_the_next_one():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1)
+        await limiter.acquire()
+        cancelled = asyncio.ensure_future(limiter.acquire())
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        limiter.release()
+        await asyncio.wait_for(waiting, timeout=1)
+        limiter.release()
+        return limiter.active
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,107 @@
+import uuid
+
+import pytest
+
+from healthai import backends
+from healthai.backends import GenerationBackend, StubBackend, get_backend, selected_backend
+from healthai.watson_client import WatsonXClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_backends(monkeypatch):
+    """Each test selects its own backend and loads local backends anew"""
+    for variable in ("HEALTHAI_BACKEND", "HEALTHAI_STUB_RESPONSE", "HEALTHAI_LOCAL_MODEL_PATH"):
+        monkeypatch.delenv(variable, raising=False)
+    monkeypatch.setenv("HEALTHAI_CACHE_SIZE", "0")
+    monkeypatch.setattr(backends, "_local_backends", {})
+
+
+class EchoBackend(GenerationBackend):
+    name = "echo"
+
+    def generate(self, prompt):
+        if prompt == "fail":
+            raise RuntimeError("model failed")
+        return prompt.upper()
+
+
+def test_watsonx_is_the_default():
+    assert selected_backend() == "watsonx"
+    assert get_backend(None) is None
+
+
+def test_watsonx_with_credentials_is_the_shared_client(monkeypatch):
+    monkeypatch.setenv("HEALTHAI_BACKEND", " WatsonX ")
+    credentials = {'api_key': f"key-{uuid.uuid4().hex}", 'project_id': 'project', 'url': 'http://127.0.0.1:9'}
+
+    client = get_backend(credentials)
+    assert isinstance(client, WatsonXClient)
+    assert get_backend(dict(credentials)) is client
+
+
+def test_stub_is_loaded_once_and_needs_no_credentials(monkeypatch):
+    monkeypatch.setenv("HEALTHAI_BACKEND", "stub")
+
+    backend = get_backend(None)
+    assert isinstance(backend, StubBackend)
+    assert get_backend({'api_key': 'unused'}) is backend
+
+
+def test_stub_response_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("HEALTHAI_BACKEND", "stub")
+    monkeypatch.setenv("HEALTHAI_STUB_RESPONSE", "Drink water.")
+
+    assert get_backend().generate("Anything at all") == "Drink water."
+
+
+def test_llama_cpp_needs_a_model_path(monkeypatch):
+    monkeypatch.setenv("HEALTHAI_BACKEND", "llama_cpp")
+
+    with pytest.raises(RuntimeError, match="HEALTHAI_LOCAL_MODEL_PATH"):
+        get_backend()
+    assert "llama_cpp" not in backends._local_backends
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv("HEALTHAI_BACKEND", "gpt")
+
+    with pytest.raises(ValueError, match="Unknown HEALTHAI_BACKEND 'gpt'"):
+        get_backend()
+
+
+def test_stub_answers_are_deterministic():
+    backend = StubBackend()
+    answer = backend.generate("How much sleep do I need?")
+
+    assert answer == StubBackend().generate("How much sleep do I need?")
+    assert answer != backend.generate("How much water should I drink?")
+    assert answer.startswith("Stub response ")
+    assert "6-word prompt" in answer
+
+
+def test_stub_stream_joins_back_to_the_answer():
+    backend = StubBackend()
+    chunks = list(backend.generate_stream("Is my heart rate normal?"))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == backend.generate("Is my heart rate normal?")
+
+
+def test_default_stream_yields_the_whole_answer():
+    assert list(EchoBackend().generate_stream("hello")) == ["HELLO"]
+
+
+@pytest.mark.parametrize("concurrency", [None, 4])
+def test_generate_many_returns_failures_in_place(concurrency):
+    results = EchoBackend().generate_many(["a", "fail", "b"], concurrency=concurrency)
+
+    assert results[0] == "A" and results[2] == "B"
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_backend_without_generate_cannot_be_created():
+    class Incomplete(GenerationBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="generate"):
+        Incomplete()
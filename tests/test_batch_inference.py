@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from healthai import backends, batch_inference
+from healthai.batch_inference import compact_results, completed_ids
+
+RECORDS = [
+    {"id": "p-001", "patient": {"age": 54}, "symptoms": "Dry cough for 5 days"},
+    {"id": "p-002", "task": "treatment", "patient": {"age": 61}},
+    {"id": "p-003", "patient": {"age": 40}, "condition": "Hypertension"},
+]
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_latest_result_per_id_decides_what_is_done(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"id": "a", "status": "error"}) + "\n"
+        + json.dumps({"id": "b", "status": "invalid"}) + "\n"
+        + json.dumps({"id": "a", "status": "ok"}) + "\n"
+        + json.dumps({"id": "c", "status": "ok"}) + "\n"
+        + json.dumps({"id": "c", "status": "error"}) + "\n"
+        + '{"id": "d", "sta',
+        encoding="utf-8"
+    )
+
+    assert completed_ids(str(output)) == {"a", "b"}
+
+    compact_results(str(output))
+    assert _read_jsonl(output) == [
+        {"id": "a", "status": "ok"},
+        {"id": "b", "status": "invalid"},
+        {"id": "c", "status": "error"},
+    ]
+
+
+@pytest.fixture
+def mock_credentials(mock_server, monkeypatch):
+    url, settings = mock_server()
+    monkeypatch.setenv("WATSONX_API_KEY", "batch-test-key")
+    monkeypatch.setenv("WATSONX_PROJECT_ID", "project")
+    monkeypatch.setenv("WATSONX_URL", url)
+    monkeypatch.setenv("WATSONX_IAM_URL", f"{url}/identity/token")
+    monkeypatch.setenv("HEALTHAI_CACHE_SIZE", "0")
+    return settings
+
+
+def test_resumed_run_skips_invalid_records_and_exits_cleanly(tmp_path, mock_credentials):
+    records = tmp_path / "patients.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_jsonl(records, RECORDS)
+
+    assert batch_inference.main([str(records), str(output)]) == 2
+    first = {row["id"]: row["status"] for row in _read_jsonl(output)}
+    assert first == {"p-001": "ok", "p-002": "invalid", "p-003": "ok"}
+
+    assert batch_inference.main([str(records), str(output)]) == 0
+    assert len(_read_jsonl(output)) == len(RECORDS)
+    assert mock_credentials.stats()["generation"] == {"200": 2}
+
+
+def test_failed_records_are_retried_and_replace_their_error_row(tmp_path, mock_credentials):
+    records = tmp_path / "patients.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_jsonl(records, [RECORDS[0]])
+    _write_jsonl(output, [{"id": "p-001", "status": "error", "error": "API Error 503"}])
+
+    assert batch_inference.main([str(records), str(output)]) == 0
+    rows = _read_jsonl(output)
+    assert [(row["id"], row["status"]) for row in rows] == [("p-001", "ok")]
+
+
+def test_malformed_lines_are_recorded_as_invalid_and_the_run_goes_on(tmp_path, mock_credentials):
+    records = tmp_path / "patients.jsonl"
+    output = tmp_path / "results.jsonl"
+    records.write_text(json.dumps(RECORDS[0]) + "\n" + '{"id": "p-broken", "symptoms": \n' + "[1, 2]\n"
+                       + json.dumps(RECORDS[2]) + "\n", encoding="utf-8")
+
+    assert batch_inference.main([str(records), str(output)]) == 2
+    rows = {row["id"]: row for row in _read_jsonl(output)}
+    assert {record_id: row["status"] for record_id, row in rows.items()} == {
+        "p-001": "ok", "line-2": "invalid", "line-3": "invalid", "p-003": "ok"}
+    assert "Malformed JSON on line 2" in rows["line-2"]["error"]
+
+    # The same lines are recognised as already handled on the next run
+    assert batch_inference.main([str(records), str(output)]) == 0
+    assert mock_credentials.stats()["generation"] == {"200": 2}
+
+
+def test_other_backends_need_no_watsonx_credentials(tmp_path, monkeypatch):
+    monkeypatch.delenv("WATSONX_API_KEY", raising=False)
+    monkeypatch.setenv("HEALTHAI_BACKEND", "stub")
+    monkeypatch.setenv("HEALTHAI_STUB_RESPONSE", "Rest and drink fluids.")
+    monkeypatch.setattr(backends, "_local_backends", {})
+    monkeypatch.setattr(batch_inference, "load_dotenv", lambda: None)
+    records = tmp_path / "patients.jsonl"
+    output = tmp_path / "results.jsonl"
+    _write_jsonl(records, [RECORDS[0], RECORDS[2]])
+
+    assert batch_inference.main([str(records), str(output), "--concurrency", "2"]) == 0
+    assert {row["id"]: (row["task"], row["response"]) for row in _read_jsonl(output)} == {
+        "p-001": ("prediction", "Rest and drink fluids."),
+        "p-003": ("treatment", "Rest and drink fluids."),
+    }
+
+
+def test_unknown_backend_is_reported(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("HEALTHAI_BACKEND", "gpt")
+    monkeypatch.setattr(batch_inference, "load_dotenv", lambda: None)
+    records = tmp_path / "patients.jsonl"
+    _write_jsonl(records, [RECORDS[0]])
+
+    assert batch_inference.main([str(records), str(tmp_path / "results.jsonl")]) == 1
+    assert "Unknown HEALTHAI_BACKEND 'gpt'" in capsys.readouterr().err
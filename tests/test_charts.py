@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthai.charts import decimate, minmax_indices
+
+
+def _series(values):
+    y = pd.Series(values, dtype=np.float64)
+    x = pd.Series(pd.date_range("2024-01-01", periods=len(y), freq="min"))
+    return x, y
+
+
+@pytest.mark.parametrize("n, max_points", [(10_001, 2000), (5000, 101), (999, 7), (50_000, 4)])
+def test_decimated_series_stays_within_max_points(n, max_points):
+    x, y = _series(np.random.default_rng(n).normal(size=n))
+    x_out, y_out = decimate(x, y, max_points)
+
+    assert len(y_out) <= max_points
+    assert (x_out.index == y_out.index).all()
+    assert y_out.index.is_monotonic_increasing
+
+
+def test_every_bucket_keeps_its_min_and_max_and_both_endpoints():
+    values = np.random.default_rng(1).normal(size=1000)
+    indices = minmax_indices(values, 10)
+
+    assert indices[0] == 0 and indices[-1] == 999
+    for bucket in values.reshape(10, 100):
+        kept = set(values[indices])
+        assert bucket.min() in kept and bucket.max() in kept
+
+
+def test_spikes_survive_decimation():
+    values = np.zeros(100_000)
+    values[31_337] = 250.0
+    values[77_001] = -40.0
+    _, y = decimate(*_series(values), max_points=100)
+
+    assert y.max() == 250.0 and y.min() == -40.0
+    assert {31_337, 77_001} <= set(y.index)
+
+
+def test_all_nan_buckets_keep_one_index_and_nan_never_wins():
+    values = np.arange(100, dtype=np.float64)
+    values[20:40] = np.nan
+    values[45] = np.nan
+    indices = minmax_indices(values, 5)
+
+    # Bucket 1 (20-39) is all NaN and falls back to its first index
+    assert 20 in indices and not set(indices) & set(range(21, 40))
+    assert 45 not in indices
+    assert {40, 59} <= set(indices)
+
+
+def test_uneven_last_bucket_does_not_index_past_the_end():
+    values = np.arange(103, dtype=np.float64)[::-1]
+    indices = minmax_indices(values, 10)
+
+    assert indices.max() == 102
+    assert len(indices) == len(np.unique(indices))
+
+
+def test_short_series_are_returned_unchanged():
+    x, y = _series([1.0, np.nan, 3.0])
+
+    x_out, y_out = decimate(x, y, max_points=3)
+    assert x_out is x and y_out is y
+    assert list(minmax_indices(np.arange(8.0), 4)) == list(range(8))
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from healthai.cohort import (
+    PATIENT_COLUMN,
+    build_cohort,
+    cohort_summary,
+    patient_data,
+    read_cohort_csvs,
+    score_distribution,
+)
+from healthai.health_rules import evaluate_rules
+
+
+def _patient(heart_rate, systolic=118.0, diastolic=76.0, glucose=95.0, start="2024-01-01"):
+    """Daily readings; heart_rate may be a list to shape the trend"""
+    heart_rate = np.asarray(heart_rate, dtype=np.float64)
+    n = len(heart_rate)
+    return pd.DataFrame({
+        'date': pd.date_range(start, periods=n, freq="D"),
+        'heart_rate': heart_rate,
+        'systolic_bp': np.full(n, systolic),
+        'diastolic_bp': np.full(n, diastolic),
+        'blood_glucose': np.full(n, glucose),
+    })
+
+
+@pytest.fixture
+def datasets():
+    return {
+        'alice': _patient([70.0] * 7 + [80.0] * 7),
+        'bob': _patient([90.0] * 7 + [75.0] * 7, systolic=145.0, glucose=130.0),
+        'carol': _patient([66.0, 68.0, 70.0]),
+    }
+
+
+def test_build_cohort_stacks_patients_in_order(datasets):
+    cohort = build_cohort(datasets)
+
+    assert len(cohort) == 31
+    assert list(cohort[PATIENT_COLUMN].cat.categories) == ['alice', 'bob', 'carol']
+    assert list(cohort[PATIENT_COLUMN].iloc[[0, 13, 14, 28, 30]]) == ['alice', 'alice', 'bob', 'carol', 'carol']
+    pdt.assert_frame_equal(cohort.iloc[14:28, 1:].reset_index(drop=True), datasets['bob'])
+
+
+def test_build_cohort_replaces_an_existing_patient_column(datasets):
+    tagged = datasets['alice'].assign(patient_id='someone else')
+    cohort = build_cohort({'alice': tagged})
+
+    assert list(cohort.columns) == [PATIENT_COLUMN] + list(datasets['alice'].columns)
+    assert set(cohort[PATIENT_COLUMN]) == {'alice'}
+
+
+def test_empty_cohort():
+    cohort = build_cohort({})
+    assert list(cohort.columns) == [PATIENT_COLUMN] and cohort.empty
+
+
+def test_patient_data_round_trips(datasets):
+    cohort = build_cohort(datasets)
+
+    for name, health_data in datasets.items():
+        pdt.assert_frame_equal(patient_data(cohort, name), health_data)
+    assert patient_data(cohort, 'dave') is None
+
+
+def test_summary_means_statuses_and_scores(datasets):
+    summary = cohort_summary(build_cohort(datasets))
+
+    assert list(summary.index) == ['alice', 'bob', 'carol']
+    assert list(summary['readings']) == [14, 14, 3]
+    assert summary.loc['alice', 'avg_heart_rate'] == 75.0
+    means = pd.DataFrame({column: [datasets[name][column].mean() for name in summary.index]
+                          for column in ['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose']})
+    assert list(summary['health_score']) == list(evaluate_rules(means).score)
+    assert list(summary.loc['bob', ['bp_status', 'glucose_status']]) == ['Elevated', 'Diabetic']
+
+
+def test_trend_compares_the_last_window_with_the_one_before(datasets):
+    summary = cohort_summary(build_cohort(datasets), window=7)
+
+    assert summary.loc['alice', 'heart_rate_rising']
+    assert not summary.loc['bob', 'heart_rate_rising']
+    # Too few readings for a previous window
+    assert not summary.loc['carol', 'heart_rate_rising']
+
+
+def test_trend_windows_follow_dates_not_row_order(datasets):
+    shuffled = {name: frame.sample(frac=1, random_state=0) for name, frame in datasets.items()}
+    ordered = cohort_summary(build_cohort(datasets), window=7)
+    pdt.assert_frame_equal(cohort_summary(build_cohort(shuffled), window=7), ordered)
+
+    # A shorter window only sees the last few days of each step
+    summary = cohort_summary(build_cohort(datasets), window=3)
+    assert not summary.loc['alice', 'heart_rate_rising']
+    assert summary.loc['carol', 'avg_heart_rate'] == 68.0
+
+
+def test_score_distribution_bands():
+    summary = pd.DataFrame({'health_score': [100, 90, 89, 75, 74, 60, 59, 0]})
+    bands = score_distribution(summary)
+
+    assert bands.to_dict() == {'Needs attention': 2, 'Fair': 2, 'Good': 2, 'Excellent': 2}
+    assert list(score_distribution(summary.iloc[:0])) == [0, 0, 0, 0]
+
+
+def test_read_cohort_csvs_mixes_single_and_long_files(tmp_path, datasets):
+    single = tmp_path / "alice.csv"
+    datasets['alice'].to_csv(single, index=False)
+    long_format = tmp_path / "clinic.csv"
+    build_cohort({'bob': datasets['bob'], 'carol': datasets['carol']}).to_csv(long_format, index=False)
+
+    cohort = read_cohort_csvs([("clinic.csv", str(long_format)), ("uploads/alice.csv", str(single))])
+
+    assert isinstance(cohort[PATIENT_COLUMN].dtype, pd.CategoricalDtype)
+    assert cohort[PATIENT_COLUMN].value_counts().to_dict() == {'alice': 14, 'bob': 14, 'carol': 3}
+    assert list(patient_data(cohort, 'alice')['heart_rate']) == list(datasets['alice']['heart_rate'])
@@ -0,0 +1,126 @@
+import pytest
+
+from healthai.conversation import ConversationMemory, gist
+from healthai.prompt_budget import TRUNCATION_MARKER, count_tokens
+
+
+def _talk(memory, turns, start=0):
+    for number in range(start, start + turns):
+        memory.add('user', f"Question {number}? More detail here.")
+        memory.add('ai', f"**Answer {number}.** Longer explanation follows.")
+
+
+def test_gist_keeps_the_first_sentence_without_markdown():
+    assert gist("**Drink water.** Rest for two days!") == "Drink water."
+    assert gist("## Heading\n- item one\n- item two") == "Heading - item one - item two"
+
+
+def test_gist_is_cut_to_its_token_allowance():
+    text = " ".join(["word"] * 100)
+    short = gist(text, max_tokens=10)
+
+    assert count_tokens(short) <= 10
+    assert TRUNCATION_MARKER.strip() in short
+
+
+def test_recent_turns_are_kept_verbatim():
+    memory = ConversationMemory(max_turns=2)
+    _talk(memory, 2)
+
+    assert memory.summary() == ""
+    assert memory.context() == (
+        "Most recent exchanges:\n"
+        "Patient: Question 0? More detail here.\nHealthAI: **Answer 0.** Longer explanation follows.\n"
+        "Patient: Question 1? More detail here.\nHealthAI: **Answer 1.** Longer explanation follows."
+    )
+
+
+def test_older_turns_fold_into_one_summary_line_each():
+    memory = ConversationMemory(max_turns=2)
+    _talk(memory, 4)
+
+    assert [question for question, _ in memory.recent] == ["Question 2? More detail here.",
+                                                           "Question 3? More detail here."]
+    assert memory.summary_lines == [
+        "- Patient asked: Question 0? | HealthAI answered: Answer 0.",
+        "- Patient asked: Question 1? | HealthAI answered: Answer 1.",
+    ]
+    context = memory.context()
+    assert context.startswith("Earlier exchanges (summarized):\n- Patient asked: Question 0?")
+    assert context.index("Earlier exchanges") < context.index("Most recent exchanges")
+
+
+def test_unanswered_question_is_not_in_the_context_yet():
+    memory = ConversationMemory()
+    memory.add('user', "Is 140/90 high?")
+
+    assert memory.context() == ""
+    memory.add('ai', "Yes, that is stage 2.")
+    assert "Is 140/90 high?" in memory.context()
+
+
+@pytest.mark.parametrize("summary_tokens", [20, 60, 200])
+def test_summary_stays_within_its_token_allowance(summary_tokens):
+    memory = ConversationMemory(max_turns=1, summary_tokens=summary_tokens)
+    _talk(memory, 50)
+
+    assert count_tokens("\n".join(memory.summary_lines)) <= summary_tokens
+    assert memory.omitted_turns + len(memory.summary_lines) == 49
+    assert memory.summary().startswith(f"- ({memory.omitted_turns} earlier exchanges not shown)")
+    # The newest folded exchange is never the one dropped
+    assert memory.summary_lines[-1].startswith("- Patient asked: Question 48?")
+
+
+def test_latest_summary_line_is_kept_even_when_over_the_allowance():
+    memory = ConversationMemory(max_turns=0, summary_tokens=1)
+    _talk(memory, 3)
+
+    assert len(memory.summary_lines) == 1 and memory.omitted_turns == 2
+
+
+def test_context_stays_bounded_however_long_the_session():
+    memory = ConversationMemory(max_turns=2, summary_tokens=80)
+    _talk(memory, 10)
+    ten = count_tokens(memory.context())
+    _talk(memory, 500, start=10)
+
+    assert count_tokens(memory.context()) <= ten + 10
+
+
+def test_transcript_is_capped_and_counts_what_it_dropped():
+    memory = ConversationMemory(transcript_limit=10)
+    _talk(memory, 8)
+
+    assert len(memory) == 10
+    assert memory.dropped_messages == 6
+    assert memory.messages[0]['content'] == "Question 3? More detail here."
+
+
+def test_details_are_kept_for_display():
+    memory = ConversationMemory()
+    memory.add('ai', "Hello", prompt_tokens=12)
+    assert memory.messages == [{'role': 'ai', 'content': "Hello", 'prompt_tokens': 12}]
+
+
+@pytest.mark.parametrize("messages, page_size, pages", [(0, 20, 1), (1, 20, 1), (20, 20, 1), (21, 20, 2), (45, 20, 3)])
+def test_page_count(messages, page_size, pages):
+    memory = ConversationMemory(transcript_limit=100)
+    for number in range(messages):
+        memory.add('user', str(number))
+    assert memory.page_count(page_size) == pages
+
+
+def test_last_page_is_full_and_pages_cover_every_message_once():
+    memory = ConversationMemory(transcript_limit=100)
+    for number in range(45):
+        memory.add('user', str(number))
+
+    pages = [[message['content'] for message in memory.page(number, 20)] for number in (1, 2, 3)]
+    assert pages == [[str(n) for n in range(0, 5)], [str(n) for n in range(5, 25)], [str(n) for n in range(25, 45)]]
+    assert memory.page(4, 20) == [] and memory.page(0, 20) == []
+
+
+def test_single_page_holds_everything():
+    memory = ConversationMemory()
+    _talk(memory, 3)
+    assert memory.page(1) == memory.messages
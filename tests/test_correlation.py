@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthai.correlation import CoMoments, StreamingCorrelation
+
+COLUMNS = ['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose']
+
+
+def _vitals(periods=240, freq='D', gaps=True, seed=3):
+    rng = np.random.default_rng(seed)
+    systolic = rng.normal(120, 8, periods)
+    frame = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=periods, freq=freq),
+        'heart_rate': rng.normal(72, 6, periods),
+        'systolic_bp': systolic,
+        'diastolic_bp': 0.6 * systolic + rng.normal(8, 3, periods),
+        'blood_glucose': rng.normal(95, 12, periods),
+    })
+    if gaps:
+        frame.loc[rng.choice(periods, 30, replace=False), 'heart_rate'] = np.nan
+        frame.loc[rng.choice(periods, 20, replace=False), 'diastolic_bp'] = np.nan
+    return frame
+
+
+def _streamed(frame, chunk_size, retain_days=90):
+    correlation = StreamingCorrelation(COLUMNS, retain_days)
+    for start in range(0, len(frame), chunk_size):
+        correlation.update(frame.iloc[start:start + chunk_size])
+    return correlation
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 50, 10000])
+def test_full_matrix_matches_pairwise_complete_corr(chunk_size):
+    frame = _vitals()
+    matrix = _streamed(frame, chunk_size).matrix()
+
+    pd.testing.assert_frame_equal(matrix, frame[COLUMNS].corr(), atol=1e-10)
+
+
+@pytest.mark.parametrize("days", [7, 30, 90])
+def test_windowed_matrix_matches_rolling_corr_at_the_last_day(days):
+    frame = _vitals(gaps=False)
+    matrix = _streamed(frame, 25).matrix(days)
+
+    # A time-based window ending at the last midnight covers exactly `days` calendar days
+    rolling = frame.set_index('date')[COLUMNS].rolling(f'{days}D').corr()
+    expected = rolling.loc[frame['date'].iloc[-1]]
+    pd.testing.assert_frame_equal(matrix, expected, atol=1e-10, check_names=False)
+
+
+def test_windowed_matrix_over_minute_readings_matches_corr_of_recent_days():
+    frame = _vitals(periods=6 * 24 * 60, freq='min', gaps=True)
+    matrix = _streamed(frame, 5000).matrix(2)
+
+    last_day = frame['date'].iloc[-1].normalize()
+    recent = frame[frame['date'] >= last_day - pd.Timedelta(days=1)]
+    pd.testing.assert_frame_equal(matrix, recent[COLUMNS].corr(), atol=1e-9)
+
+
+def test_days_older_than_the_retention_are_dropped():
+    correlation = _streamed(_vitals(), 40, retain_days=30)
+
+    assert len(correlation.daily) == 30
+    assert max(correlation.daily) - min(correlation.daily) == np.timedelta64(29, 'D')
+
+
+def test_constant_and_too_short_columns_are_nan_like_pandas():
+    frame = pd.DataFrame({
+        'heart_rate': [70.0] * 6,
+        'systolic_bp': [118.0, 121.0, 125.0, 119.0, 130.0, 127.0],
+        'diastolic_bp': [np.nan] * 5 + [80.0],
+        'blood_glucose': [90.0, 92.0, 97.0, 91.0, 99.0, 101.0],
+    })
+    result = CoMoments.from_values(frame[COLUMNS].to_numpy()).correlation()
+
+    np.testing.assert_allclose(result, frame[COLUMNS].corr().to_numpy(), atol=1e-12)
+
+
+def test_merging_blocks_equals_computing_them_together():
+    values = _vitals()[COLUMNS].to_numpy()
+    merged = CoMoments.from_values(values[:100])
+    merged.merge(CoMoments.from_values(values[100:]))
+    together = CoMoments.from_values(values)
+
+    np.testing.assert_allclose(merged.n, together.n)
+    np.testing.assert_allclose(merged.c, together.c, rtol=1e-9, atol=1e-8)
+    np.testing.assert_allclose(merged.correlation(), together.correlation(), atol=1e-12)
@@ -0,0 +1,154 @@
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthai.cohort import classify_vitals
+from healthai.health_rules import RULES_PATH, RuleTable, RuleTableError, evaluate_rules, load_rule_table
+
+HR_LOW = "💙 **Heart Rate**: Below normal range - may indicate bradycardia. Consider consulting a cardiologist."
+HR_HIGH = "❤️ **Heart Rate**: Above normal range - may indicate tachycardia. Monitor stress levels and caffeine intake."
+HR_NORMAL = "💚 **Heart Rate**: Within normal range (60-100 bpm). Good cardiovascular health indicator."
+BP_ELEVATED = "🔴 **Blood Pressure**: Elevated readings detected. Consider lifestyle modifications and medical consultation."
+BP_STAGE1 = "🟡 **Blood Pressure**: Stage 1 hypertension range. Monitor closely and consider preventive measures."
+BP_NORMAL = "💚 **Blood Pressure**: Within normal range. Continue healthy lifestyle habits."
+GLUCOSE_DIABETIC = "🔴 **Blood Glucose**: Elevated levels may indicate diabetes. Consult healthcare provider immediately."
+GLUCOSE_PREDIABETIC = "🟡 **Blood Glucose**: Pre-diabetic range. Consider dietary modifications and regular monitoring."
+GLUCOSE_NORMAL = "💚 **Blood Glucose**: Within normal range. Good metabolic health."
+
+
+def baseline(heart_rate, systolic, diastolic, glucose):
+    """The dashboard's scoring before the rule table: (statuses, insights, score)"""
+    score = 100
+    if heart_rate < 60:
+        hr = ('Low', HR_LOW)
+    elif heart_rate > 100:
+        hr = ('High', HR_HIGH)
+    else:
+        hr = ('Normal', HR_NORMAL)
+    if hr[0] != 'Normal':
+        score -= 15
+
+    if systolic > 140 or diastolic > 90:
+        bp = ('Elevated', BP_ELEVATED)
+    elif systolic > 130 or diastolic > 80:
+        bp = ('Stage 1', BP_STAGE1)
+    else:
+        bp = ('Normal', BP_NORMAL)
+    if bp[0] != 'Normal':
+        score -= 20
+
+    if glucose > 126:
+        glucose_status = ('Diabetic', GLUCOSE_DIABETIC)
+    elif glucose > 100:
+        glucose_status = ('Pre-diabetic', GLUCOSE_PREDIABETIC)
+    else:
+        glucose_status = ('Normal', GLUCOSE_NORMAL)
+    if glucose_status[0] != 'Normal':
+        score -= 25
+
+    statuses = (hr[0], bp[0], glucose_status[0])
+    return statuses, [hr[1], bp[1], glucose_status[1]], score
+
+
+@pytest.fixture(scope="module")
+def means():
+    # Every boundary value on each side, plus random patients and missing readings
+    grid = list(itertools.product(
+        [45, 59.9, 60, 80, 100, 100.1, np.nan],
+        [110, 130, 130.5, 140, 141],
+        [70, 80, 80.5, 90, 91],
+        [85, 100, 100.2, 126, 126.1, np.nan],
+    ))
+    rng = np.random.default_rng(21)
+    random_rows = np.column_stack([rng.uniform(40, 130, 500), rng.uniform(95, 175, 500),
+                                   rng.uniform(55, 110, 500), rng.uniform(70, 200, 500)])
+    return pd.DataFrame(np.vstack([np.array(grid, dtype=float), random_rows]),
+                        columns=['heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose'])
+
+
+def test_scores_and_statuses_match_the_baseline_thresholds(means):
+    evaluation = evaluate_rules(means)
+    expected = [baseline(*row) for row in means.itertuples(index=False)]
+
+    assert list(evaluation.score) == [score for _, _, score in expected]
+    actual_statuses = list(evaluation.statuses[['hr_status', 'bp_status', 'glucose_status']].itertuples(index=False, name=None))
+    assert actual_statuses == [statuses for statuses, _, _ in expected]
+
+
+def test_insights_match_the_baseline_texts(means):
+    evaluation = evaluate_rules(means)
+    for row in range(0, len(means), 37):
+        assert evaluation.insights(row) == baseline(*means.iloc[row])[1]
+
+
+def test_cohort_classification_uses_the_same_rules(means):
+    frame = classify_vitals(means)
+    assert list(frame.columns) == ['hr_status', 'bp_status', 'glucose_status', 'health_score']
+    assert list(frame['health_score']) == list(evaluate_rules(means).score)
+
+
+def test_breakdown_lists_the_points_deducted_per_metric():
+    evaluation = evaluate_rules(pd.DataFrame([{'heart_rate': 110, 'systolic_bp': 135, 'diastolic_bp': 70,
+                                               'blood_glucose': 90}]))
+    breakdown = evaluation.breakdown()
+
+    assert breakdown.to_dict('index') == {
+        'heart_rate': {'status': 'High', 'deduction': 15},
+        'blood_pressure': {'status': 'Stage 1', 'deduction': 20},
+        'blood_glucose': {'status': 'Normal', 'deduction': 0},
+    }
+    assert evaluation.score.iloc[0] == 65
+    assert evaluation.hit_counts()[['hr_high', 'bp_stage1', 'bp_elevated']].tolist() == [1, 1, 0]
+
+
+def test_bundled_table_is_versioned():
+    with open(RULES_PATH, encoding="utf-8") as f:
+        spec = json.load(f)
+    assert load_rule_table().version == spec['version']
+
+
+def _spec(**rule):
+    return {
+        "version": "test",
+        "max_score": 10,
+        "metrics": {"heart_rate": {"status_column": "hr_status", "normal_status": "OK", "normal_insight": "fine"}},
+        "rules": [
+            {"id": "low", "metric": "heart_rate", "level": 1, "status": "Low", "penalty": 4,
+             "conditions": [["heart_rate", "<", 50]]},
+            {"id": "both", "metric": "heart_rate", "level": 2, "status": "Both", "penalty": 20, "match": "all",
+             "conditions": [["heart_rate", "<", 50], ["systolic_bp", ">", 150]], **rule},
+        ],
+    }
+
+
+def test_match_all_levels_and_score_floor():
+    table = RuleTable(_spec())
+    evaluation = table.evaluate(pd.DataFrame({'heart_rate': [45, 45, 70], 'systolic_bp': [120, 160, 160]}))
+
+    assert list(evaluation.statuses['hr_status']) == ['Low', 'Both', 'OK']
+    assert list(evaluation.score) == [6, 0, 10]
+
+
+def test_missing_columns_match_nothing():
+    evaluation = RuleTable(_spec()).evaluate(pd.DataFrame({'heart_rate': [45.0]}))
+    assert list(evaluation.statuses['hr_status']) == ['Low']
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"metric": "weight"}, "undefined metrics"),
+    ({"conditions": []}, "without conditions"),
+    ({"conditions": [["heart_rate", "==", 50]]}, "Unknown operators"),
+])
+def test_malformed_tables_are_rejected(change, message):
+    with pytest.raises(RuleTableError, match=message):
+        RuleTable(_spec(**change))
+
+
+def test_table_without_rules_key_is_rejected():
+    spec = _spec()
+    del spec['rules']
+    with pytest.raises(RuleTableError):
+        RuleTable(spec)
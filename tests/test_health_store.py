@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from healthai.health_store import HealthDataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HealthDataStore(str(tmp_path))
+
+
+def readings(days: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'date': pd.date_range("2024-01-01", periods=days, freq="D"),
+        'heart_rate': np.linspace(60, 90, days).astype(np.float32),
+        'blood_glucose': np.r_[np.full(days - 1, 95.0), np.nan],
+    })
+
+
+def arrow_files(store: HealthDataStore, patient_id: str):
+    return sorted(name for name in os.listdir(store.patient_dir(patient_id)) if name.endswith(".arrow"))
+
+
+def test_saved_data_opens_with_the_same_values(store):
+    data = readings(10)
+    data_hash = store.save("Jane Doe", data)
+
+    pdt.assert_frame_equal(store.open("Jane Doe", data_hash), data)
+    assert store.open(" jane doe ") is store.open("Jane Doe", data_hash)
+
+
+def test_patient_names_never_appear_in_paths(store):
+    store.save("Jane Doe", readings(3))
+    assert "jane" not in store.patient_dir("Jane Doe").lower()
+
+
+def test_only_the_latest_upload_is_kept(store):
+    first = store.save("Jane Doe", readings(10))
+    store.open("Jane Doe", first)
+    latest = store.save("Jane Doe", readings(12))
+
+    assert arrow_files(store, "Jane Doe") == [f"{latest}.arrow"]
+    assert store.latest_hash("Jane Doe") == latest
+    assert store.open("Jane Doe", first) is None
+    assert len(store.open("Jane Doe")) == 12
+
+
+def test_saving_the_same_data_again_keeps_one_file(store):
+    data_hash = store.save("Jane Doe", readings(5))
+    assert store.save("Jane Doe", readings(5)) == data_hash
+    assert arrow_files(store, "Jane Doe") == [f"{data_hash}.arrow"]
+
+
+def test_patients_are_stored_separately(store):
+    store.save("Jane Doe", readings(5))
+    store.save("John Roe", readings(7))
+
+    assert len(store.open("Jane Doe")) == 5
+    assert len(store.open("John Roe")) == 7
+    assert store.open("Nobody") is None
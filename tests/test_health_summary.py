@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthai.health_data import generate_sample_health_data
+from healthai.health_summary import (
+    HealthSummary,
+    dataset_hash,
+    extend_health_summary,
+    summarize_health_data,
+)
+
+
+@pytest.fixture
+def vitals():
+    np.random.seed(11)
+    return generate_sample_health_data(120, end_date=pd.Timestamp('2024-06-01'))
+
+
+def test_summary_matches_pandas(vitals):
+    summary = HealthSummary(vitals)
+    columns = summary.columns
+
+    pd.testing.assert_series_equal(pd.Series(summary.means), vitals[columns].mean(), check_names=False)
+    pd.testing.assert_series_equal(pd.Series(summary.stds), vitals[columns].std(), check_names=False)
+    pd.testing.assert_series_equal(pd.Series(summary.recent), vitals[columns].tail(7).mean(), check_names=False)
+    pd.testing.assert_series_equal(pd.Series(summary.previous), vitals[columns].iloc[-14:-7].mean(),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(summary.correlation(columns), vitals[columns].corr(), atol=1e-10)
+
+
+def test_hash_depends_on_content_only(vitals):
+    assert dataset_hash(vitals) == dataset_hash(vitals.copy())
+
+    changed = vitals.copy()
+    changed.loc[5, 'heart_rate'] += 1
+    assert dataset_hash(changed) != dataset_hash(vitals)
+
+
+def test_identical_data_reuses_the_memoized_summary(vitals):
+    assert summarize_health_data(vitals) is summarize_health_data(vitals.copy())
+    assert summarize_health_data(vitals.iloc[:0]) is None
+
+
+def test_appended_rows_give_the_same_summary_as_a_full_recompute(vitals):
+    previous = summarize_health_data(vitals.iloc[:100].copy())
+    extended = extend_health_summary(previous, vitals)
+    fresh = HealthSummary(vitals)
+
+    assert extended.data_hash == dataset_hash(vitals)
+    assert extended.count == len(vitals)
+    for field in ('means', 'stds', 'mins', 'maxs', 'recent', 'previous'):
+        np.testing.assert_allclose(list(getattr(extended, field).values()),
+                                   list(getattr(fresh, field).values()), rtol=1e-12)
+    pd.testing.assert_frame_equal(extended.correlation(extended.columns, 30),
+                                  fresh.correlation(fresh.columns, 30), atol=1e-10)
+
+
+def test_edited_history_is_summarized_from_scratch(vitals):
+    previous = summarize_health_data(vitals.iloc[:100].copy())
+    edited = vitals.copy()
+    edited.loc[3, 'systolic_bp'] = 200.0
+
+    summary = extend_health_summary(previous, edited)
+    assert summary.data_hash == dataset_hash(edited)
+    assert summary.means['systolic_bp'] == pytest.approx(edited['systolic_bp'].mean())
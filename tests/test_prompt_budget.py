@@ -0,0 +1,98 @@
+from healthai.prompt_budget import (
+    TRUNCATION_MARKER,
+    Section,
+    build_prompt,
+    compact_text,
+    count_tokens,
+    truncate_to_tokens,
+)
+
+
+def _words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def _sections():
+    return [
+        Section("instructions", "You are a careful medical assistant. Answer briefly.\n"),
+        Section("history", _words("history", 200), priority=30, min_tokens=20, prefix="History:\n", suffix="\n"),
+        Section("context", _words("context", 200), priority=60, min_tokens=40, prefix="Context:\n", suffix="\n"),
+        Section("question", "Is my blood pressure too high?", priority=80, min_tokens=16, prefix="Question: "),
+    ]
+
+
+def test_prompt_under_budget_is_unchanged():
+    sections = _sections()
+    expected = "".join(section.render() for section in sections)
+    built = build_prompt(sections, budget=10000)
+
+    assert built.text == expected
+    assert built.shortened == {}
+    assert built.tokens == built.original_tokens == count_tokens(expected)
+
+
+def test_lowest_priority_section_is_truncated_first():
+    full = count_tokens("".join(section.render() for section in _sections()))
+    built = build_prompt(_sections(), budget=full - 100)
+
+    assert built.tokens <= built.budget
+    assert list(built.shortened) == ["history"]
+    assert _words("context", 200) in built.text
+    assert TRUNCATION_MARKER in built.text
+
+
+def test_min_tokens_moves_the_remaining_cut_to_the_next_priority():
+    full = count_tokens("".join(section.render() for section in _sections()))
+    history_tokens = count_tokens(_words("history", 200))
+    built = build_prompt(_sections(), budget=full - history_tokens - 50)
+
+    assert built.tokens <= built.budget
+    assert list(built.shortened) == ["history", "context"]
+    assert built.shortened["history"][1] <= 20
+    assert built.shortened["context"][1] >= 40
+    assert "Is my blood pressure too high?" in built.text
+
+
+def test_sections_are_never_cut_below_min_tokens_and_instructions_stay_whole():
+    built = build_prompt(_sections(), budget=10)
+
+    assert built.tokens > built.budget
+    assert "You are a careful medical assistant. Answer briefly." in built.text
+    assert built.shortened["history"][1] == 20
+    assert built.shortened["context"][1] == 40
+    # Sections already within their floor are left alone
+    assert "question" not in built.shortened
+    assert "Is my blood pressure too high?" in built.text
+
+
+def test_compaction_is_tried_before_truncation():
+    repeated = "\n".join(["Medication list:   aspirin"] * 50 + ["Allergy: penicillin"])
+    sections = [
+        Section("instructions", "Answer the question.\n"),
+        Section("records", repeated, priority=30, prefix="Records:\n"),
+    ]
+    budget = count_tokens("Answer the question.\nRecords:\n" + compact_text(repeated)) + 5
+    built = build_prompt(sections, budget=budget)
+
+    assert TRUNCATION_MARKER not in built.text
+    assert built.text.endswith("Medication list: aspirin\nAllergy: penicillin")
+
+
+def test_truncate_keeps_head_and_tail_within_the_limit():
+    text = _words("w", 300)
+    cut = truncate_to_tokens(text, 60)
+
+    assert count_tokens(cut) <= 60
+    head, tail = cut.split(TRUNCATION_MARKER)
+    assert text.startswith(head) and text.endswith(tail)
+    assert len(head) > len(tail)
+    assert truncate_to_tokens(text, count_tokens(text)) == text
+
+
+def test_approximate_token_counts():
+    assert count_tokens("") == 0
+    assert count_tokens("heart rate") == 2
+    # Long words cost one token per six letters, numbers one per three digits
+    assert count_tokens("internationalization") == 4
+    assert count_tokens("120/80") == 3
+    assert count_tokens("1234567") == 3
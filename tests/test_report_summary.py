@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from healthai.prompt_budget import count_tokens
+from healthai.report_summary import merge_extractions, merge_report, report_prompts, split_text, summarize_report
+
+PARAGRAPH = ("Patient seen for routine follow-up. Blood pressure 132/84 mmHg, heart rate 76 bpm. "
+             "Fasting glucose 104 mg/dL; advised dietary changes and a repeat test in three months.")
+
+
+@pytest.mark.parametrize("max_tokens", [8, 40, 120])
+def test_chunks_fit_the_token_budget_and_keep_every_word(max_tokens):
+    text = "\n\n".join(f"Visit {number}.\n{PARAGRAPH}" for number in range(12))
+    chunks = split_text(text, max_tokens)
+
+    assert all(count_tokens(chunk) <= max_tokens for chunk in chunks)
+    # Separators between chunks (including a sentence's full stop) are dropped, nothing else
+    assert re.findall(r"\w+", " ".join(chunks)) == re.findall(r"\w+", text)
+
+
+def test_short_text_is_one_chunk_and_blank_text_none():
+    assert split_text(PARAGRAPH, 1000) == [PARAGRAPH]
+    assert split_text("  \n\n ", 1000) == []
+
+
+def test_paragraphs_are_kept_together_when_they_fit():
+    first, second = "Heart rate 70 bpm.", "Glucose 99 mg/dL."
+    budget = max(count_tokens(first), count_tokens(second))
+    assert split_text(f"{first}\n\n{second}", budget) == [first, second]
+
+
+def test_text_without_separators_is_cut_between_tokens():
+    chunks = split_text("x" * 100, 4)
+    assert "".join(chunks) == "x" * 100
+    assert all(count_tokens(chunk) <= 4 for chunk in chunks)
+
+
+def test_merge_drops_repeated_lines_in_chunk_order():
+    answers = ["- Heart Rate: 76 bpm\n- Date: 2024-05-01", "* heart rate:   76 bpm\n- Glucose: 104 mg/dL"]
+    assert merge_extractions(answers) == "- Heart Rate: 76 bpm\n- Date: 2024-05-01\n- Glucose: 104 mg/dL"
+
+
+def test_failed_chunks_are_reported_and_left_out():
+    report = merge_report(["- Heart Rate: 76 bpm", "❌ Request timed out", "", "- Glucose: 104 mg/dL"])
+
+    assert report.chunks == 4
+    assert report.failed == [1, 2]
+    assert report.text == "- Heart Rate: 76 bpm\n- Glucose: 104 mg/dL"
+
+
+def test_summarize_sends_every_chunk_prompt_at_once():
+    text = "\n\n".join([PARAGRAPH] * 3)
+    batches = []
+
+    def generate_many(prompts):
+        batches.append(prompts)
+        return [f"- Section {number}" for number in range(len(prompts))]
+
+    report = summarize_report(text, generate_many, max_tokens=count_tokens(PARAGRAPH))
+    assert batches == [report_prompts(text, count_tokens(PARAGRAPH))]
+    assert "(part 3 of 3)" in batches[0][2]
+    assert report.text == "- Section 0\n- Section 1\n- Section 2"
+
+
+def test_empty_report_makes_no_model_call():
+    report = summarize_report("", lambda prompts: pytest.fail("no prompts expected"))
+    assert (report.text, report.chunks, report.failed) == ("", 0, [])
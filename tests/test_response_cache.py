@@ -0,0 +1,123 @@
+import pytest
+
+from healthai import response_cache
+from healthai.response_cache import LRUCache, ResponseCache, SQLiteCache, make_cache_key
+
+PARAMETERS = {"decoding_method": "greedy", "max_new_tokens": 400}
+
+
+class Clock:
+    """Stands in for the time module; each call moves the clock a second on"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+def test_key_is_stable_across_parameter_order():
+    key = make_cache_key("granite", PARAMETERS, {}, "How is my blood pressure?")
+
+    assert key == make_cache_key("granite", dict(reversed(list(PARAMETERS.items()))), {}, "How is my blood pressure?")
+    assert len(key) == 64
+
+
+@pytest.mark.parametrize("change", [
+    {"model_id": "other-model"},
+    {"parameters": {**PARAMETERS, "max_new_tokens": 401}},
+    {"moderations": {"hap": {"input": True}}},
+    {"prompt": "How is my blood pressure? "},
+])
+def test_key_changes_with_anything_that_changes_the_output(change):
+    arguments = {"model_id": "granite", "parameters": PARAMETERS, "moderations": {}, "prompt": "How is my blood pressure?"}
+    assert make_cache_key(**arguments) != make_cache_key(**{**arguments, **change})
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+    assert len(cache) == 2
+
+
+def test_lru_entries_expire(clock):
+    cache = LRUCache(ttl=10)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+
+    clock.now += 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_keeps_the_most_recently_used_rows(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache" / "responses.db"), max_entries=3)
+    for key in "abc":
+        cache.set(key, key.upper())
+    assert cache.get("a") == "A"
+    cache.set("d", "D")
+    cache.set("e", "E")
+
+    assert len(cache) == 3
+    assert [cache.get(key) for key in "abcde"] == ["A", None, None, "D", "E"]
+
+
+def test_sqlite_rows_expire_and_persist_across_connections(tmp_path, clock):
+    path = str(tmp_path / "responses.db")
+    SQLiteCache(path, ttl=100).set("a", "1")
+    cache = SQLiteCache(path, ttl=100)
+    assert cache.get("a") == "1"
+
+    clock.now += 100
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(disk_path=path).set("key", "answer")
+    cache = ResponseCache(disk_path=path)
+
+    assert len(cache.memory) == 0
+    assert cache.get("key") == "answer"
+    assert cache.memory.get("key") == "answer"
+    assert cache.get("key") == "answer"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (2, 1, 1, 0)
+
+
+def test_hit_and_miss_counters():
+    cache = ResponseCache()
+    assert cache.get("key") is None
+    cache.set("key", "answer")
+    assert cache.get("key") == "answer"
+    assert cache.get("other") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["memory_entries"]) == (1, 2, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_cache_can_be_turned_off_from_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("HEALTHAI_CACHE_SIZE", "0")
+    assert ResponseCache.from_env() is None
+
+    monkeypatch.setenv("HEALTHAI_CACHE_SIZE", "8")
+    monkeypatch.setenv("HEALTHAI_CACHE_TTL", "0")
+    monkeypatch.setenv("HEALTHAI_CACHE_PATH", str(tmp_path / "responses.db"))
+    cache = ResponseCache.from_env()
+    assert (cache.memory.max_entries, cache.memory.ttl, cache.disk.ttl) == (8, None, None)
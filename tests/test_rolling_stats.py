@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthai.rolling_stats import RollingStats
+
+COLUMNS = ['heart_rate', 'systolic_bp', 'blood_glucose']
+
+
+@pytest.fixture
+def vitals():
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=200, freq='D'),
+        'heart_rate': rng.normal(72, 6, 200),
+        'systolic_bp': rng.normal(120, 8, 200),
+        'blood_glucose': rng.normal(95, 12, 200),
+    })
+    # Scattered gaps, as in real uploads
+    frame.loc[rng.choice(200, 25, replace=False), 'heart_rate'] = np.nan
+    frame.loc[rng.choice(200, 10, replace=False), 'blood_glucose'] = np.nan
+    return frame
+
+
+def _stats_in_chunks(frame, chunk_size, window=7):
+    stats = RollingStats(COLUMNS, window)
+    for start in range(0, len(frame), chunk_size):
+        stats.update(frame.iloc[start:start + chunk_size])
+    return stats
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 64, 1000])
+def test_totals_match_pandas_for_any_chunking(vitals, chunk_size):
+    stats = _stats_in_chunks(vitals, chunk_size)
+
+    assert stats.rows == len(vitals)
+    pd.testing.assert_series_equal(pd.Series(stats.means()), vitals[COLUMNS].mean(), check_names=False)
+    pd.testing.assert_series_equal(pd.Series(stats.stds()), vitals[COLUMNS].std(), check_names=False)
+    pd.testing.assert_series_equal(pd.Series(stats.mins()), vitals[COLUMNS].min(), check_names=False)
+    pd.testing.assert_series_equal(pd.Series(stats.maxs()), vitals[COLUMNS].max(), check_names=False)
+
+
+@pytest.mark.parametrize("window", [3, 7, 30])
+def test_recent_and_previous_windows_match_rolling_mean(vitals, window):
+    stats = _stats_in_chunks(vitals, 17, window)
+    rolling = vitals[COLUMNS].rolling(window, min_periods=1).mean()
+
+    pd.testing.assert_series_equal(pd.Series(stats.recent()), rolling.iloc[-1], check_names=False)
+    pd.testing.assert_series_equal(pd.Series(stats.previous()), rolling.iloc[-window - 1], check_names=False)
+
+
+def test_recent_window_std_matches_rolling_std(vitals):
+    stats = RollingStats.from_frame(vitals, COLUMNS, window=30)
+    recent = pd.DataFrame(stats.tail()[-30:], columns=COLUMNS)
+
+    expected = vitals[COLUMNS].rolling(30, min_periods=1).std().iloc[-1]
+    pd.testing.assert_series_equal(recent.std(), expected, check_names=False)
+
+
+def test_large_offsets_keep_the_variance_accurate():
+    # Readings far from zero with a small spread are where a naive sum of squares loses precision
+    frame = pd.DataFrame({column: 1000.0 + np.tile([0.0, 0.5, 1.0], 100) for column in COLUMNS})
+    stats = RollingStats.from_frame(frame, COLUMNS)
+
+    np.testing.assert_allclose(list(stats.stds().values()), frame.std().to_numpy(), rtol=1e-6)
+
+
+def test_append_matches_update_and_treats_missing_vitals_as_absent(vitals):
+    appended = RollingStats.from_frame(vitals.iloc[:-1], COLUMNS)
+    appended.append({'heart_rate': 80.0, 'systolic_bp': 130.0})
+
+    expected_frame = pd.concat([vitals.iloc[:-1][COLUMNS],
+                                pd.DataFrame([{'heart_rate': 80.0, 'systolic_bp': 130.0}])])
+    assert appended.rows == len(vitals)
+    pd.testing.assert_series_equal(pd.Series(appended.means()), expected_frame.mean(), check_names=False)
+    assert appended.count[COLUMNS.index('blood_glucose')] == expected_frame['blood_glucose'].count()
+
+
+def test_copy_is_independent(vitals):
+    stats = RollingStats.from_frame(vitals, COLUMNS)
+    before = stats.means()
+    other = stats.copy()
+    other.update(vitals.iloc[:10])
+
+    assert stats.means() == before
+    assert other.rows == stats.rows + 10
+
+
+def test_empty_and_single_reading_statistics_are_nan():
+    stats = RollingStats(COLUMNS)
+    assert stats.recent() is None
+    assert all(np.isnan(value) for value in stats.mins().values())
+
+    stats.append({'heart_rate': 70.0, 'systolic_bp': 120.0, 'blood_glucose': 90.0})
+    assert stats.means()['heart_rate'] == 70.0
+    assert all(np.isnan(value) for value in stats.stds().values())
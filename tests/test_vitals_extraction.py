@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+from healthai.vitals_extraction import extract_vitals, parse_page
+
+
+def _single(text):
+    readings, _ = parse_page(text)
+    assert len(readings) == 1, readings
+    reading = dict(readings[0])
+    reading.pop('date')
+    return reading
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Blood Pressure: 128/84 mmHg", {'systolic_bp': 128, 'diastolic_bp': 84}),
+    ("BP 140/90", {'systolic_bp': 140, 'diastolic_bp': 90}),
+    ("B/P (sitting): 118 / 76", {'systolic_bp': 118, 'diastolic_bp': 76}),
+    ("Reading was 130 / 85 mm Hg", {'systolic_bp': 130, 'diastolic_bp': 85}),
+    ("Heart rate: 72 bpm", {'heart_rate': 72}),
+    ("Pulse rate 88/min", {'heart_rate': 88}),
+    ("HR: 64", {'heart_rate': 64}),
+    ("Glucose: 110 mg/dL", {'blood_glucose': 110}),
+    ("Blood sugar 6.1 mmol/L", {'blood_glucose': pytest.approx(109.8)}),
+    ("FBS 5.5", {'blood_glucose': pytest.approx(99.0)}),
+    ("Fasting glucose (mg / dl): 126", {'blood_glucose': 126}),
+    ("Temperature: 98.6 F", {'temperature': pytest.approx(98.6)}),
+    ("Temp 37.2 °C", {'temperature': pytest.approx(98.96)}),
+    ("temp 38", {'temperature': pytest.approx(100.4)}),
+    ("Weight: 70 kg", {'weight': 70}),
+    ("Wt 154 lbs", {'weight': pytest.approx(69.853225)}),
+    ("Weight 165 pounds", {'weight': pytest.approx(74.84274)}),
+    ("Sleep: 7.5 hours", {'sleep_hours': 7.5}),
+    ("Sleep duration 6 hrs", {'sleep_hours': 6}),
+])
+def test_unit_variants_are_converted_to_dashboard_units(text, expected):
+    assert _single(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Heart rate: 900",
+    "Blood pressure 300/20",
+    "Temperature 150 F",
+    "Glucose: 4 mg/dL",
+])
+def test_implausible_values_are_ignored(text):
+    readings, _ = parse_page(text)
+    assert readings == []
+
+
+def test_readings_take_the_latest_date_and_repeats_start_a_new_row():
+    text = ("Visit 2024-03-01\nBP 130/85, pulse 70\nRepeat BP 126/82\n"
+            "Visit March 5, 2024\nGlucose 102 mg/dL")
+    readings, date = parse_page(text)
+
+    assert readings == [
+        {'date': pd.Timestamp('2024-03-01'), 'systolic_bp': 130, 'diastolic_bp': 85, 'heart_rate': 70},
+        {'date': pd.Timestamp('2024-03-01'), 'systolic_bp': 126, 'diastolic_bp': 82},
+        {'date': pd.Timestamp('2024-03-05'), 'blood_glucose': 102},
+    ]
+    assert date == pd.Timestamp('2024-03-05')
+
+
+@pytest.mark.parametrize("text", ["2024-03-01", "03/01/2024", "1 Mar 2024", "Mar 1, 2024", "March 1 2024"])
+def test_date_formats(text):
+    readings, _ = parse_page(f"{text}: HR 70")
+    assert readings[0]['date'] == pd.Timestamp('2024-03-01')
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Heart rate on 2024-01-05: 72", {'heart_rate': 72}),
+    ("Blood pressure on 01/05/2024 was 124/80", {'systolic_bp': 124, 'diastolic_bp': 80}),
+    ("Glucose (Jan 5, 2024): 104 mg/dL", {'blood_glucose': 104}),
+])
+def test_date_between_label_and_value_is_skipped_and_applied(text, expected):
+    readings, _ = parse_page(text)
+    assert readings == [{'date': pd.Timestamp('2024-01-05'), **expected}]
+
+
+@pytest.mark.parametrize("text", ["Heart rate 1234", "Pulse 72.5.1", "HR 2024"])
+def test_values_are_never_read_from_part_of_a_longer_number(text):
+    readings, _ = parse_page(text)
+    assert readings == []
+
+
+def test_dates_carry_over_to_later_pages():
+    result = extract_vitals(["Report date 2024-01-10\nHeart rate 75", "Blood pressure 120/80"])
+
+    assert list(result.health_data['date']) == [pd.Timestamp('2024-01-10')] * 2
+    assert result.unparsed_pages == 0
+
+
+def test_fallback_only_sees_pages_the_rules_could_not_read():
+    seen = []
+
+    def fallback(pages):
+        seen.extend(pages)
+        return ["Heart rate 81 bpm" for _ in pages]
+
+    pages = [
+        "2024-02-01 Pulse 66",
+        "Vital signs were recorded in the attached chart.",
+        "Discharge instructions: rest and fluids.",
+    ]
+    result = extract_vitals(pages, fallback)
+
+    assert seen == [pages[1]]
+    assert result.unparsed_pages == 1
+    assert list(result.health_data['heart_rate']) == [66, 81]
+    assert list(result.health_data['date']) == [pd.Timestamp('2024-02-01')] * 2
+
+
+def test_no_fallback_call_when_every_page_parses():
+    def fallback(pages):
+        raise AssertionError("fallback should not be called")
+
+    result = extract_vitals(["BP 120/80 HR 70", "Glucose 95 mg/dL"], fallback)
+    assert result.unparsed_pages == 0
+    assert len(result.health_data) == 2
+
+
+def test_frame_has_the_csv_schema():
+    frame = extract_vitals(["2024-01-01 BP 120/80 HR 70 Glucose 90"]).health_data
+
+    assert list(frame.columns) == ['date', 'heart_rate', 'systolic_bp', 'diastolic_bp', 'blood_glucose']
+    assert str(frame['date'].dtype) == 'datetime64[ns]'
+    assert all(str(frame[column].dtype) == 'float32' for column in frame.columns[1:])
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from healthai.mock_watsonx import mock_generated_text
+from healthai.response_cache import ResponseCache
+from healthai.watson_client import WatsonStreamError, iter_sse_events
+
+PROMPT = "Patient question:\nIs a resting heart rate of 58 normal?"
+
+
+def test_iter_sse_events_joins_data_lines_and_ignores_other_fields():
+    lines = [
+        ": keep-alive",
+        "id: 1",
+        "event: message",
+        'data: {"results": [{"generated_text":',
+        'data:  "Hello"}]}',
+        "",
+        'data: {"results": [{"generated_text": " there"}]}',
+        "",
+        "data: [DONE]",
+        "",
+    ]
+    events = list(iter_sse_events(lines))
+    assert [event["results"][0]["generated_text"] for event in events] == ["Hello", " there"]
+
+
+def test_iter_sse_events_flushes_final_event_without_blank_line():
+    events = list(iter_sse_events(['data: {"results": []}']))
+    assert events == [{"results": []}]
+
+
+def test_stream_events_split_across_reads(mock_server, make_client):
+    url, settings = mock_server(split_events=True, tokens_per_event=3)
+    client = make_client(url)
+
+    chunks = list(client.generate_stream(PROMPT))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == mock_generated_text(PROMPT)
+    assert settings.stats()["generation_stream"] == {"200": 1}
+
+
+def test_stream_cut_off_halfway_raises_and_is_not_cached(mock_server, make_client):
+    url, settings = mock_server(stream_abort_rate=1.0)
+    client = make_client(url, cache=ResponseCache())
+
+    received = []
+    with pytest.raises(WatsonStreamError):
+        for chunk in client.generate_stream(PROMPT):
+            received.append(chunk)
+
+    full_text = mock_generated_text(PROMPT)
+    assert received and len("".join(received)) < len(full_text)
+    assert client.cache.get(client.cache_key(PROMPT)) is None
+    assert settings.stats()["generation_stream"] == {"499": 1}
+
+
+def test_401_fetches_a_new_token_and_retries_once(mock_server, make_client):
+    url, settings = mock_server(scripted_statuses=[401])
+    client = make_client(url)
+
+    assert client.generate(PROMPT) == mock_generated_text(PROMPT)
+
+    stats = settings.stats()
+    assert stats["generation"] == {"200": 1, "401": 1}
+    assert stats["token"] == {"200": 2}
+
+
+def test_repeated_401_is_returned_after_one_retry(mock_server, make_client):
+    url, settings = mock_server(scripted_statuses=[401, 401])
+    client = make_client(url)
+
+    response = client._post(f"{url}/ml/v1/text/generation", client.build_body(PROMPT))
+
+    assert response.status_code == 401
+    assert settings.stats()["generation"] == {"401": 2}
+
+
+def test_429_waits_for_retry_after_then_succeeds(mock_server, make_client):
+    url, settings = mock_server(scripted_statuses=[429], retry_after=1)
+    client = make_client(url)
+
+    started = time.perf_counter()
+    text = client.generate(PROMPT)
+    elapsed = time.perf_counter() - started
+
+    assert text == mock_generated_text(PROMPT)
+    assert elapsed >= 1.0
+    assert settings.stats()["generation"] == {"200": 1, "429": 1}
+
+
+def test_cached_stream_is_replayed_without_a_request(mock_server, make_client):
+    url, settings = mock_server()
+    client = make_client(url, cache=ResponseCache())
+
+    first = list(client.generate_stream(PROMPT))
+    second = list(client.generate_stream(PROMPT))
+
+    assert second == ["".join(first)]
+    assert settings.stats()["generation_stream"] == {"200": 1}
+    assert client.cache.stats()["hits"] == 1